@@ -0,0 +1,141 @@
+"""Compare pose inference backends on PostureBot's own features.
+
+Every frame of a clip (or a folder of images, or a few seconds of camera)
+is run through each backend configuration. The keypoints go through
+posturekit.features.posture_metrics() and are compared with the reference
+backend (the first configuration, MediaPipe by default):
+
+    detect    share of frames with a person
+    tilt_mae  mean |head tilt - reference| in degrees, frames both detected
+    sev_mae   mean |severity - reference|
+    agree     share of frames with the same POSTURE_OK / POSTURE_BAD call
+
+Throughput is reported as frames/s on the wall clock and frames per
+CPU-second, i.e. per core. The second number matters when the pose loop
+shares the machine with a game. ONNX runs are repeated for every --threads
+value. MediaPipe has no thread knob; pin it with taskset to compare.
+
+    python bench/inference_backends.py --video clip.mp4 --backends mediapipe onnx --threads 1 2 4
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from posturekit.features import posture_metrics
+from posturekit.inference import MediaPipeBackend, OnnxBackend
+
+
+def load_frames(args):
+    """RGB frames held in memory, so decoding is not part of the timing"""
+    import cv2
+    frames = []
+    if args.images:
+        for path in sorted(glob.glob(os.path.join(args.images, "*")))[:args.frames]:
+            img = cv2.imread(path)
+            if img is not None:
+                frames.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        return frames
+    cap = cv2.VideoCapture(args.video if args.video else args.camera)
+    while len(frames) < args.frames:
+        ok, img = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def configurations(args):
+    """(label, factory) for every backend / thread count / optimization level"""
+    for name in args.backends:
+        if name == "mediapipe":
+            yield "mediapipe", lambda: MediaPipeBackend(str(ROOT / args.task))
+        elif name == "onnx":
+            for threads in args.threads:
+                for opt in args.opt:
+                    yield (f"onnx t={threads} opt={opt}",
+                           lambda threads=threads, opt=opt: OnnxBackend(args.onnx_model, threads=threads, optimization=opt))
+        else:
+            raise SystemExit(f"unknown backend {name!r}")
+
+
+def run(factory, frames, warmup=5):
+    backend = factory()
+    try:
+        for i in range(min(warmup, len(frames))):
+            backend.detect(frames[i], i)
+        features = []
+        t0, c0 = time.perf_counter(), time.process_time()
+        for i, frame in enumerate(frames):
+            lm = backend.detect(frame, 1000 + i * 33)  # VIDEO mode wants increasing timestamps
+            features.append(posture_metrics(lm, tilt_is_bad=True) if lm is not None else None)
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+    finally:
+        backend.close()
+    return features, wall, cpu
+
+
+def compare(features, reference):
+    both = [(f, r) for f, r in zip(features, reference) if f and r]
+    out = {"detect": round(sum(f is not None for f in features) / len(features), 3)}
+    if both:
+        out["tilt_mae"] = round(statistics.fmean(abs(f["headtiltangle"] - r["headtiltangle"]) for f, r in both), 2)
+        out["sev_mae"] = round(statistics.fmean(abs(f["severity"] - r["severity"]) for f, r in both), 2)
+    out["agree"] = round(sum((f and f["type"]) == (r and r["type"]) for f, r in zip(features, reference))
+                         / len(features), 3)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--video")
+    src.add_argument("--images", help="directory of frames")
+    src.add_argument("--camera", type=int)
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--backends", nargs="+", default=["mediapipe", "onnx"])
+    ap.add_argument("--task", default="consequence/pose_landmarker_full.task", help="MediaPipe model")
+    ap.add_argument("--onnx-model", default=None, help="default: $POSTUREBOT_ONNX_MODEL")
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 2])
+    ap.add_argument("--opt", nargs="+", default=["all"], choices=OnnxBackend.OPT_LEVELS)
+    ap.add_argument("--json", help="write the results here")
+    args = ap.parse_args()
+
+    frames = load_frames(args)
+    if not frames:
+        raise SystemExit("no frames")
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    results = []
+    reference = None
+    for label, factory in configurations(args):
+        try:
+            features, wall, cpu = run(factory, frames)
+        except Exception as e:  # missing model / package: report and go on
+            print(f"{label:28s} unavailable ({e})")
+            continue
+        if reference is None:
+            reference = features
+        row = {"backend": label, "fps": round(len(frames) / wall, 1),
+               "fps_per_core": round(len(frames) / cpu, 1) if cpu > 0 else None,
+               "ms_per_frame": round(wall / len(frames) * 1000, 2), **compare(features, reference)}
+        results.append(row)
+        print(f"{label:28s} {row['fps']:7.1f} fps  {row['fps_per_core'] or 0:7.1f} fps/core  "
+              f"detect {row['detect']:.2f}  tilt_mae {row.get('tilt_mae', '-')}  "
+              f"sev_mae {row.get('sev_mae', '-')}  agree {row['agree']:.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"frames": len(frames), "reference": results[0]["backend"] if results else None,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""koushikbackend / ishayatbackend with their outside world stubbed, for bench/loadtest.py.
+
+    uvicorn bench.loadstubs:koushik --port 18000
+    uvicorn bench.loadstubs:ishayat --port 17000
+
+ishayat: the question APIs answer from canned JSON after LOADTEST_UPSTREAM_MS
+(default 0), so the quiz endpoints do their real parsing and state updates
+without touching the internet.
+
+koushik: pyautogui is a counting no-op (TRAFFIC_INPUT_MODE=keys works
+headless), lane datagrams go wherever TRAFFIC_INPUT_PORT points, and the
+escalation post goes to POSTUREBOT_HUB_URL, which loadtest.py points at its
+own sink so a running neazbackend never switches games.
+"""
+import os
+import random
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+UPSTREAM_MS = float(os.environ.get("LOADTEST_UPSTREAM_MS", "0"))
+
+CANNED = {
+    "opentdb.com": lambda: {"response_code": 0, "results": [{
+        "question": "Which planet is known as the Red Planet?", "correct_answer": "Mars",
+        "incorrect_answers": ["Venus", "Jupiter", "Saturn"], "category": "Science"}]},
+    "would-you-rather": lambda: {"data": ["fly", "be invisible"]},
+    "nhie.io": lambda: {"statement": "Never have I ever fallen asleep in a meeting"},
+    "icanhazdadjoke.com": lambda: {"joke": f"Dad joke #{random.randint(1, 999)}"},
+    "adviceslip.com": lambda: {"slip": {"advice": "Sit up straight."}},
+    "uselessfacts": lambda: {"text": "Honey never spoils."},
+    "riddles-api": lambda: {"riddle": "What has keys but can't open locks?", "answer": "A piano"},
+    "chucknorris.io": lambda: {"value": "Chuck Norris can tilt his head 360 degrees."},
+    "truthordarebot": lambda: {"question": "What is your worst posture habit?"},
+    "official-joke-api": lambda: {"setup": "Why did the chair fall over?", "punchline": "Bad posture."},
+}
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def stub_get(url, **kwargs):
+    if UPSTREAM_MS:
+        time.sleep(UPSTREAM_MS / 1000)
+    for host, make in CANNED.items():
+        if host in url:
+            return StubResponse(make())
+    raise ConnectionError(f"no stub for {url}")
+
+
+class StubPyautogui(types.ModuleType):
+    presses = 0
+
+    def press(self, key):
+        StubPyautogui.presses += 1
+
+
+sys.modules["pyautogui"] = StubPyautogui("pyautogui")
+
+import ishayatbackend  # noqa: E402
+import koushikbackend  # noqa: E402
+
+ishayatbackend.requests = types.SimpleNamespace(get=stub_get)
+
+ishayat = ishayatbackend.api
+koushik = koushikbackend.api
@@ -0,0 +1,401 @@
+"""Load test for koushikbackend and ishayatbackend.
+
+Starts each backend under uvicorn with its outside world stubbed
+(bench/loadstubs.py: canned question APIs, no-op pyautogui, lane datagrams
+and hub escalations into local sinks) and drives it with:
+
+    posture      N camera streams posting posturedata to /posturemetrics at --rate Hz
+    consequence  N Police Mode streams posting posturedata to /consequence at --rate Hz
+    tilt         N quiz cameras posting TiltData to /headtilt at --rate Hz
+    quiz         N players playing games of --questions: /game/start, then
+                 /game/answer + /game/next every --think-ms, then /game/end
+
+Streams are open loop: every request has a scheduled send time, and latency
+is measured from that time. A backend that falls behind therefore shows up
+in the percentiles instead of quietly slowing the generator down
+(coordinated omission). "late" is the share of requests that left more than
+one period after their slot. Payloads are synthetic (a head swaying left and
+right) unless --replay-posture / --replay-tilt give JSONL recordings, one
+payload per line.
+
+Per scenario and endpoint it reports throughput, p50/p95/p99/max latency and
+the error rate with a status breakdown. --json saves everything together with
+the git revision and arguments; --compare prints the deltas against an
+earlier --json.
+
+    python bench/loadtest.py --posture 20 --tilt 4 --quiz 4 --duration 20 --json load.json
+    python bench/loadtest.py --posture 40 --compare load.json
+
+The quiz backend keeps one global game, so concurrent players answer each
+other's questions; 400s on /game/answer with --quiz > 1 are expected and
+listed separately from transport errors.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from posturekit.features import SEVERITY_THRESHOLD, TILT_THRESHOLD, steering_axis
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ----- stubs the backends talk to -----
+
+class Sinks:
+    """UDP lane channel + an HTTP hub that only counts"""
+    def __init__(self):
+        self.lane = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.lane.bind(("127.0.0.1", 0))
+        self.lane_port = self.lane.getsockname()[1]
+        self.lane_datagrams = 0
+        self.hub_posts = 0
+        sinks = self
+
+        class Hub(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                sinks.hub_posts += 1
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        self.hub = ThreadingHTTPServer(("127.0.0.1", 0), Hub)
+        self.hub_url = f"http://127.0.0.1:{self.hub.server_address[1]}"
+        threading.Thread(target=self.hub.serve_forever, daemon=True).start()
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        while True:
+            try:
+                self.lane.recv(64)
+            except OSError:
+                return
+            self.lane_datagrams += 1
+
+    def close(self):
+        self.hub.shutdown()
+        self.lane.close()
+
+
+def start_backend(python, app, env, timeout=30.0):
+    port = free_port()
+    # stderr goes to a file: a pipe nobody reads fills up with 500 tracebacks
+    # under load and then blocks the backend's event loop
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen([python, "-m", "uvicorn", f"bench.loadstubs:{app}", "--port", str(port),
+                             "--log-level", "warning", "--no-access-log"],
+                            cwd=ROOT, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=log)
+    proc.log = log
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            raise SystemExit(f"{app} exited: {log.read().decode(errors='replace')[-500:]}")
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=0.5):
+                return proc, url
+        except OSError:
+            time.sleep(0.05)
+    stop_backend(proc)
+    raise SystemExit(f"{app} did not come up in {timeout:.0f}s")
+
+
+def stop_backend(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(5)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    proc.wait()
+    proc.log.close()
+
+
+# ----- payloads -----
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_posture(stream, k, rate):
+    """A head swaying +-25 degrees every 4 s, leaning forward now and then"""
+    t = k / rate
+    tilt = 25.0 * math.sin(2 * math.pi * (t / 4.0) + stream)
+    severity = int(max(0, 70 * math.sin(2 * math.pi * t / 20.0 + stream)))
+    bad = severity >= SEVERITY_THRESHOLD or abs(tilt) >= TILT_THRESHOLD
+    return {
+        "type": "POSTURE_BAD" if bad else "POSTURE_OK",
+        "severity": severity,
+        "confidence": 0.9,
+        "headtiltangle": tilt,
+        "headdirection_left": tilt > TILT_THRESHOLD,
+        "headdirection_right": tilt < -TILT_THRESHOLD,
+        "steeringaxis": steering_axis(tilt),
+    }
+
+
+def synthetic_tilt(stream, k, rate):
+    angle = 25.0 * math.sin(2 * math.pi * (k / rate / 4.0) + stream)
+    selection = "RIGHT" if angle > 15 else "LEFT" if angle < -15 else "NEUTRAL"
+    return {"selection": selection, "angle": round(angle, 1), "hold_time": 0.0,
+            "ready": False, "confidence": 0.9}
+
+
+def payloads(recording, synthetic):
+    """payload(stream, k, rate): replay with a per-stream offset, or synthesize"""
+    if not recording:
+        return synthetic
+    return lambda stream, k, rate: recording[(stream * 997 + k) % len(recording)]
+
+
+# ----- load -----
+
+class Recorder:
+    def __init__(self, warmup_until):
+        self.warmup_until = warmup_until
+        self.samples = defaultdict(list)   # key -> [(latency ms, service ms, late)]
+        self.status = defaultdict(Counter)
+        self.lock = threading.Lock()
+
+    def record(self, key, scheduled, sent, done, status, late):
+        if scheduled < self.warmup_until:
+            return
+        with self.lock:
+            self.samples[key].append(((done - scheduled) * 1000, (done - sent) * 1000, late))
+            self.status[key][status] += 1
+
+
+def timed(session, recorder, key, method, url, scheduled, period, **kwargs):
+    import requests
+    now = time.perf_counter()
+    if scheduled > now:
+        time.sleep(scheduled - now)
+    sent = time.perf_counter()
+    try:
+        r = session.request(method, url, timeout=5, **kwargs)
+        status = str(r.status_code)
+    except requests.exceptions.RequestException as e:
+        r, status = None, type(e).__name__
+    recorder.record(key, scheduled, sent, time.perf_counter(), status, sent - scheduled > period)
+    return r
+
+
+def stream_worker(name, url, payload, stream, rate, t0, t_end, recorder):
+    import requests
+    session = requests.Session()
+    period = 1.0 / rate
+    k = 0
+    start = t0 + random.random() * period  # spread the streams over one period
+    while True:
+        scheduled = start + k * period
+        if scheduled >= t_end:
+            break
+        timed(session, recorder, name, "POST", url, scheduled, period, json=payload(stream, k, rate))
+        k += 1
+    session.close()
+
+
+def quiz_worker(url, think_s, questions, t0, t_end, recorder):
+    """Whole games: start, `questions` x (answer after think_s, next), end"""
+    import requests
+    session = requests.Session()
+    key = "quiz {}"
+    scheduled = t0 + random.random() * think_s
+    while scheduled < t_end:
+        r = timed(session, recorder, key.format("/game/start"), "POST", f"{url}/game/start?mode=random",
+                  scheduled, think_s)
+        question = r.json() if r is not None and r.ok else {"id": 0}
+        for _ in range(questions):
+            scheduled += think_s
+            if scheduled >= t_end:
+                break
+            timed(session, recorder, key.format("/game/answer"), "POST", f"{url}/game/answer", scheduled, think_s,
+                  json={"question_id": question.get("id", 0), "selected_side": random.choice(["LEFT", "RIGHT"]),
+                        "response_time": think_s})
+            r = timed(session, recorder, key.format("/game/next"), "GET", f"{url}/game/next",
+                      time.perf_counter(), think_s)
+            if r is not None and r.ok:
+                question = r.json()
+        timed(session, recorder, key.format("/game/end"), "POST", f"{url}/game/end", time.perf_counter(), think_s)
+        scheduled = max(scheduled, time.perf_counter()) + think_s
+    session.close()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    i = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[i]
+
+
+def summarize(recorder, seconds):
+    out = {}
+    for key, samples in sorted(recorder.samples.items()):
+        latency = sorted(s[0] for s in samples)
+        service = sorted(s[1] for s in samples)
+        status = recorder.status[key]
+        ok = sum(n for code, n in status.items() if code.isdigit() and int(code) < 400)
+        out[key] = {
+            "requests": len(samples),
+            "rps": round(len(samples) / seconds, 1),
+            "p50_ms": round(percentile(latency, 50), 2),
+            "p95_ms": round(percentile(latency, 95), 2),
+            "p99_ms": round(percentile(latency, 99), 2),
+            "max_ms": round(latency[-1], 2),
+            "service_p50_ms": round(statistics.median(service), 2),
+            "late": round(sum(s[2] for s in samples) / len(samples), 3),
+            "error_rate": round(1 - ok / len(samples), 4),
+            "status": dict(status),
+        }
+    return out
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results):
+    print(f"{'scenario':32s} {'req':>7s} {'rps':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s} "
+          f"{'late':>6s} {'err':>7s}  status")
+    for key, r in results.items():
+        print(f"{key:32s} {r['requests']:7d} {r['rps']:8.1f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} "
+              f"{r['p99_ms']:8.2f} {r['max_ms']:8.1f} {r['late']:6.1%} {r['error_rate']:7.2%}  "
+              + " ".join(f"{code}:{n}" for code, n in sorted(r["status"].items())))
+
+
+def print_compare(results, path):
+    with open(path) as f:
+        base = json.load(f)
+    print(f"\nvs {path} (rev {base.get('meta', {}).get('git')})")
+    for key, r in results.items():
+        b = base.get("results", {}).get(key)
+        if not b:
+            print(f"{key:32s} (new)")
+            continue
+        cells = []
+        for field in ("rps", "p50_ms", "p95_ms", "p99_ms", "error_rate"):
+            delta = (r[field] - b[field]) / b[field] * 100 if b[field] else 0.0
+            cells.append(f"{field} {b[field]:g} -> {r[field]:g} ({delta:+.0f}%)")
+        print(f"{key:32s} " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--posture", type=int, default=0, help="camera streams -> koushik /posturemetrics")
+    ap.add_argument("--consequence", type=int, default=0, help="Police Mode streams -> koushik /consequence")
+    ap.add_argument("--tilt", type=int, default=0, help="quiz camera streams -> ishayat /headtilt")
+    ap.add_argument("--quiz", type=int, default=0, help="concurrent quiz players")
+    ap.add_argument("--rate", type=float, default=30.0, help="Hz per stream")
+    ap.add_argument("--think-ms", type=float, default=500.0, help="quiz player time per question")
+    ap.add_argument("--questions", type=int, default=10, help="questions per quiz game")
+    ap.add_argument("--duration", type=float, default=15.0)
+    ap.add_argument("--warmup", type=float, default=2.0, help="seconds not counted")
+    ap.add_argument("--replay-posture", help="JSONL of posturedata payloads")
+    ap.add_argument("--replay-tilt", help="JSONL of TiltData payloads")
+    ap.add_argument("--upstream-ms", type=float, default=0.0, help="latency of the stubbed question APIs")
+    ap.add_argument("--input-mode", choices=("socket", "keys"), default="socket", help="koushik TRAFFIC_INPUT_MODE")
+    ap.add_argument("--steering", choices=("lanes", "axis"), default="lanes", help="koushik TRAFFIC_STEERING")
+    ap.add_argument("--koushik-url", help="load a running koushikbackend instead (no stubs)")
+    ap.add_argument("--ishayat-url", help="load a running ishayatbackend instead (no stubs)")
+    ap.add_argument("--python", default=sys.executable)
+    ap.add_argument("--json", help="write results here")
+    ap.add_argument("--compare", help="earlier --json to diff against")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    if not (args.posture or args.consequence or args.tilt or args.quiz):
+        ap.error("nothing to do: give --posture/--consequence/--tilt/--quiz")
+    random.seed(args.seed)
+
+    sinks = Sinks()
+    env = dict(os.environ)
+    env.pop("POSTUREBOT_METRICS_DIR", None)
+    env.update(LOADTEST_UPSTREAM_MS=str(args.upstream_ms), TRAFFIC_INPUT_PORT=str(sinks.lane_port),
+               TRAFFIC_INPUT_MODE=args.input_mode, TRAFFIC_STEERING=args.steering, POSTUREBOT_HUB_URL=sinks.hub_url)
+    procs = []
+    koushik, ishayat = args.koushik_url, args.ishayat_url
+    try:
+        if (args.posture or args.consequence) and not koushik:
+            proc, koushik = start_backend(args.python, "koushik", env)
+            procs.append(proc)
+        if (args.tilt or args.quiz) and not ishayat:
+            proc, ishayat = start_backend(args.python, "ishayat", env)
+            procs.append(proc)
+
+        posture = payloads(read_jsonl(args.replay_posture) if args.replay_posture else None, synthetic_posture)
+        tilt = payloads(read_jsonl(args.replay_tilt) if args.replay_tilt else None, synthetic_tilt)
+
+        t0 = time.perf_counter() + 0.2
+        t_end = t0 + args.warmup + args.duration
+        recorder = Recorder(t0 + args.warmup)
+        threads = []
+        for scenario, count, url, payload in (("posture /posturemetrics", args.posture, f"{koushik}/posturemetrics", posture),
+                                              ("consequence /consequence", args.consequence, f"{koushik}/consequence", posture),
+                                              ("tilt /headtilt", args.tilt, f"{ishayat}/headtilt", tilt)):
+            for stream in range(count):
+                threads.append(threading.Thread(target=stream_worker, daemon=True,
+                                                args=(scenario, url, payload, stream, args.rate, t0, t_end, recorder)))
+        for _ in range(args.quiz):
+            threads.append(threading.Thread(target=quiz_worker, daemon=True,
+                                            args=(ishayat, args.think_ms / 1000, args.questions, t0, t_end, recorder)))
+
+        cpu0 = time.process_time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        client_cpu = (time.process_time() - cpu0) / (time.perf_counter() - t0)
+    finally:
+        for proc in procs:
+            stop_backend(proc)
+        sinks.close()
+
+    results = summarize(recorder, args.duration)
+    print_table(results)
+    print(f"\nlane datagrams {sinks.lane_datagrams}, hub escalations {sinks.hub_posts}, "
+          f"load generator CPU {client_cpu:.0%} of one core")
+    if client_cpu > 0.8:
+        print("warning: the generator itself is near one core, latencies include client-side queueing")
+    if args.compare:
+        print_compare(results, args.compare)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": {"git": git_revision(), "time": time.time(), "args": vars(args),
+                                "client_cpu": round(client_cpu, 3)},
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
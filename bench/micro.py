@@ -0,0 +1,419 @@
+"""Microbenchmarks for the per-frame hot paths, with a stored baseline.
+
+Every benchmark runs a fixed input: seeded landmark frames (Keypoint tuples,
+the shape the inference backends return), a canned 1280x720 frame, and a
+seeded trafficgame in stress mode so the amount of work is the same every
+frame. For each one it reports:
+
+    ns/op      best of --repeat timed runs (median in the JSON)
+    rel        median over the timed runs of ns/op divided by a fixed
+               pure-Python calibration loop timed right before each run,
+               so a machine that is slow or busy for a while slows both
+               sides of the ratio and numbers from different machines
+               stay roughly comparable
+    peak B     tracemalloc peak of one call above what was live before it,
+               i.e. the transient memory the call allocates
+    blocks/op  change in live allocated blocks per op over many calls; >0
+               means something grows (a leak or an unbounded cache)
+
+--check compares against the baseline (bench/micro_baseline.json by
+default) and exits 1 when a benchmark's rel grows by more than --threshold
+(default 40%, or the baseline's own "threshold" for that entry), when its peak
+memory grows by that much plus 1 KiB, or when blocks/op turns positive. Each
+benchmark counts with its median over --passes (3), and one that fails is
+re-run (--retries) and its best result kept, since noise only ever makes a
+run slower. Benchmarks that are mostly native calls (numpy, cv2, pygame)
+swing with the machine independently of the pure-Python calibration loop,
+so their baseline entries carry a wider threshold.
+--save writes the current run as the new baseline, taking each benchmark's
+median over --passes (at least 3) so one lucky fast pass doesn't become
+the bar.
+Benchmarks whose dependencies are not installed (cv2, numpy, pygame) are
+reported as SKIPPED and don't fail --check. A baseline entry (within
+--filter) that was not measured for any other reason fails it, unless
+--allow-missing is given.
+
+    python bench/micro.py                     # run and print
+    python bench/micro.py --check             # gate: exit 1 on regression
+    python bench/micro.py --save              # accept the current numbers
+    python bench/micro.py --filter features.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "gameishayat"))
+sys.path.insert(0, str(ROOT / "gamekoushik"))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from posturekit import features
+from posturekit.inference import Keypoint
+
+DEFAULT_BASELINE = ROOT / "bench" / "micro_baseline.json"
+FRAMES = 64  # landmark frames per batch
+
+BENCHMARKS = {}
+
+
+def bench(name):
+    """Register a factory returning (fn, ops per call); fn() is what gets timed"""
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+def landmark_frames(n=FRAMES, seed=1234):
+    """A seated person swaying: 33 Keypoints per frame, same every run"""
+    rng = random.Random(seed)
+    frames = []
+    for i in range(n):
+        roll = math.radians(25 * math.sin(i / 8))
+        lean = 0.08 * math.sin(i / 13)
+        points = [Keypoint(0.5 + rng.uniform(-0.2, 0.2), 0.5 + rng.uniform(-0.3, 0.3), rng.uniform(0.3, 1.0))
+                  for _ in range(33)]
+        cx, cy, half = 0.5 + lean, 0.35, 0.07
+        points[features.NOSE] = Keypoint(cx, cy + 0.02, 0.99)
+        points[features.LEFT_EAR] = Keypoint(cx + half * math.cos(roll), cy + half * math.sin(roll), 0.9)
+        points[features.RIGHT_EAR] = Keypoint(cx - half * math.cos(roll), cy - half * math.sin(roll), 0.9)
+        points[features.LEFT_SHOULDER] = Keypoint(0.62, 0.6, 0.95)
+        points[features.RIGHT_SHOULDER] = Keypoint(0.38, 0.6, 0.95)
+        frames.append(points)
+    return frames
+
+
+# ----- posturekit.features -----
+
+@bench("features.tilt_deg")
+def _():
+    pairs = [(lm[features.RIGHT_EAR], lm[features.LEFT_EAR]) for lm in landmark_frames()]
+    tilt_deg = features.tilt_deg
+    return lambda: [tilt_deg(a, b) for a, b in pairs], len(pairs)
+
+
+@bench("features.severity_of")
+def _():
+    triples = [(lm[features.NOSE], lm[features.LEFT_SHOULDER], lm[features.RIGHT_SHOULDER])
+               for lm in landmark_frames()]
+    severity_of = features.severity_of
+    return lambda: [severity_of(n, l, r) for n, l, r in triples], len(triples)
+
+
+@bench("features.confidence_of")
+def _():
+    triples = [(lm[features.NOSE], lm[features.LEFT_SHOULDER], lm[features.RIGHT_SHOULDER])
+               for lm in landmark_frames()]
+    confidence_of = features.confidence_of
+    return lambda: [confidence_of(t) for t in triples], len(triples)
+
+
+@bench("features.posture_metrics")
+def _():
+    frames = landmark_frames()
+    posture_metrics = features.posture_metrics
+    return lambda: [posture_metrics(lm, tilt_is_bad=True) for lm in frames], len(frames)
+
+
+# ----- gameishayat/headtilt_game.py -----
+
+@bench("headtilt.calculate_head_tilt")
+def _():
+    import headtilt_game
+    frames = landmark_frames()
+    calculate_head_tilt = headtilt_game.calculate_head_tilt
+    return lambda: [calculate_head_tilt(lm) for lm in frames], len(frames)
+
+
+@bench("gestures.GestureRecognizer.update")
+def _():
+    from posturekit.gestures import GestureRecognizer, head_pose
+    import headtilt_game
+    inputs = [headtilt_game.calculate_head_tilt(lm) + head_pose(lm) for lm in landmark_frames()]
+    recognizer = GestureRecognizer()
+    update = recognizer.update
+    clock = [0.0]
+
+    def run():
+        t = clock[0]
+        for i, (angle, conf, yaw, pitch) in enumerate(inputs):
+            update(angle, conf, t + i / 30, yaw, pitch)
+        clock[0] = t + len(inputs) / 30
+    return run, len(inputs)
+
+
+@bench("headtilt.wrap")
+def _():
+    import headtilt_game
+    texts = ["Which planet is known as the Red Planet and why does it look that way from Earth?",
+             "Would you rather be able to fly or be invisible for the rest of your life?",
+             "Chuck Norris can tilt his head 360 degrees without moving his shoulders."]
+    wrap = headtilt_game.wrap
+    return lambda: [wrap(t, 18) for t in texts], len(texts)
+
+
+@bench("headtilt.draw_text_centered")
+def _():
+    import numpy as np
+    import headtilt_game
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    draw = headtilt_game.draw_text_centered
+    return lambda: draw(frame, "Score: 1200 | Streak: 4 | Q: 9", 698, 0.9, (0, 255, 255), 2), 1
+
+
+# ----- gamekoushik/trafficgame.py -----
+
+def stress_game(stress=60, seed=7, warm_steps=120):
+    import trafficgame
+    game = trafficgame.TrafficGame(random.Random(seed), stress=stress)
+    for _ in range(warm_steps):
+        game.update(trafficgame.STEP_MS)
+    return trafficgame, game
+
+
+@bench("trafficgame.update")
+def _():
+    trafficgame, game = stress_game()
+    update, step = game.update, trafficgame.STEP_MS
+    return lambda: update(step), 1
+
+
+@bench("trafficgame.draw")
+def _():
+    import pygame
+    trafficgame, game = stress_game()
+    pygame.display.init()
+    renderer = trafficgame.Renderer(pygame.display.set_mode((trafficgame.W, trafficgame.H)))
+    renderer.draw(game)  # the full redraw of the first frame, not what we measure
+    update, step, draw = game.update, trafficgame.STEP_MS, renderer.draw
+
+    def run():
+        update(step)  # needed to move things, timed separately in trafficgame.update
+        draw(game)
+    return run, 1
+
+
+@bench("enemypool.advance")
+def _():
+    from enemypool import EnemyPool
+    pool = EnemyPool(3)
+    rng = random.Random(3)
+    for _ in range(60):
+        pool.spawn(rng.randrange(3), rng.uniform(-3000, 0), rng.randrange(4))
+    advance = pool.advance
+    return lambda: advance(0.0, 1e9), 1
+
+
+# ----- runner -----
+
+def _calibration_loop():
+    total = 0
+    for i in range(1000):
+        total += i * i
+    return total
+
+
+def calibrate(repeat, n=500):
+    """ns of a fixed pure-Python loop, the unit for rel"""
+    return min(_time(_calibration_loop, n) for _ in range(repeat))
+
+
+def _time(fn, n):
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        t0 = time.perf_counter_ns()
+        for _ in range(n):
+            fn()
+        return (time.perf_counter_ns() - t0) / n
+    finally:
+        if gc_was:
+            gc.enable()
+
+
+def autorange(fn, min_s):
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        if time.perf_counter() - t0 >= min_s:
+            return n
+        n *= 2
+
+
+def allocations(fn, n):
+    """(peak bytes of one call, net live blocks per call over n calls)"""
+    fn()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    for _ in range(n):
+        fn()
+    gc.collect()
+    return peak - base, (sys.getallocatedblocks() - blocks) / n
+
+
+def run(name, factory, repeat, min_s):
+    fn, ops = factory()
+    n = autorange(fn, min_s)
+    # each timed run gets its own calibration right before it, so a slow
+    # stretch of the machine slows both sides of that run's ratio
+    runs, ratios = [], []
+    for _ in range(repeat):
+        calib_ns = calibrate(3, 200)
+        ns = _time(fn, n) / ops
+        runs.append(ns)
+        ratios.append(ns / calib_ns)
+    peak, blocks = allocations(fn, max(n, 200))
+    return {"ns_op": round(min(runs), 1), "median_ns_op": round(statistics.median(runs), 1),
+            "rel": round(statistics.median(ratios), 5), "peak_bytes": peak, "blocks_op": round(blocks / ops, 3),
+            "calls": n, "ops_per_call": ops}
+
+
+def median_of(passes):
+    """Several passes of one benchmark: the median rel, the smallest memory numbers"""
+    out = dict(sorted(passes, key=lambda r: r["rel"])[len(passes) // 2])
+    out["peak_bytes"] = min(r["peak_bytes"] for r in passes)
+    out["blocks_op"] = min(r["blocks_op"] for r in passes)
+    return out
+
+
+def best_of(a, b):
+    """Two runs of one benchmark: the faster timing, the smaller memory numbers"""
+    out = dict(a if a["rel"] <= b["rel"] else b)
+    out["peak_bytes"] = min(a["peak_bytes"], b["peak_bytes"])
+    out["blocks_op"] = min(a["blocks_op"], b["blocks_op"])
+    return out
+
+
+def missing(results, baseline, name_filter=None):
+    """Baseline entries (within the filter) this run has no result for"""
+    return [name for name in baseline.get("results", {})
+            if name not in results and (not name_filter or name_filter in name)]
+
+
+def check(results, baseline, default_threshold):
+    failures = []
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name)
+        if not b:
+            continue
+        threshold = b.get("threshold", default_threshold)
+        if r["rel"] > b["rel"] * (1 + threshold):
+            failures.append(f"{name}: {r['ns_op']:.0f} ns/op, rel {r['rel']:.4f} vs baseline {b['rel']:.4f} "
+                            f"(+{(r['rel'] / b['rel'] - 1) * 100:.0f}%, limit +{threshold * 100:.0f}%)")
+        if r["peak_bytes"] > b["peak_bytes"] * (1 + threshold) + 1024:
+            failures.append(f"{name}: peak {r['peak_bytes']} B vs baseline {b['peak_bytes']} B")
+        if r["blocks_op"] > max(b["blocks_op"], 0) + 0.5:
+            failures.append(f"{name}: {r['blocks_op']} live blocks/op, something keeps growing")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--filter", help="only benchmarks whose name contains this")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--min-time", type=float, default=0.05, help="seconds per timed run")
+    ap.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    ap.add_argument("--threshold", type=float, default=0.4, help="allowed slowdown, 0.4 = 40%%")
+    ap.add_argument("--passes", type=int, default=3, help="runs per benchmark, the median counts (--save: at least 3)")
+    ap.add_argument("--check", action="store_true", help="exit 1 on a regression against the baseline")
+    ap.add_argument("--retries", type=int, default=2, help="re-runs of a failing benchmark before it counts")
+    ap.add_argument("--allow-missing", action="store_true",
+                    help="don't fail --check on baseline entries that could not be measured")
+    ap.add_argument("--save", action="store_true", help="write this run as the baseline")
+    ap.add_argument("--json", help="write this run here")
+    args = ap.parse_args()
+    passes = max(args.passes, 3 if args.save else 1)
+
+    calib_ns = calibrate(args.repeat)
+    print(f"calibration loop {calib_ns / 1000:.1f} us ({platform.python_implementation()} {platform.python_version()})")
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+
+    results, unavailable = {}, {}
+    print(f"{'benchmark':36s} {'ns/op':>11s} {'rel':>9s} {'peak B':>8s} {'blocks/op':>9s}  vs baseline")
+    for name, factory in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+        try:
+            r = median_of([run(name, factory, args.repeat, args.min_time) for _ in range(passes)])
+        except ImportError as e:
+            unavailable[name] = str(e)
+            print(f"{name:36s} unavailable ({e})")
+            continue
+        results[name] = r
+        b = baseline.get("results", {}).get(name)
+        delta = f"{(r['rel'] / b['rel'] - 1) * 100:+.0f}%" if b else "-"
+        print(f"{name:36s} {r['ns_op']:11.1f} {r['rel']:9.4f} {r['peak_bytes']:8d} {r['blocks_op']:9.3f}  {delta}")
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "calibration_ns": round(calib_ns, 1),
+              "threshold": args.threshold, "results": results, "unavailable": unavailable}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save:
+        # keep per-benchmark thresholds and entries this run couldn't measure
+        merged = dict(baseline.get("results", {}))
+        for name, r in results.items():
+            entry = {k: r[k] for k in ("ns_op", "rel", "peak_bytes", "blocks_op")}
+            if "threshold" in merged.get(name, {}):
+                entry["threshold"] = merged[name]["threshold"]
+            merged[name] = entry
+        with open(args.baseline, "w") as f:
+            json.dump({**report, "results": merged, "unavailable": {}}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+    if args.check:
+        if not baseline:
+            raise SystemExit(f"no baseline at {args.baseline}, run with --save first")
+        failures = check(results, baseline, args.threshold)
+        for attempt in range(args.retries):
+            if not failures:
+                break
+            # timing noise is one-sided, so re-run what failed and keep the best
+            suspects = {line.split(":")[0] for line in failures}
+            print(f"re-running {len(suspects)} suspect(s)")
+            for name in suspects:
+                retry = median_of([run(name, BENCHMARKS[name], args.repeat, args.min_time) for _ in range(passes)])
+                results[name] = best_of(results[name], retry)
+            failures = check(results, baseline, args.threshold)
+        for line in failures:
+            print("REGRESSION " + line)
+        gaps = []
+        for name in missing(results, baseline, args.filter):
+            if name in unavailable:  # dependency not installed here, nothing to compare
+                print(f"SKIPPED {name}: {unavailable[name]}")
+            else:
+                gaps.append(name)
+                print(f"{'SKIPPED' if args.allow_missing else 'MISSING'} {name}: in the baseline but not measured")
+        if failures or (gaps and not args.allow_missing):
+            sys.exit(1)
+        print(f"no regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Startup benchmark for every PostureBot entry point.
+
+Launches each entry point the way neazbackend does (cwd = repo root, own
+process group), and reports, relative to the spawn:
+
+    imports      heavy imports done (camera scripts, game)
+    model        pose model constructed
+    ready        signal_ready() / first 200 from /health
+    first_frame  first frame inferred (camera scripts) or flipped (game)
+
+Every entry point is run once untimed (page cache) and then --runs times;
+medians and minimums are reported, and --json saves the raw numbers so two
+revisions can be compared.
+
+    python bench/startup.py --python .venv/bin/python --runs 5 --json startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from posturekit.ready import READY_ENV, STARTUP_LOG_ENV
+
+PHASES = ("imports", "model", "ready", "first_frame")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def entry_points(python, uvicorn):
+    scripts = {
+        "posturemonitor": [python, "consequence/posturemonitor.py"],
+        "posturetest_koushik": [python, "gamekoushik/posturetest_koushik.py"],
+        "headtilt_game": [python, "gameishayat/headtilt_game.py"],
+        "trafficgame": [python, "gamekoushik/trafficgame.py"],
+    }
+    apps = {
+        "koushikbackend": "koushikbackend:api",
+        "ishayatbackend": "ishayatbackend:api",
+        "neazbackend": "neazbackend:api",
+        "hostbackend": "hostbackend:api",
+    }
+    for name, cmd in scripts.items():
+        yield name, (lambda cmd=cmd: (cmd, None))
+    for name, app in apps.items():
+        def make(app=app):
+            port = free_port()
+            return [uvicorn, app, "--port", str(port)], f"http://127.0.0.1:{port}/health"
+        yield name, make
+
+
+def read_marks(path, t0):
+    marks = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                event, ts = line.split()
+                marks.setdefault(event, (float(ts) - t0) * 1000)
+    except OSError:
+        pass
+    return marks
+
+
+def run_once(make, timeout):
+    cmd, health = make()
+    workdir = tempfile.mkdtemp(prefix="posturebot-startup-")
+    log = os.path.join(workdir, "marks")
+    env = dict(os.environ)
+    env[STARTUP_LOG_ENV] = log
+    env[READY_ENV] = os.path.join(workdir, "ready")
+    # no standby parking, no warm pool: this measures cold starts
+    env.pop("POSTUREBOT_STANDBY", None)
+    env["POSTUREBOT_STANDBY_POOL"] = "0"
+
+    t0 = time.time()
+    try:
+        proc = subprocess.Popen(cmd, cwd=ROOT, env=env, start_new_session=True,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        return {"error": str(e)}
+    marks = {}
+    deadline = time.time() + timeout
+    try:
+        while time.time() < deadline and proc.poll() is None:
+            if health and "ready" not in marks:
+                try:
+                    with urllib.request.urlopen(health, timeout=0.2) as r:
+                        if r.status == 200:
+                            marks["ready"] = (time.time() - t0) * 1000
+                except OSError:
+                    pass
+            marks = {**read_marks(log, t0), **marks}
+            if "first_frame" in marks or (health and "ready" in marks):
+                break
+            time.sleep(0.005)
+    finally:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.wait()
+    marks = {**read_marks(log, t0), **marks}
+    shutil.rmtree(workdir, ignore_errors=True)
+    if proc.returncode not in (None, -signal.SIGKILL) and "ready" not in marks:
+        marks["error"] = f"exited with code {proc.returncode}"
+    return marks
+
+
+def summarize(runs):
+    out = {}
+    for phase in PHASES:
+        values = [r[phase] for r in runs if phase in r]
+        if values:
+            out[phase] = {"median_ms": round(statistics.median(values), 1),
+                          "min_ms": round(min(values), 1), "n": len(values)}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--python", default=sys.executable)
+    ap.add_argument("--uvicorn", default=str(Path(sys.executable).with_name("uvicorn")))
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--only", nargs="*", help="entry point names to run")
+    ap.add_argument("--json", help="write raw runs and summary here")
+    args = ap.parse_args()
+
+    results = {}
+    for name, make in entry_points(args.python, args.uvicorn):
+        if args.only and name not in args.only:
+            continue
+        run_once(make, args.timeout)  # untimed, warms the page cache
+        runs = [run_once(make, args.timeout) for _ in range(args.runs)]
+        results[name] = {"runs": runs, "summary": summarize(runs)}
+
+        cells = []
+        for phase in PHASES:
+            s = results[name]["summary"].get(phase)
+            cells.append(f"{phase}={s['median_ms']:.0f}ms" if s else f"{phase}=-")
+        errors = sorted({r["error"] for r in runs if "error" in r})
+        print(f"{name:22s} " + "  ".join(cells) + (f"  ({'; '.join(errors)})" if errors else ""))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": args.python, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Police Mode only has to notice posture that stays bad for window_s, so
+# posturemonitor doesn't need the full camera rate. The sampler picks the
+# gap to the next inference from what the aggregator currently knows:
+#   idle_hz    - nobody in frame for idle_after_s
+#   base_hz    - someone there, posture clearly fine
+#   active_hz  - severity / tilt near the threshold, or a bad streak running
+# Frames in between are only grabbed (no decode, no inference) to keep the
+# camera buffer fresh.
+
+
+class AdaptiveSampler:
+    def __init__(self, base_hz=2.0, active_hz=10.0, idle_hz=0.5, idle_after_s=10.0,
+                 near=0.7, hold_s=1.0, enter_severity=50, enter_tilt=15.0):
+        self.base_hz = base_hz
+        self.active_hz = active_hz
+        self.idle_hz = idle_hz
+        self.idle_after_s = idle_after_s
+        self.near = near      # fraction of the enter thresholds that counts as "near"
+        self.hold_s = hold_s  # stay active at least this long, no flapping
+        self.enter_severity = enter_severity
+        self.enter_tilt = enter_tilt
+        self.absent_since = None
+        self.active_until = 0.0
+        self.hz = base_hz
+
+    def _hot(self, aggregator, sample):
+        if aggregator.state == "POSTURE_BAD" and not aggregator.sustained:
+            return True  # the 5 s timer is running, time it closely
+        if aggregator.ewma is not None and aggregator.ewma >= self.near * self.enter_severity:
+            return True
+        return abs(sample.get("headtiltangle", 0.0)) >= self.near * self.enter_tilt
+
+    def interval(self, aggregator, sample, now):
+        """Seconds until the next inference, after the aggregator saw sample at now"""
+        if sample.get("type") == "NO_PERSON":
+            if self.absent_since is None:
+                self.absent_since = now
+            idle = now - self.absent_since >= self.idle_after_s
+            self.hz = self.idle_hz if idle else self.base_hz
+        else:
+            self.absent_since = None
+            if self._hot(aggregator, sample):
+                self.active_until = now + self.hold_s
+            self.hz = self.active_hz if now < self.active_until else self.base_hz
+        return 1.0 / self.hz
@@ -0,0 +1,89 @@
+import time
+
+# Streaming windowing that runs next to inference in posturemonitor.py.
+# Instead of POSTing every frame (~30/s) it only emits:
+#   "transition" - state flipped POSTURE_OK <-> POSTURE_BAD
+#   "heartbeat"  - current state, every heartbeat_s (covers dropped requests)
+#   "sustained"  - bad posture held for window_s; repeated on every heartbeat
+#                  while it lasts so a lost request can't lose the warning
+
+
+class PostureAggregator:
+    """EWMA + hysteresis posture state machine"""
+    def __init__(self, window_s=5.0, heartbeat_s=2.0, alpha=0.2,
+                 enter_severity=50, exit_severity=40,
+                 enter_tilt=15.0, exit_tilt=12.0, ref_hz=30.0):
+        self.window_s = window_s
+        self.heartbeat_s = heartbeat_s
+        # alpha is per sample at ref_hz and gets scaled to the real gap between
+        # samples, so the smoothing doesn't depend on the sampling rate
+        self.alpha = alpha
+        self.ref_hz = ref_hz
+        self.enter_severity = enter_severity
+        self.exit_severity = exit_severity
+        self.enter_tilt = enter_tilt
+        self.exit_tilt = exit_tilt
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        self.ewma = None
+        self.bad_since = None
+        self.sustained = False
+        self.last_emit = None
+        self.last_sample = None
+        self.last_seen = None
+
+    def _is_bad(self, severity, tilt):
+        if self.state == "POSTURE_BAD":
+            return severity >= self.exit_severity or abs(tilt) >= self.exit_tilt
+        return severity >= self.enter_severity or abs(tilt) >= self.enter_tilt
+
+    def _event(self, kind):
+        s = self.last_sample
+        return {
+            "type": self.state,
+            "event": kind,
+            "severity": int(round(self.ewma)),
+            "confidence": s["confidence"],
+            "headtiltangle": s["headtiltangle"],
+            "headdirection_left": s["headdirection_left"],
+            "headdirection_right": s["headdirection_right"],
+        }
+
+    def update(self, sample, now=None):
+        """Feed one per-frame metadata dict, returns the (usually empty) list of events to send"""
+        if now is None:
+            now = time.monotonic()
+        events = []
+
+        if sample.get("type") != "NO_PERSON":
+            sev = float(sample["severity"])
+            if self.ewma is None:
+                self.ewma = sev
+            else:
+                dt = min(max(now - self.last_seen, 0.0), self.window_s)
+                alpha = 1.0 - (1.0 - self.alpha) ** (dt * self.ref_hz)
+                self.ewma += alpha * (sev - self.ewma)
+            self.last_sample = sample
+            self.last_seen = now
+
+            new_state = "POSTURE_BAD" if self._is_bad(self.ewma, sample["headtiltangle"]) else "POSTURE_OK"
+            if new_state != self.state:
+                self.state = new_state
+                self.bad_since = now if new_state == "POSTURE_BAD" else None
+                self.sustained = False
+                events.append(self._event("transition"))
+                self.last_emit = now
+
+            if self.bad_since is not None and not self.sustained and now - self.bad_since >= self.window_s:
+                self.sustained = True
+                events.append(self._event("sustained"))
+                self.last_emit = now
+
+        # nobody in frame keeps the last state (same as the raw stream, which sent nothing)
+        if self.state is not None and not events and now - self.last_emit >= self.heartbeat_s:
+            events.append(self._event("sustained" if self.sustained else "heartbeat"))
+            self.last_emit = now
+
+        return events
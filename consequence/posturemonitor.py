@@ -1,133 +1,170 @@
+import os
+import sys
 import time
-import math
-import cv2
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
-import requests
-
-API_URL2 = "http://127.0.0.1:8000/consequence"
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from posturekit.ready import signal_ready, mark
+from posturekit.standby import park
+from posturekit.capture import EarlyCamera
+from posturekit.features import posture_metrics, apply_tuning
+from posturekit.emitter import Emitter
+from posturekit.metrics import REGISTRY, CameraMetrics, start_exporter
+from posturekit.stagetimer import StageTimer
+from posturekit.tuning import Tuning
+from posturekit.resources import apply_thread_caps
+from posturekit.inference import create_backend
+from posturekit.history import HistoryWriter, enabled as history_enabled
+from postureaggregator import PostureAggregator
+from adaptivesampler import AdaptiveSampler
+
+# cv2 / numpy and the inference backend are loaded inside main() so
+# importing this module (benchmarks, the standby pool) stays cheap.
+
+# read after park(): a station's standby worker gets its backend on activation
+def api_url():
+    return os.environ.get("POSTUREBOT_TRAFFIC_URL", "http://127.0.0.1:8000") + "/consequence"
 
 MODEL_PATH = "consequence/pose_landmarker_full.task"  # <-- put your .task file here
 
-def clamp(x, lo=0.0, hi=1.0):
-    return max(lo, min(hi, x))
-
-# Create PoseLandmarker (video mode, good for frame-by-frame webcam)
-base_options = python.BaseOptions(model_asset_path=MODEL_PATH)
-options = vision.PoseLandmarkerOptions(
-    base_options=base_options,
-    running_mode=vision.RunningMode.VIDEO,
-    num_poses=1
-)
-landmarker = vision.PoseLandmarker.create_from_options(options)
-
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    raise RuntimeError("Could not open camera (try index 0 -> 1 -> 2)")
-
-last_print = 0.0
 
-# MediaPipe landmark index reference (PoseLandmarker uses BlazePose indexing)
-NOSE = 0
-LEFT_SHOULDER = 11
-RIGHT_SHOULDER = 12
-LEFT_EAR = 7
-RIGHT_EAR = 8
-LEFT_EYE = 2
-RIGHT_EYE = 5
-
-def tilt_deg(a, b):
-    # a,b are landmarks with .x .y in normalized coords
-    dx = b.x - a.x
-    dy = b.y - a.y
-    return math.degrees(math.atan2(dy, dx))
-
-
-
-while True:
-    ok, frame_bgr = cap.read()
-    if not ok:
-        break
-
-    frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
-
-    timestamp_ms = int(time.time() * 1000)
-    result = landmarker.detect_for_video(mp_image, timestamp_ms)
-
-    metadata = {"type": "NO_PERSON"}
-
-    if result.pose_landmarks and len(result.pose_landmarks) > 0:
-        lm = result.pose_landmarks[0]  # first detected person
-
-        nose = lm[NOSE]
-        l_sh = lm[LEFT_SHOULDER]
-        r_sh = lm[RIGHT_SHOULDER]
-        l_eye = lm[LEFT_EYE]
-        r_eye = lm[RIGHT_EYE]
-        l_ear = lm[LEFT_EAR]
-        r_ear = lm[RIGHT_EAR]
-
-        sh_cx = (l_sh.x + r_sh.x) / 2.0
-
-        # Same simple heuristic you had before:
-        head_forward = abs(nose.x - sh_cx)
-
-        severity = int(max(0, min(100, (head_forward - 0.03) / 0.10 * 100)))
-
-        # "confidence": use average of landmark visibilities if available (some builds provide it)
-        vis = []
-        for p in (nose, l_sh, r_sh):
-            if hasattr(p, "visibility") and p.visibility is not None:
-                vis.append(float(p.visibility))
-        conf = sum(vis) / len(vis) if vis else 0.7  # fallback
-
-        vistilt = []
-        for p in (l_ear, l_eye, r_ear, r_eye):
-            if hasattr(p, "visibility") and p.visibility is not None:
-                vis.append(float(p.visibility))
-        tiltangle = tilt_deg(r_ear,l_ear)
-        if tiltangle > 90:
-            tiltangle -= 180
-        elif tiltangle < -90:
-            tiltangle += 180
-
-        min_angle = 10.0   # start reacting
-        max_angle = 30.0   # full strength
-
-        magnitude = abs(tiltangle)
-
-        strength = (magnitude - min_angle) / (max_angle - min_angle)
-        strength = clamp(strength, 0.0, 1.0)
-
-        axis = strength * strength*(1 if tiltangle >= 0 else -1)
-
-        #print(axis)
-
-        metadata = {
-            "type": "POSTURE_BAD" if (severity >= 50 or abs(tiltangle) >= 15 ) else "POSTURE_OK",
-            "severity": severity,
-            "confidence": float(clamp(conf)),
-            "headtiltangle": tiltangle,
-            "headdirection_left": True if tiltangle > 15 else False ,
-            "headdirection_right": True if tiltangle < -15 else False ,
-        }
-
-        try:
-            requests.post(API_URL2, json=metadata, timeout=0.3)
-        except requests.exceptions.RequestException:
-            pass
-
-    now = time.time()
-    if now - last_print > 1.0:
-        print(metadata)
-        last_print = now
-
-    # cv2.imshow("camera", frame_bgr)
-    if cv2.waitKey(1) & 0xFF == ord("q"):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
-landmarker.close()
+def main():
+    camera = EarlyCamera()  # opens while the model loads
+
+    import cv2
+    import numpy as np
+    apply_thread_caps()
+    mark("imports")
+
+    # MediaPipe by default, POSTUREBOT_INFERENCE=onnx for the ONNX Runtime backend
+    backend = create_backend(model_path=MODEL_PATH)
+    mark("model")
+
+    # standby workers stop here until the supervisor activates them
+    park(warmup=lambda: backend.detect(np.zeros((480, 640, 3), dtype=np.uint8), 0))
+
+    cap = camera.get()
+    if cap is None:
+        raise RuntimeError("Could not open camera (try index 0 -> 1 -> 2)")
+    signal_ready()
+
+    metrics = CameraMetrics()
+    start_exporter("posturemonitor")
+    emitter = Emitter(api_url(), name="consequence")
+
+    # POSTUREBOT_HISTORY=1: every measurement goes to the local history store
+    history = HistoryWriter() if history_enabled() else None
+
+    last_print = 0.0
+    first_frame = True
+
+    aggregator = PostureAggregator(
+        window_s=float(os.environ.get("POSTURE_WINDOW_S", "5.0")),
+        heartbeat_s=float(os.environ.get("POSTURE_HEARTBEAT_S", "2.0")),
+        alpha=float(os.environ.get("POSTURE_EWMA_ALPHA", "0.2")),
+    )
+    # POSTURE_ADAPTIVE=0 infers every frame like before
+    sampler = AdaptiveSampler(
+        base_hz=float(os.environ.get("POSTURE_BASE_HZ", "2")),
+        active_hz=float(os.environ.get("POSTURE_ACTIVE_HZ", "10")),
+        idle_hz=float(os.environ.get("POSTURE_IDLE_HZ", "0.5")),
+    ) if os.environ.get("POSTURE_ADAPTIVE", "1") == "1" else None
+    sample_hz = REGISTRY.gauge("posturebot_sample_hz", "Current inference rate chosen by the adaptive sampler")
+    skipped = REGISTRY.counter("posturebot_frames_skipped_total", "Frames grabbed but not decoded or inferred")
+    next_sample = 0.0
+    # POSTUREBOT_STAGE_OVERLAY=1 opens a preview window with the stage timings
+    timer = StageTimer("posturemonitor")
+
+    # PUT /tuning on the hub: new thresholds and bad-posture window between frames,
+    # the exit thresholds keep their hysteresis gap
+    gaps = (aggregator.enter_severity - aggregator.exit_severity, aggregator.enter_tilt - aggregator.exit_tilt)
+
+    def retune(values):
+        apply_tuning(values)
+        aggregator.enter_severity = values["severity_threshold"]
+        aggregator.exit_severity = max(0, values["severity_threshold"] - gaps[0])
+        aggregator.enter_tilt = values["tilt_threshold_deg"]
+        aggregator.exit_tilt = max(0.0, values["tilt_threshold_deg"] - gaps[1])
+        aggregator.window_s = values["bad_window_s"]
+        if sampler is not None:
+            sampler.enter_severity = values["severity_threshold"]
+            sampler.enter_tilt = values["tilt_threshold_deg"]
+
+    tuning = Tuning("posturemonitor", on_change=retune)
+
+    while True:
+        tuning.poll()
+        # grab() only dequeues the frame; decoding and inference happen when a sample is due
+        timer.start()
+        if not cap.grab():
+            metrics.dropped.inc()
+            break
+        metrics.captured.inc()
+        if time.monotonic() < next_sample:
+            skipped.inc()
+            timer.skip()  # only sampled frames are timed
+            continue
+        timer.lap("capture")
+        ok, frame_bgr = cap.retrieve()
+        if not ok:
+            metrics.dropped.inc()
+            timer.skip()
+            continue
+        timer.lap("decode")
+
+        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+        timer.lap("convert")
+
+        timestamp_ms = int(time.time() * 1000)
+        t_infer = time.perf_counter()
+        lm = backend.detect(frame_rgb, timestamp_ms)  # first detected person
+        metrics.inference_ms.observe((time.perf_counter() - t_infer) * 1000)
+        timer.lap("inference")
+        metrics.inferred.inc()
+        if first_frame:
+            mark("first_frame")
+            first_frame = False
+
+        metadata = {"type": "NO_PERSON"}
+
+        if lm is not None:
+            metadata = posture_metrics(lm, tilt_is_bad=True)
+        timer.lap("features")
+
+        if history is not None:
+            history.append(metadata)
+            timer.lap("history")
+
+        # only transitions, heartbeats and the sustained event leave the box
+        now = time.monotonic()
+        for event in aggregator.update(metadata, now):
+            emitter.send(event, key=event["event"])  # newest of each kind wins
+        timer.lap("publish")
+
+        if sampler is not None:
+            next_sample = now + sampler.interval(aggregator, metadata, now)
+            sample_hz.set(sampler.hz)
+
+        if now - last_print > 1.0:
+            print(metadata)
+            last_print = now
+
+        # cv2.imshow("camera", frame_bgr)
+        if timer.overlay_on:
+            timer.overlay(frame_bgr)
+            cv2.imshow("posturemonitor stages", frame_bgr)
+        if cv2.waitKey(1) & 0xFF == ord("q"):
+            break
+        timer.lap("imshow")
+        timer.end_frame()
+
+    if history is not None:
+        history.close()
+    timer.close()
+    emitter.close()
+    cap.release()
+    cv2.destroyAllWindows()
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
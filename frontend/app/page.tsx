@@ -12,6 +12,8 @@ export default function Page() {
   const [hoveredGame, setHoveredGame] = useState<number | null>(null)
   const [policeModeEnabled, setPoliceModeEnabled] = useState(false)
   const [activeGame, setActiveGame] = useState<number | null>(null)
+  // MJPEG stream of the Tilt Master window, when neazbackend runs with POSTUREBOT_STREAM_PORT
+  const [streamUrl, setStreamUrl] = useState<string | null>(null)
 
   // Rickroll overlay
   const [showRickRoll, setShowRickRoll] = useState(false)
@@ -55,7 +57,10 @@ export default function Page() {
 
       if (!response.ok) throw new Error('Failed to launch game')
 
-      await response.json()
+      const data = await response.json()
+      setStreamUrl(
+        gameId === QUIZ_GAME_ID && data.ports?.stream ? `http://127.0.0.1:${data.ports.stream}/stream.mjpg` : null
+      )
 
       toast({
         title: triggeredByPolice ? 'POLICE MODE ACTIVATED!' : 'Game Launched!',
@@ -117,6 +122,7 @@ export default function Page() {
       if (!response.ok) throw new Error('Close request failed')
       setPoliceModeEnabled(false)
       setActiveGame(null)
+      setStreamUrl(null)
       toast({
         title: 'All closed',
         description: 'Camera, games, and monitoring have been stopped.',
@@ -285,6 +291,13 @@ export default function Page() {
           </Card>
         </div>
 
+        {/* the game only encodes frames while this is mounted */}
+        {streamUrl && activeGame === QUIZ_GAME_ID && (
+          <Card className="overflow-hidden border-4 border-accent/30">
+            <img src={streamUrl} alt="Tilt Master live view" className="w-full h-auto" />
+          </Card>
+        )}
+
         <div className="text-center text-lg font-bold text-muted-foreground animate-pulse">
           <p>Make sure neazbackend is running on port 2301!</p>
         </div>
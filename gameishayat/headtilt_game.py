@@ -1,14 +1,30 @@
+import os
 import time
 import math
-import cv2
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
-import requests
-from collections import deque
-
-API_URL = "http://127.0.0.1:7000/headtilt"
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from posturekit.ready import signal_ready, mark
+from posturekit.standby import park
+from posturekit.capture import EarlyCamera
+from posturekit.emitter import Caller, Emitter, Poller
+from posturekit.metrics import CameraMetrics, start_exporter
+from posturekit.stagetimer import StageTimer
+from posturekit.framestream import stream_from_env
+from posturekit.tuning import Tuning
+from posturekit.resources import apply_thread_caps
+from posturekit.gestures import GestureRecognizer, head_pose
+from posturekit.inference import create_tilt_backend
+
+# cv2, numpy and the inference backend are loaded inside main() and the
+# helpers that use them, requests by the posturekit.emitter threads, so
+# importing this module (benchmarks, the standby pool) doesn't pay for them.
+
+QUIZ_URL_ENV = "POSTUREBOT_QUIZ_URL"
+QUIZ_URL = os.environ.get(QUIZ_URL_ENV, "http://127.0.0.1:7000")
+API_URL = f"{QUIZ_URL}/headtilt"
 MODEL_PATH = "gameishayat/pose_landmarker_full.task"
+FACE_MODEL_PATH = "gameishayat/blaze_face_short_range.tflite"  # tilt-only fast path
 
 def calculate_head_tilt(lm):
     """Calculate head tilt angle"""
@@ -28,55 +44,9 @@ def calculate_head_tilt(lm):
     
     return angle, confidence
 
-class SimpleTiltSelector:
-    """Simple tilt selector"""
-    def __init__(self):
-        self.angle_history = deque(maxlen=5)
-        self.current_selection = "NEUTRAL"
-        self.selection_start = None
-        self.hold_time = 0
-        
-    def update(self, angle, confidence):
-        self.angle_history.append(angle)
-        avg_angle = sum(self.angle_history) / len(self.angle_history)
-        
-        if confidence < 0.5:
-            new_selection = "NEUTRAL"
-        elif avg_angle > 15:
-            new_selection = "RIGHT"
-        elif avg_angle < -15:
-            new_selection = "LEFT"
-        else:
-            new_selection = "NEUTRAL"
-        
-        now = time.time()
-        if new_selection == self.current_selection and new_selection != "NEUTRAL":
-            if self.selection_start is None:
-                self.selection_start = now
-            self.hold_time = now - self.selection_start
-        else:
-            self.current_selection = new_selection
-            self.selection_start = now if new_selection != "NEUTRAL" else None
-            self.hold_time = 0
-        
-        is_ready = self.hold_time >= 0.7
-        
-        return {
-            "selection": self.current_selection,
-            "angle": round(avg_angle, 1),
-            "hold_time": round(self.hold_time, 2),
-            "ready": is_ready,
-            "confidence": round(confidence, 2),
-        }
-    
-    def reset(self):
-        self.angle_history.clear()
-        self.current_selection = "NEUTRAL"
-        self.selection_start = None
-        self.hold_time = 0
-
 def draw_selection_box(frame, side, hold_time, ready):
     """Draw selection box"""
+    import cv2
     h, w = frame.shape[:2]
     box_width = w // 2 - 60
     box_height = h // 2
@@ -94,7 +64,7 @@ def draw_selection_box(frame, side, hold_time, ready):
         thickness = 12
         alpha = 0.4
     else:
-        progress = min(hold_time / 0.7, 1.0)
+        progress = min(hold_time / selector.hold_s, 1.0)
         color = (0, int(200 + 55 * progress), int(255 - 55 * progress))
         thickness = int(6 + 6 * progress)
         alpha = 0.2 + 0.2 * progress
@@ -106,7 +76,7 @@ def draw_selection_box(frame, side, hold_time, ready):
     cv2.rectangle(frame, (box_x, box_y), (box_x + box_width, box_y + box_height), color, thickness)
     
     if hold_time > 0 and not ready:
-        bar_h = int((hold_time / 0.7) * (box_height - 20))
+        bar_h = int(min(hold_time / selector.hold_s, 1.0) * (box_height - 20))
         cv2.rectangle(frame, (box_x + 10, box_y + box_height - 10 - bar_h), 
                      (box_x + 25, box_y + box_height - 10), color, -1)
     
@@ -115,6 +85,7 @@ def draw_selection_box(frame, side, hold_time, ready):
                    cv2.FONT_HERSHEY_SIMPLEX, 4.0, (0, 255, 0), 8)
 
 def draw_text_centered(frame, text, y, size=1.0, color=(255, 255, 255), thickness=2):
+    import cv2
     h, w = frame.shape[:2]
     font = cv2.FONT_HERSHEY_SIMPLEX
     text_size = cv2.getTextSize(text, font, size, thickness)[0]
@@ -122,6 +93,7 @@ def draw_text_centered(frame, text, y, size=1.0, color=(255, 255, 255), thicknes
     cv2.putText(frame, text, (x, y), font, size, color, thickness)
 
 def draw_text_in_box(frame, text, bx, by, bw, bh, size=1.2):
+    import cv2
     font = cv2.FONT_HERSHEY_SIMPLEX
     lines = text.split('\n') if '\n' in text else [text]
     lh = int(40 * size)
@@ -152,31 +124,10 @@ def wrap(text, w=35):
         lines.append(' '.join(curr))
     return '\n'.join(lines)
 
-# Initialize
-try:
-    base_options = python.BaseOptions(model_asset_path=MODEL_PATH)
-    options = vision.PoseLandmarkerOptions(
-        base_options=base_options,
-        running_mode=vision.RunningMode.VIDEO,
-        num_poses=1
-    )
-    landmarker = vision.PoseLandmarker.create_from_options(options)
-except Exception as e:
-    print(f"❌ Model error: {e}")
-    exit(1)
-
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    cap = cv2.VideoCapture(1)
-    if not cap.isOpened():
-        print("❌ No camera")
-        exit(1)
-
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-
-selector = SimpleTiltSelector()
-last_send = 0.0
+selector = GestureRecognizer()
+# POSTUREBOT_GESTURES=0: answer with the spacebar only
+HANDS_FREE = os.environ.get("POSTUREBOT_GESTURES", "1") == "1"
+ARM_S = 3.0  # a nod confirms the side chosen within this many seconds
 
 game = {
     "active": False,
@@ -186,72 +137,62 @@ game = {
     "answered": False,
     "result": None,
     "result_time": None,
+    "armed": None,  # (side, time) of the last tilt, for nod-to-confirm
 }
 
-print("="*80)
-print("🎮 HEAD TILT QUIZ - ULTIMATE FUN EDITION 🎮")
-print("="*80)
-print("MODE SELECTION:")
-print("  's' - 🎲 RANDOM (mix)")
-print("  't' - 🎓 TRIVIA")
-print("  'c' - 🥋 CHUCK NORRIS")
-print("  'd' - 👨 DAD JOKES")
-print("  'f' - 🤓 FACTS")
-print("  'w' - 🤔 WOULD YOU RATHER")
-print("  'r' - 🧩 RIDDLES")
-print("  'j' - 😂 JOKES")
-print("  'n' - 🎭 NEVER HAVE I EVER")
-print("\nDURING GAME:")
-print("  SPACEBAR - Confirm | 'p' - Pause | 'e' - Exit to menu | 'q' - Quit")
-print("="*80)
+def print_banner():
+    print("="*80)
+    print("🎮 HEAD TILT QUIZ - ULTIMATE FUN EDITION 🎮")
+    print("="*80)
+    print("MODE SELECTION:")
+    print("  's' - 🎲 RANDOM (mix)")
+    print("  't' - 🎓 TRIVIA")
+    print("  'c' - 🥋 CHUCK NORRIS")
+    print("  'd' - 👨 DAD JOKES")
+    print("  'f' - 🤓 FACTS")
+    print("  'w' - 🤔 WOULD YOU RATHER")
+    print("  'r' - 🧩 RIDDLES")
+    print("  'j' - 😂 JOKES")
+    print("  'n' - 🎭 NEVER HAVE I EVER")
+    print("\nDURING GAME:")
+    print("  SPACEBAR - Confirm | 'p' - Pause | 'e' - Exit to menu | 'q' - Quit")
+    print("  Hands-free: flick or tilt your head to a side, then NOD to confirm; shake to clear")
+    print("  'o' - Stage timing overlay")
+    print("="*80)
+
+MODE_NAMES = {
+    "random": "🎲 RANDOM MIX",
+    "trivia": "🎓 TRIVIA",
+    "chuck": "🥋 CHUCK NORRIS",
+    "dadjokes": "👨 DAD JOKES",
+    "facts": "🤓 USELESS FACTS",
+    "wouldyourather": "🤔 WOULD YOU RATHER",
+    "riddles": "🧩 RIDDLES",
+    "jokes": "😂 JOKES",
+    "neverhaveiever": "🎭 NEVER HAVE I EVER"
+}
+
+# the quiz calls run on a Caller thread (set up in main()); apply_replies()
+# takes their results over between frames, so a slow backend never stalls
+# capture or rendering
+quiz = None
 
 def start_mode(mode):
     """Start specific mode"""
-    try:
-        r = requests.post(f"http://127.0.0.1:7000/game/start?mode={mode}", timeout=2)
-        if r.status_code == 200:
-            game["question"] = r.json()
-            game["q_start"] = time.time()
-            game["active"] = True
-            game["answered"] = False
-            game["result"] = None
-            selector.reset()
-            
-            mode_names = {
-                "random": "🎲 RANDOM MIX",
-                "trivia": "🎓 TRIVIA",
-                "chuck": "🥋 CHUCK NORRIS",
-                "dadjokes": "👨 DAD JOKES",
-                "facts": "🤓 USELESS FACTS",
-                "wouldyourather": "🤔 WOULD YOU RATHER",
-                "riddles": "🧩 RIDDLES",
-                "jokes": "😂 JOKES",
-                "neverhaveiever": "🎭 NEVER HAVE I EVER"
-            }
-            print(f"\n{mode_names.get(mode, mode.upper())} MODE!")
-            return True
-    except Exception as e:
-        print(f"❌ {e}")
-        return False
+    quiz.call("start", "POST", f"{QUIZ_URL}/game/start?mode={mode}", tag=mode)
 
 def next_question():
     """Get next question"""
-    try:
-        r = requests.get("http://127.0.0.1:7000/game/next", timeout=2)
-        if r.status_code == 200:
-            data = r.json()
-            
-            game["question"] = data
-            game["q_start"] = time.time()
-            game["answered"] = False
-            game["result"] = None
-            selector.reset()
-            
-            print(f"\n📝 Q{data.get('question_number', '?')} | {data.get('category', 'Unknown')}")
-            return data
-    except Exception as e:
-        print(f"❌ {e}")
-        return None
+    game["result_time"] = None  # don't ask again while this one is on its way
+    quiz.call("next", "GET", f"{QUIZ_URL}/game/next")
+
+def show_question(data):
+    game["question"] = data
+    game["q_start"] = time.time()
+    game["answered"] = False
+    game["result"] = None
+    game["armed"] = None
+    selector.reset()
 
 def submit(side, ready):
     """Submit answer"""
@@ -268,40 +209,70 @@ def submit(side, ready):
     rt = time.time() - game["q_start"]
     print(f"\n✅ {side}")
     
-    try:
-        r = requests.post("http://127.0.0.1:7000/game/answer", json={
-            "question_id": game["question"]["id"],
-            "selected_side": side.upper(),
-            "response_time": rt
-        }, timeout=2)
-        
-        if r.status_code == 200:
-            res = r.json()
+    quiz.call("answer", "POST", f"{QUIZ_URL}/game/answer", tag=game["question"]["id"], json={
+        "question_id": game["question"]["id"],
+        "selected_side": side.upper(),
+        "response_time": rt
+    })
+
+def apply_replies():
+    """Quiz replies that arrived since the last frame"""
+    for r in quiz.replies():
+        current = game["active"] and game["question"] and game["question"].get("id") == r.tag
+        if r.error is not None:
+            if r.key == "end":
+                continue
+            print(f"❌ {r.error}")
+            if r.key == "answer" and current:
+                game["answered"] = False
+            elif r.key == "next" and game["active"]:
+                game["result_time"] = time.time()  # auto-advance tries again
+        elif r.key == "start":
+            show_question(r.data)
+            game["active"] = True
+            print(f"\n{MODE_NAMES.get(r.tag, r.tag.upper())} MODE!")
+        elif r.key == "next" and game["active"]:
+            show_question(r.data)
+            print(f"\n📝 Q{r.data.get('question_number', '?')} | {r.data.get('category', 'Unknown')}")
+        elif r.key == "answer" and current:
+            res = r.data
             game["result"] = res
             game["result_time"] = time.time()
             if res.get('correct'):
                 print(f"✅ +{res.get('points_earned', 0)} pts | Streak: {res.get('streak', 0)}")
             else:
                 print(f"❌ Answer: {res.get('correct_answer')} | Score: {res.get('total_score', 0)}")
-    except Exception as e:
-        print(f"❌ {e}")
-        game["answered"] = False
+        elif r.key == "end":
+            stats = r.data.get("final_stats", {})
+            print("\n" + "="*80)
+            print("📊 SESSION ENDED")
+            print(f"Score: {stats.get('score', 0)} | Questions: {stats.get('total_questions', 0)}")
+            print(f"Accuracy: {stats.get('accuracy', 0)}% | Best Streak: {stats.get('best_streak', 0)}")
+            print("="*80)
+
+def on_gesture(event):
+    """Hands-free answers: a flick or a tilt arms a side, a nod confirms the
+    side armed last, a shake clears the choice"""
+    if event.kind == "shake":
+        selector.reset()
+        game["armed"] = None
+        return
+    if not game["active"] or game["answered"] or game["paused"] or game["result"]:
+        return
+    if event.kind == "flick":
+        # only arms: a quick involuntary head turn must not answer on its own
+        print(f"👋 flick {event.side}, NOD to confirm")
+        game["armed"] = (event.side, event.t)
+    elif event.kind == "nod" and game["armed"]:
+        side, t = game["armed"]
+        if event.t - t <= ARM_S:
+            print(f"🙆 nod {side}")
+            submit(side, True)
 
 def exit_to_menu():
     """Exit to main menu"""
     if game["active"]:
-        try:
-            r = requests.post("http://127.0.0.1:7000/game/end", timeout=2)
-            if r.status_code == 200:
-                data = r.json()
-                stats = data.get("final_stats", {})
-                print("\n" + "="*80)
-                print("📊 SESSION ENDED")
-                print(f"Score: {stats.get('score', 0)} | Questions: {stats.get('total_questions', 0)}")
-                print(f"Accuracy: {stats.get('accuracy', 0)}% | Best Streak: {stats.get('best_streak', 0)}")
-                print("="*80)
-        except:
-            pass
+        quiz.call("end", "POST", f"{QUIZ_URL}/game/end")
         
         game["active"] = False
         game["question"] = None
@@ -310,227 +281,314 @@ def exit_to_menu():
         selector.reset()
         print("\n🏠 Returned to main menu. Select a mode to play again!\n")
 
-print("\n✅ Ready! Select a mode!\n")
+def main():
+    camera = EarlyCamera((0, 1), 1280, 720)  # opens while the model loads
 
-try:
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            continue
+    import cv2
+    import numpy as np
+    apply_thread_caps()
+    mark("imports")
 
-        frame = cv2.flip(frame, 1)
-        h, w = frame.shape[:2]
-        
-        # Auto-advance
-        if game["result"] and game["result_time"]:
-            if time.time() - game["result_time"] > 2.0:
-                next_question()
-        
-        # Process
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_img = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
-        ts = int(time.time() * 1000)
-        
-        try:
-            res = landmarker.detect_for_video(mp_img, ts)
-        except:
-            continue
-
-        tilt = {
-            "selection": "NEUTRAL",
-            "angle": 0,
-            "hold_time": 0,
-            "ready": False,
-            "confidence": 0,
-        }
-
-        if res.pose_landmarks and len(res.pose_landmarks) > 0:
-            lm = res.pose_landmarks[0]
-            angle, conf = calculate_head_tilt(lm)
-            tilt = selector.update(angle, conf)
+    # Initialize
+    try:
+        # only the ears matter here: face detector first, pose model when the face is lost
+        backend = create_tilt_backend(FACE_MODEL_PATH, model_path=MODEL_PATH)
+    except Exception as e:
+        print(f"❌ Model error: {e}")
+        exit(1)
+    mark("model")
+
+    # standby workers stop here until the supervisor activates them
+    park(warmup=lambda: backend.detect(np.zeros((480, 640, 3), dtype=np.uint8), 0))
+    # a station's standby worker learns its quiz backend on activation
+    global QUIZ_URL, API_URL, quiz
+    QUIZ_URL = os.environ.get(QUIZ_URL_ENV, QUIZ_URL)
+    API_URL = f"{QUIZ_URL}/headtilt"
+
+    cap = camera.get()
+    if cap is None:
+        print("❌ No camera")
+        exit(1)
+
+    print_banner()
+    print("\n✅ Ready! Select a mode!\n")
+    signal_ready()
+
+    metrics = CameraMetrics()
+    start_exporter("headtilt_game")
+    # tilt and the score bar go over background threads, the frame loop never waits on HTTP
+    emitter = Emitter(API_URL, name="headtilt")
+    stats = Poller(f"{QUIZ_URL}/game/stats", interval_s=1.0, timeout=0.3, name="stats")
+    quiz = Caller(timeout=2.0, name="quiz")
+    timer = StageTimer("headtilt_game")  # 'o' shows where the frame time goes
+    stream = stream_from_env()  # POSTUREBOT_STREAM_PORT: the annotated frames for the browser
+
+    def retune(values):
+        selector.threshold = values["tilt_threshold_deg"]
+        selector.hold_s = values["hold_s"]
+
+    tuning = Tuning("headtilt_game", on_change=retune)  # PUT /tuning on the hub, applied between frames
+    last_send = 0.0
+    first_frame = True
+
+    try:
+        while True:
+            tuning.poll()
+            timer.start()
+            ok, frame = cap.read()
+            if not ok:
+                metrics.dropped.inc()
+                timer.skip()
+                continue
+            metrics.captured.inc()
+            timer.lap("capture")
+
+            apply_replies()
+            # Auto-advance
+            if game["result"] and game["result_time"]:
+                if time.time() - game["result_time"] > 2.0:
+                    next_question()
+            timer.lap("quiz_api")
+
+            frame = cv2.flip(frame, 1)
+            h, w = frame.shape[:2]
             
-            # PAUSE
-            if game["paused"]:
-                ov = frame.copy()
-                cv2.rectangle(ov, (0, 0), (w, h), (0, 0, 0), -1)
-                cv2.addWeighted(ov, 0.8, frame, 0.2, 0, frame)
-                draw_text_centered(frame, "⏸️  PAUSED", h//2, 3.0, (255, 255, 255), 5)
-                draw_text_centered(frame, "Press 'p' to resume | 'e' to exit", h//2 + 100, 1.0, (200, 200, 200), 2)
+            # Process
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            ts = int(time.time() * 1000)
+            timer.lap("convert")
             
-            # RESULT
-            elif game["result"]:
-                rd = game["result"]
-                ov = frame.copy()
+            t_infer = time.perf_counter()
+            try:
+                lm = backend.detect(rgb, ts)
+            except:
+                metrics.dropped.inc()
+                timer.skip()
+                continue
+            metrics.inference_ms.observe((time.perf_counter() - t_infer) * 1000)
+            timer.lap("inference")
+            metrics.inferred.inc()
+            if first_frame:
+                mark("first_frame")
+                first_frame = False
+
+            tilt = {
+                "selection": "NEUTRAL",
+                "angle": 0,
+                "hold_time": 0,
+                "ready": False,
+                "confidence": 0,
+            }
+
+            if lm is not None:
+                angle, conf = calculate_head_tilt(lm)
+                yaw, pitch = head_pose(lm)
+                now_s = time.monotonic()
+                events = selector.update(angle, conf, now_s, yaw, pitch)
+                tilt = selector.state()
+                if tilt["selection"] != "NEUTRAL":
+                    game["armed"] = (tilt["selection"], now_s)
+                if HANDS_FREE:
+                    for event in events:
+                        on_gesture(event)
+                timer.lap("features")
                 
-                mode = game["question"].get("mode", "random")
+                # PAUSE
+                if game["paused"]:
+                    ov = frame.copy()
+                    cv2.rectangle(ov, (0, 0), (w, h), (0, 0, 0), -1)
+                    cv2.addWeighted(ov, 0.8, frame, 0.2, 0, frame)
+                    draw_text_centered(frame, "⏸️  PAUSED", h//2, 3.0, (255, 255, 255), 5)
+                    draw_text_centered(frame, "Press 'p' to resume | 'e' to exit", h//2 + 100, 1.0, (200, 200, 200), 2)
                 
-                if rd.get("correct"):
-                    cv2.rectangle(ov, (0, 0), (w, h), (0, 130, 0), -1)
-                    cv2.addWeighted(ov, 0.7, frame, 0.3, 0, frame)
+                # RESULT
+                elif game["result"]:
+                    rd = game["result"]
+                    ov = frame.copy()
                     
-                    mode_msgs = {
-                        "chuck": "🥋 LEGENDARY!",
-                        "dadjokes": "😂 HILARIOUS!",
-                        "facts": "🤓 FASCINATING!",
-                        "wouldyourather": "🤔 WISE!",
-                        "riddles": "🧩 GENIUS!",
-                        "jokes": "😄 FUNNY!",
-                        "neverhaveiever": "🎭 HONEST!",
-                        "trivia": "🎓 SMART!",
-                    }
-                    msg = mode_msgs.get(mode, "✅ CORRECT!")
+                    mode = game["question"].get("mode", "random")
                     
-                    draw_text_centered(frame, msg, h//2 - 100, 3.5, (0, 255, 0), 7)
-                else:
-                    cv2.rectangle(ov, (0, 0), (w, h), (0, 0, 130), -1)
-                    cv2.addWeighted(ov, 0.7, frame, 0.3, 0, frame)
-                    draw_text_centered(frame, "❌ WRONG!", h//2 - 100, 3.5, (0, 0, 255), 7)
-                    draw_text_centered(frame, f"Answer: {rd.get('correct_answer')}", h//2, 1.8, (255, 255, 255), 4)
-                
-                draw_text_centered(frame, f"+{rd.get('points_earned', 0)} pts", h//2 + 90, 2.2, (255, 255, 0), 5)
-                draw_text_centered(frame, f"Score: {rd.get('total_score', 0)}", h//2 + 160, 1.5, (255, 255, 255), 3)
-                
-                if rd.get('streak', 0) > 1:
-                    draw_text_centered(frame, f"🔥 {rd['streak']} Streak!", h//2 + 220, 1.2, (255, 140, 0), 3)
-            
-            # QUESTION
-            elif game["active"] and game["question"] and not game["answered"]:
-                q = game["question"]
-                
-                # Mode indicator
-                mode = q.get('mode', 'random')
-                mode_icons = {
-                    "trivia": "🎓", "chuck": "🥋", "dadjokes": "👨",
-                    "facts": "🤓", "wouldyourather": "🤔", "riddles": "🧩",
-                    "jokes": "😂", "neverhaveiever": "🎭", "random": "🎲"
-                }
-                icon = mode_icons.get(mode, "🎮")
-                cv2.putText(frame, f"{icon} {mode.upper()}", (10, 60), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 140, 0), 3)
-                
-                # Selection box
-                if tilt["selection"] != "NEUTRAL":
-                    draw_selection_box(frame, tilt["selection"], tilt["hold_time"], tilt["ready"])
-                
-                # Header
-                ov = frame.copy()
-                cv2.rectangle(ov, (0, 0), (w, 130), (0, 0, 0), -1)
-                cv2.addWeighted(ov, 0.75, frame, 0.25, 0, frame)
-                draw_text_centered(frame, wrap(q.get('question', ''), 50), 75, 1.2, (255, 255, 0), 3)
-                
-                # Answers
-                draw_text_in_box(frame, wrap(q.get('left_answer', ''), 18), 30, h//4, w//2 - 60, h//2, 1.4)
-                draw_text_in_box(frame, wrap(q.get('right_answer', ''), 18), w//2 + 30, h//4, w//2 - 60, h//2, 1.4)
-                
-                # Category
-                cv2.rectangle(frame, (w//2 - 150, 110), (w//2 + 150, 150), (0, 0, 0), -1)
-                draw_text_centered(frame, f"📚 {q.get('category', '')}", 135, 0.85, (180, 180, 180), 2)
+                    if rd.get("correct"):
+                        cv2.rectangle(ov, (0, 0), (w, h), (0, 130, 0), -1)
+                        cv2.addWeighted(ov, 0.7, frame, 0.3, 0, frame)
+                        
+                        mode_msgs = {
+                            "chuck": "🥋 LEGENDARY!",
+                            "dadjokes": "😂 HILARIOUS!",
+                            "facts": "🤓 FASCINATING!",
+                            "wouldyourather": "🤔 WISE!",
+                            "riddles": "🧩 GENIUS!",
+                            "jokes": "😄 FUNNY!",
+                            "neverhaveiever": "🎭 HONEST!",
+                            "trivia": "🎓 SMART!",
+                        }
+                        msg = mode_msgs.get(mode, "✅ CORRECT!")
+                        
+                        draw_text_centered(frame, msg, h//2 - 100, 3.5, (0, 255, 0), 7)
+                    else:
+                        cv2.rectangle(ov, (0, 0), (w, h), (0, 0, 130), -1)
+                        cv2.addWeighted(ov, 0.7, frame, 0.3, 0, frame)
+                        draw_text_centered(frame, "❌ WRONG!", h//2 - 100, 3.5, (0, 0, 255), 7)
+                        draw_text_centered(frame, f"Answer: {rd.get('correct_answer')}", h//2, 1.8, (255, 255, 255), 4)
+                    
+                    draw_text_centered(frame, f"+{rd.get('points_earned', 0)} pts", h//2 + 90, 2.2, (255, 255, 0), 5)
+                    draw_text_centered(frame, f"Score: {rd.get('total_score', 0)}", h//2 + 160, 1.5, (255, 255, 255), 3)
+                    
+                    if rd.get('streak', 0) > 1:
+                        draw_text_centered(frame, f"🔥 {rd['streak']} Streak!", h//2 + 220, 1.2, (255, 140, 0), 3)
                 
-                # Stats
-                try:
-                    sr = requests.get("http://127.0.0.1:7000/game/stats", timeout=0.3)
-                    if sr.status_code == 200:
-                        st = sr.json()
+                # QUESTION
+                elif game["active"] and game["question"] and not game["answered"]:
+                    q = game["question"]
+                    
+                    # Mode indicator
+                    mode = q.get('mode', 'random')
+                    mode_icons = {
+                        "trivia": "🎓", "chuck": "🥋", "dadjokes": "👨",
+                        "facts": "🤓", "wouldyourather": "🤔", "riddles": "🧩",
+                        "jokes": "😂", "neverhaveiever": "🎭", "random": "🎲"
+                    }
+                    icon = mode_icons.get(mode, "🎮")
+                    cv2.putText(frame, f"{icon} {mode.upper()}", (10, 60), 
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 140, 0), 3)
+                    
+                    # Selection box
+                    if tilt["selection"] != "NEUTRAL":
+                        draw_selection_box(frame, tilt["selection"], tilt["hold_time"], tilt["ready"])
+                    
+                    # Header
+                    ov = frame.copy()
+                    cv2.rectangle(ov, (0, 0), (w, 130), (0, 0, 0), -1)
+                    cv2.addWeighted(ov, 0.75, frame, 0.25, 0, frame)
+                    draw_text_centered(frame, wrap(q.get('question', ''), 50), 75, 1.2, (255, 255, 0), 3)
+                    
+                    # Answers
+                    draw_text_in_box(frame, wrap(q.get('left_answer', ''), 18), 30, h//4, w//2 - 60, h//2, 1.4)
+                    draw_text_in_box(frame, wrap(q.get('right_answer', ''), 18), w//2 + 30, h//4, w//2 - 60, h//2, 1.4)
+                    
+                    # Category
+                    cv2.rectangle(frame, (w//2 - 150, 110), (w//2 + 150, 150), (0, 0, 0), -1)
+                    draw_text_centered(frame, f"📚 {q.get('category', '')}", 135, 0.85, (180, 180, 180), 2)
+                    
+                    # Stats
+                    st = stats.value
+                    if st:
                         sb = frame.copy()
                         cv2.rectangle(sb, (0, h - 55), (w, h), (0, 0, 0), -1)
                         cv2.addWeighted(sb, 0.65, frame, 0.35, 0, frame)
                         
                         txt = f"Score: {st.get('score', 0)} | Streak: {st.get('current_streak', 0)} | Q: {st.get('total_questions', 0)}"
                         draw_text_centered(frame, txt, h - 22, 0.9, (0, 255, 255), 2)
+                    
+                    # Instructions
+                    ib = frame.copy()
+                    cv2.rectangle(ib, (0, h - 110), (w, h - 55), (0, 0, 0), -1)
+                    cv2.addWeighted(ib, 0.6, frame, 0.4, 0, frame)
+                    
+                    if tilt["selection"] == "NEUTRAL":
+                        draw_text_centered(frame, "👈 Tilt LEFT or RIGHT 👉", h - 78, 1.3, (255, 255, 255), 3)
+                    elif tilt["ready"]:
+                        draw_text_centered(frame, "✅ SPACEBAR or NOD to confirm!", h - 78, 1.4, (0, 255, 0), 4)
+                    else:
+                        pct = int((tilt["hold_time"] / selector.hold_s) * 100)
+                        draw_text_centered(frame, f"⏳ {pct}%", h - 78, 1.2, (255, 200, 0), 3)
+                
+                # DEBUG
+                debug = f"TILT: {tilt['selection']} | {tilt['angle']:.1f}° | CONF: {tilt['confidence']:.2f}"
+                cv2.putText(frame, debug, (10, h - 130), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                
+                # Ears
+                try:
+                    l_ear = lm[7]
+                    r_ear = lm[8]
+                    cv2.circle(frame, (int(l_ear.x * w), int(l_ear.y * h)), 6, (255, 0, 0), -1)
+                    cv2.circle(frame, (int(r_ear.x * w), int(r_ear.y * h)), 6, (0, 0, 255), -1)
+                    cv2.line(frame, (int(l_ear.x * w), int(l_ear.y * h)), 
+                            (int(r_ear.x * w), int(r_ear.y * h)), (0, 255, 0), 2)
                 except:
                     pass
+            
+            else:
+                draw_text_centered(frame, "⚠️ NO PERSON", h//2, 2.0, (0, 0, 255), 4)
+            
+            # MAIN MENU
+            if not game["active"]:
+                ov = frame.copy()
+                cv2.rectangle(ov, (40, h - 200), (w - 40, h - 30), (0, 0, 50), -1)
+                cv2.addWeighted(ov, 0.85, frame, 0.15, 0, frame)
                 
-                # Instructions
-                ib = frame.copy()
-                cv2.rectangle(ib, (0, h - 110), (w, h - 55), (0, 0, 0), -1)
-                cv2.addWeighted(ib, 0.6, frame, 0.4, 0, frame)
-                
-                if tilt["selection"] == "NEUTRAL":
-                    draw_text_centered(frame, "👈 Tilt LEFT or RIGHT 👉", h - 78, 1.3, (255, 255, 255), 3)
-                elif tilt["ready"]:
-                    draw_text_centered(frame, "✅ SPACEBAR to confirm!", h - 78, 1.4, (0, 255, 0), 4)
-                else:
-                    pct = int((tilt["hold_time"] / 0.7) * 100)
-                    draw_text_centered(frame, f"⏳ {pct}%", h - 78, 1.2, (255, 200, 0), 3)
+                draw_text_centered(frame, "🎮 SELECT MODE 🎮", h - 170, 1.3, (255, 255, 0), 3)
+                draw_text_centered(frame, "s=Random | t=Trivia | c=Chuck | d=Dad | f=Facts", h - 130, 0.85, (255, 255, 255), 2)
+                draw_text_centered(frame, "w=WYR | r=Riddles | j=Jokes | n=NHIE", h - 100, 0.85, (255, 255, 255), 2)
+                draw_text_centered(frame, "q=Quit Game", h - 65, 0.9, (200, 200, 200), 2)
             
-            # DEBUG
-            debug = f"TILT: {tilt['selection']} | {tilt['angle']:.1f}° | CONF: {tilt['confidence']:.2f}"
-            cv2.putText(frame, debug, (10, h - 130), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+            timer.lap("overlay")
+
+            # Send
+            now = time.time()
+            if now - last_send > 0.1:
+                emitter.send(tilt)
+                last_send = now
+            timer.lap("publish")
             
-            # Ears
-            try:
-                l_ear = lm[7]
-                r_ear = lm[8]
-                cv2.circle(frame, (int(l_ear.x * w), int(l_ear.y * h)), 6, (255, 0, 0), -1)
-                cv2.circle(frame, (int(r_ear.x * w), int(r_ear.y * h)), 6, (0, 0, 255), -1)
-                cv2.line(frame, (int(l_ear.x * w), int(l_ear.y * h)), 
-                        (int(r_ear.x * w), int(r_ear.y * h)), (0, 255, 0), 2)
-            except:
-                pass
-        
-        else:
-            draw_text_centered(frame, "⚠️ NO PERSON", h//2, 2.0, (0, 0, 255), 4)
-        
-        # MAIN MENU
-        if not game["active"]:
-            ov = frame.copy()
-            cv2.rectangle(ov, (40, h - 200), (w - 40, h - 30), (0, 0, 50), -1)
-            cv2.addWeighted(ov, 0.85, frame, 0.15, 0, frame)
+            timer.overlay(frame)
+            if stream is not None:
+                stream.publish(frame)  # encoded off this thread, only while someone watches
+                timer.lap("stream")
+            cv2.imshow("Head Tilt Quiz - Ultimate Edition", frame)
             
-            draw_text_centered(frame, "🎮 SELECT MODE 🎮", h - 170, 1.3, (255, 255, 0), 3)
-            draw_text_centered(frame, "s=Random | t=Trivia | c=Chuck | d=Dad | f=Facts", h - 130, 0.85, (255, 255, 255), 2)
-            draw_text_centered(frame, "w=WYR | r=Riddles | j=Jokes | n=NHIE", h - 100, 0.85, (255, 255, 255), 2)
-            draw_text_centered(frame, "q=Quit Game", h - 65, 0.9, (200, 200, 200), 2)
-        
-        # Send
-        now = time.time()
-        if now - last_send > 0.1:
-            try:
-                requests.post(API_URL, json=tilt, timeout=0.3)
-            except:
-                pass
-            last_send = now
-        
-        cv2.imshow("Head Tilt Quiz - Ultimate Edition", frame)
-        
-        k = cv2.waitKey(1) & 0xFF
-        if k == ord("q"):
-            if game["active"]:
+            k = cv2.waitKey(1) & 0xFF
+            timer.lap("imshow")
+            if k == ord("q"):
+                if game["active"]:
+                    exit_to_menu()
+                else:
+                    print("\n👋 Thanks for playing!")
+                    break
+            elif k == ord("s") and not game["active"]:
+                start_mode("random")
+            elif k == ord("t") and not game["active"]:
+                start_mode("trivia")
+            elif k == ord("c") and not game["active"]:
+                start_mode("chuck")
+            elif k == ord("d") and not game["active"]:
+                start_mode("dadjokes")
+            elif k == ord("f") and not game["active"]:
+                start_mode("facts")
+            elif k == ord("w") and not game["active"]:
+                start_mode("wouldyourather")
+            elif k == ord("r") and not game["active"]:
+                start_mode("riddles")
+            elif k == ord("j") and not game["active"]:
+                start_mode("jokes")
+            elif k == ord("n") and not game["active"]:
+                start_mode("neverhaveiever")
+            elif k == ord("e"):
                 exit_to_menu()
-            else:
-                print("\n👋 Thanks for playing!")
-                break
-        elif k == ord("s") and not game["active"]:
-            start_mode("random")
-        elif k == ord("t") and not game["active"]:
-            start_mode("trivia")
-        elif k == ord("c") and not game["active"]:
-            start_mode("chuck")
-        elif k == ord("d") and not game["active"]:
-            start_mode("dadjokes")
-        elif k == ord("f") and not game["active"]:
-            start_mode("facts")
-        elif k == ord("w") and not game["active"]:
-            start_mode("wouldyourather")
-        elif k == ord("r") and not game["active"]:
-            start_mode("riddles")
-        elif k == ord("j") and not game["active"]:
-            start_mode("jokes")
-        elif k == ord("n") and not game["active"]:
-            start_mode("neverhaveiever")
-        elif k == ord("e"):
-            exit_to_menu()
-        elif k == ord("p") and game["active"]:
-            game["paused"] = not game["paused"]
-            print(f"\n{'⏸️  PAUSED' if game['paused'] else '▶️  RESUMED'}")
-        elif k == ord(" "):
-            if game["active"] and not game["answered"] and not game["paused"] and not game["result"]:
-                submit(tilt["selection"], tilt["ready"])
-
-except KeyboardInterrupt:
-    print("\n⚠️ Interrupted")
-finally:
-    cap.release()
-    cv2.destroyAllWindows()
-    landmarker.close()
-    print("✅ Goodbye!")
\ No newline at end of file
+            elif k == ord("p") and game["active"]:
+                game["paused"] = not game["paused"]
+                print(f"\n{'⏸️  PAUSED' if game['paused'] else '▶️  RESUMED'}")
+            elif k == ord("o"):
+                timer.toggle_overlay()
+            elif k == ord(" "):
+                if game["active"] and not game["answered"] and not game["paused"] and not game["result"]:
+                    submit(tilt["selection"], tilt["ready"])
+            timer.end_frame()
+
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted")
+    finally:
+        emitter.close()
+        stats.close()
+        quiz.close()  # lets a pending /game/end go out
+        timer.close()
+        if stream is not None:
+            stream.close()
+        cap.release()
+        cv2.destroyAllWindows()
+        backend.close()
+        print("✅ Goodbye!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import numpy as np
+
+# Enemy cars as a structure of arrays, one row per lane.
+# All cars move at the same speed, so an update is one vectorized add, slots
+# of passed cars are reused by later spawns, and collision only has to look at
+# the row (lane bucket) the player is in.
+
+
+class EnemyPool:
+    def __init__(self, lanes, capacity=16):
+        self.lanes = lanes
+        self.y = np.zeros((lanes, capacity), dtype=np.float32)
+        self.color = np.zeros((lanes, capacity), dtype=np.uint8)
+        self.alive = np.zeros((lanes, capacity), dtype=bool)
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return self.y.shape[1]
+
+    def _grow(self):
+        """Double the slots per lane (only when a lane is full)"""
+        pad = self.capacity
+        self.y = np.pad(self.y, ((0, 0), (0, pad)))
+        self.color = np.pad(self.color, ((0, 0), (0, pad)))
+        self.alive = np.pad(self.alive, ((0, 0), (0, pad)))
+
+    def spawn(self, lane, y, color):
+        slot = int(np.argmin(self.alive[lane]))  # first free slot
+        if self.alive[lane, slot]:
+            slot = self.capacity
+            self._grow()
+        self.y[lane, slot] = y
+        self.color[lane, slot] = color
+        self.alive[lane, slot] = True
+        self.count += 1
+
+    def clear(self):
+        self.alive[:] = False
+        self.count = 0
+
+    def advance(self, dy, limit):
+        """Move every car down by dy, free the ones past limit, return how many passed"""
+        self.y += dy  # dead slots move too, cheaper than masking
+        passed = self.alive & (self.y >= limit)
+        n = int(np.count_nonzero(passed))
+        if n:
+            self.alive &= ~passed
+            self.count -= n
+        return n
+
+    def hits(self, lanes, top, bottom, height):
+        """Any live car in these lanes overlapping [top, bottom) vertically"""
+        for lane in lanes:
+            y = self.y[lane].astype(np.int32)
+            if np.any(self.alive[lane] & (y < bottom) & (y + height > top)):
+                return True
+        return False
+
+    def visible(self, top, bottom, height, offset=0.0):
+        """(lane, y, color) lists of the live cars overlapping [top, bottom), drawn offset px down"""
+        y = (self.y + offset).astype(np.int32)
+        mask = self.alive & (y < bottom) & (y + height > top)
+        lanes, slots = np.nonzero(mask)
+        return lanes.tolist(), y[lanes, slots].tolist(), self.color[lanes, slots].tolist()
@@ -0,0 +1,88 @@
+import os
+import socket
+
+# Lane commands travel as tiny UDP datagrams on localhost:
+#   b"left" / b"right"   -> move one lane
+#   b"axis <float>"      -> continuous steering, -1.0 (far left) .. 1.0 (far right)
+# UDP on loopback never blocks the sender and needs no window focus or display.
+
+HOST = os.environ.get("TRAFFIC_INPUT_HOST", "127.0.0.1")
+PORT = 8765
+
+
+def channel_port():
+    """TRAFFIC_INPUT_PORT, read when the channel is opened (a station's game learns it on activation)"""
+    return int(os.environ.get("TRAFFIC_INPUT_PORT", PORT))
+
+
+class LaneSender:
+    """Fire-and-forget sender used by the backends"""
+    def __init__(self, host=HOST, port=None):
+        self.addr = (host, port or channel_port())
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _send(self, payload):
+        try:
+            self.sock.sendto(payload, self.addr)
+        except OSError:
+            pass
+
+    def press(self, direction):
+        if direction in ("left", "right"):
+            self._send(direction.encode())
+
+    def steer(self, axis):
+        axis = max(-1.0, min(1.0, float(axis)))
+        self._send(f"axis {axis:.3f}".encode())
+
+
+class LaneReceiver:
+    """Non-blocking receiver polled once per game tick.
+
+    No SO_REUSEADDR: a second game on the same port would silently split the
+    datagrams with the first, so the bind fails with EADDRINUSE instead.
+    """
+    def __init__(self, host=HOST, port=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.sock.bind((host, port or channel_port()))
+        except OSError:
+            self.sock.close()
+            raise
+        self.sock.setblocking(False)
+
+    def poll(self):
+        """Drain pending datagrams -> list of ("lane", -1|1) or ("axis", float)"""
+        commands = []
+        while True:
+            try:
+                payload = self.sock.recv(64)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+            cmd = parse_command(payload)
+            if cmd:
+                commands.append(cmd)
+        return commands
+
+    def close(self):
+        self.sock.close()
+
+
+def parse_command(payload):
+    try:
+        text = payload.decode("ascii").strip().lower()
+    except UnicodeDecodeError:
+        return None
+    if text == "left":
+        return ("lane", -1)
+    if text == "right":
+        return ("lane", 1)
+    if text.startswith("axis "):
+        try:
+            value = float(text[5:])
+        except ValueError:
+            return None
+        return ("axis", max(-1.0, min(1.0, value)))
+    return None
@@ -1,12 +1,32 @@
+import errno
 import random
 import pygame
 import sys
 import os
-import subprocess
+import time
+from pathlib import Path
+
+from lanechannel import LaneReceiver, channel_port, parse_command
+from enemypool import EnemyPool
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from posturekit.ready import signal_ready, mark
+from posturekit.standby import park
+from posturekit.metrics import REGISTRY, start_exporter
 
 # -------- Config --------
 W, H = 480, 720
 FPS = 60
+STEP_MS = 1000 / FPS  # speeds below are px per 60 Hz frame, scaled by the real frame time
+MAX_DT_MS = 100       # a longer stall is not caught up, the game pauses instead
+MAX_STEPS = 5         # fixed-step mode: most steps run for one rendered frame
+
+# TRAFFIC_FIXED_STEP=1 runs the game in fixed STEP_MS steps (accumulator +
+# interpolated drawing, recordings replay exactly); default is one step of
+# the measured frame time per frame
+FIXED_STEP = os.environ.get("TRAFFIC_FIXED_STEP", "0") == "1"
+# TRAFFIC_PACING_REPORT=<s> prints frame pacing / jitter every <s> seconds
+PACING_REPORT_S = float(os.environ.get("TRAFFIC_PACING_REPORT", "0"))
 
 LANES = 3
 LANE_W = W // LANES
@@ -19,6 +39,21 @@ SPEED_UP_PER_10S = 0.8
 SPAWN_MS_START = 1000
 SPAWN_MS_MIN = 900
 
+SCREEN_RECT = pygame.Rect(0, 0, W, H)
+HUD_RECT = pygame.Rect(12, 12, W - 24, 72)
+DASH_PERIOD = 40
+# the only background columns that change when the road scrolls
+DIVIDER_RECTS = [pygame.Rect(i * LANE_W - 3, 0, 6, H) for i in range(1, LANES)]
+
+ENEMY_COLORS = [(255, 90, 90), (90, 255, 140), (90, 150, 255), (255, 210, 90)]
+
+# TRAFFIC_STRESS=<n> keeps n enemies alive on a long track above the screen,
+# collisions are tested but never end the run, frame times are printed
+STRESS = int(os.environ.get("TRAFFIC_STRESS", "0"))
+
+# posted by the lane channel poll, handled like a key press
+LANE_EVENT = pygame.USEREVENT + 1
+
 
 def lane_center_x(lane_idx: int) -> int:
     return lane_idx * LANE_W + LANE_W // 2
@@ -28,30 +63,53 @@ def clamp(v, lo, hi):
     return max(lo, min(hi, v))
 
 
-class Car:
-    def __init__(self, lane, y, color):
-        self.lane = lane
-        self.x = lane_center_x(lane) - ENEMY_W // 2
-        self.y = y
-        self.rect = pygame.Rect(self.x, self.y, ENEMY_W, ENEMY_H)
-        self.color = color
+# -------- Cached surfaces (built after set_mode so they match the display format) --------
+def build_road():
+    """Road with lane dashes, one dash period taller than the screen so it can scroll"""
+    road = pygame.Surface((W, H + DASH_PERIOD)).convert()
+    road.fill((35, 35, 40))
+    for i in range(1, LANES):
+        x = i * LANE_W
+        for y in range(0, H + DASH_PERIOD, DASH_PERIOD):
+            pygame.draw.rect(road, (210, 210, 210), (x - 3, y, 6, 22), border_radius=3)
+    return road
+
+
+def blit_road(screen, road, rect, scroll):
+    """Restore the background under rect for the current scroll offset"""
+    screen.blit(road, rect, rect.move(0, DASH_PERIOD - scroll))
+
+
+_sprites = {}
+
+
+def car_sprite(color, window=(230, 230, 255), size=(ENEMY_W, ENEMY_H)):
+    key = (color, window, size)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        sprite = pygame.Surface(size, pygame.SRCALPHA)
+        body = sprite.get_rect()
+        pygame.draw.rect(sprite, color, body, border_radius=10)
+        pygame.draw.rect(sprite, window, body.inflate(-25, -55).move(0, -15), border_radius=8)
+        sprite = _sprites[key] = sprite.convert_alpha()
+    return sprite
 
-    def update(self, speed):
-        self.y += speed
-        self.rect.y = int(self.y)
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, self.rect, border_radius=10)
-        pygame.draw.rect(
-            screen,
-            (230, 230, 255),
-            self.rect.inflate(-25, -55).move(0, -15),
-            border_radius=8,
-        )
+ENEMY_X = [lane_center_x(lane) - ENEMY_W // 2 for lane in range(LANES)]
+
+
+def lanes_under(rect):
+    """Lane buckets whose enemy column overlaps rect horizontally"""
+    return [lane for lane, x in enumerate(ENEMY_X) if x < rect.right and x + ENEMY_W > rect.left]
+
+
+def speed_frac(speed):
+    max_speed = BASE_SPEED + 10
+    return clamp((speed - BASE_SPEED) / (max_speed - BASE_SPEED), 0.0, 1.0)
 
 
 def draw_hud(screen, score, best, speed):
-    hud_rect = pygame.Rect(12, 12, W - 24, 72)
+    hud_rect = HUD_RECT
     pygame.draw.rect(screen, (0, 0, 0), hud_rect, border_radius=14)
     pygame.draw.rect(screen, (255, 255, 255), hud_rect, width=2, border_radius=14)
 
@@ -66,8 +124,7 @@ def draw_hud(screen, score, best, speed):
         x = 24 + int((W - 48) * frac_best)
         pygame.draw.line(screen, (255, 210, 90), (x, 24), (x, 44), width=3)
 
-    max_speed = BASE_SPEED + 10
-    frac_speed = clamp((speed - BASE_SPEED) / (max_speed - BASE_SPEED), 0.0, 1.0)
+    frac_speed = speed_frac(speed)
     pygame.draw.rect(screen, (255, 255, 255), pygame.Rect(24, 54, W - 48, 14), width=2, border_radius=8)
     bar2 = pygame.Rect(24, 54, int((W - 48) * frac_speed), 14)
     pygame.draw.rect(screen, (255, 255, 255), bar2, border_radius=8)
@@ -78,11 +135,31 @@ def draw_hud(screen, score, best, speed):
         pygame.draw.line(screen, (180, 180, 180), (tx, 54), (tx, 68), 1)
 
 
-def draw_game_over(screen):
+class HudCache:
+    """draw_hud on a transparent layer, re-rendered only when what it shows changes"""
+    def __init__(self):
+        self.layer = pygame.Surface((W, HUD_RECT.bottom), pygame.SRCALPHA)
+        self.key = None
+
+    def update(self, score, best, speed):
+        # the speed bar only moves when it gains a whole pixel
+        key = (score, best, int((W - 48) * speed_frac(speed)))
+        if key == self.key:
+            return False
+        self.key = key
+        self.layer.fill((0, 0, 0, 0))
+        draw_hud(self.layer, score, best, speed)
+        return True
+
+
+def build_game_over():
     overlay = pygame.Surface((W, H), pygame.SRCALPHA)
     overlay.fill((0, 0, 0, 170))
-    screen.blit(overlay, (0, 0))
+    draw_game_over(overlay)
+    return overlay
 
+
+def draw_game_over(screen):
     cx, cy = W // 2, H // 2
     size = 70
     pygame.draw.line(screen, (255, 255, 255), (cx - size, cy - size), (cx + size, cy + size), 10)
@@ -94,134 +171,404 @@ def draw_game_over(screen):
     pygame.draw.line(screen, (255, 255, 255), (rx + 18, ry + 18), (rx + 32, ry + 38), 6)
 
 
+# -------- Inputs --------
+# One vocabulary for keys, the lane channel, recordings and scripted runs:
+# ("lane", -1|1), ("axis", float) and ("restart", None).
+KEY_COMMANDS = {
+    pygame.K_LEFT: ("lane", -1), pygame.K_a: ("lane", -1),
+    pygame.K_RIGHT: ("lane", 1), pygame.K_d: ("lane", 1),
+    pygame.K_r: ("restart", None),
+}
+
+
+def format_command(kind, value):
+    if kind == "lane":
+        return "left" if value < 0 else "right"
+    if kind == "axis":
+        return f"axis {value:.3f}"
+    return kind
+
+
+def parse_input_line(line):
+    """'<frame> <command>' -> (frame, kind, value), None for blanks and comments"""
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return None
+    frame, text = line.split(None, 1)
+    if text.strip().lower() == "restart":
+        return int(frame), "restart", None
+    cmd = parse_command(text.encode())
+    if cmd is None:
+        raise ValueError(f"bad input line: {line!r}")
+    return (int(frame),) + cmd
+
+
+def read_inputs(path):
+    """Input script / recording -> (seed or None, {frame: [(kind, value), ...]})"""
+    seed, inputs = None, {}
+    with open(path) as f:
+        for line in f:
+            if line.startswith("# seed "):
+                seed = int(line.split()[2])
+                continue
+            parsed = parse_input_line(line)
+            if parsed:
+                frame, kind, value = parsed
+                inputs.setdefault(frame, []).append((kind, value))
+    return seed, inputs
+
+
+class InputRecorder:
+    """Writes applied inputs in the format read_inputs() replays"""
+    def __init__(self, path, seed):
+        self.f = open(path, "w")
+        self.f.write(f"# seed {seed}\n")
+
+    def write(self, frame, kind, value):
+        self.f.write(f"{frame} {format_command(kind, value)}\n")
+
+    def close(self):
+        self.f.close()
+
+
+# -------- Game --------
+class TrafficGame:
+    """Game state and rules, advanced by update(dt_ms); main() feeds it measured
+    frame times or fixed steps, trafficsim.py fixed (or scripted) steps"""
+    def __init__(self, rng=None, stress=STRESS):
+        self.rng = rng or random.Random()
+        self.stress = stress
+        self.enemies = EnemyPool(LANES)
+        self.player = pygame.Rect(lane_center_x(1) - PLAYER_W // 2, H - 140, PLAYER_W, PLAYER_H)
+        self.best = 0
+        self.round = 0
+        self.hits = 0       # collisions while in stress mode
+        self.road_y = 0.0   # distance scrolled, drives the lane dashes
+        self.now = 0.0      # game time, ms
+        self.steps = 0      # updates so far, recordings are keyed by this
+        self.reset()
+
+    def reset(self):
+        now = self.now
+        self.player_lane = 1
+        self.steer_axis = None  # set by continuous "axis" commands, None = snap to lanes
+        self.player_x = self.prev_player_x = float(lane_center_x(self.player_lane) - PLAYER_W // 2)
+        self.player.x = int(self.player_x)
+        self.last_dy = 0.0  # how far the traffic moved in the last update, for interpolation
+        self.enemies.clear()
+        self.score = 0
+        self.speed = BASE_SPEED
+        self.spawn_ms = SPAWN_MS_START
+        self.game_over = False
+        self.start_ms = now
+        self.next_spawn_ms = now + SPAWN_MS_START
+        self.round += 1
+
+    def command(self, kind, value):
+        if kind == "restart":
+            if self.game_over:
+                self.reset()
+        elif self.game_over:
+            return
+        elif kind == "lane":
+            self.player_lane = clamp(self.player_lane + value, 0, LANES - 1)
+            self.steer_axis = None
+        elif kind == "axis":
+            self.steer_axis = value
+            self.player_lane = clamp(round(1 + value), 0, LANES - 1)
+
+    def spawn_enemy(self, y=-ENEMY_H - 20):
+        self.enemies.spawn(self.rng.randrange(LANES), y, self.rng.randrange(len(ENEMY_COLORS)))
+
+    def fill_stress(self):
+        track = self.stress // LANES * ENEMY_H * 2
+        while self.enemies.count < self.stress:
+            self.spawn_enemy(y=self.rng.uniform(-track, -ENEMY_H))
+
+    def update(self, dt_ms):
+        """Advance the game by dt_ms; movement is scaled so speed is per 60 Hz frame"""
+        self.steps += 1
+        self.now += dt_ms
+        self.prev_player_x = self.player_x
+        self.last_dy = 0.0
+        if self.game_over:
+            return
+        now = self.now
+        frames = dt_ms / STEP_MS
+        elapsed_s = (now - self.start_ms) / 1000.0
+
+        # difficulty ramp
+        self.speed = BASE_SPEED + (elapsed_s / 10.0) * SPEED_UP_PER_10S
+        self.spawn_ms = max(SPAWN_MS_MIN, int(SPAWN_MS_START - elapsed_s * 20))
+
+        # spawn traffic reliably
+        if now >= self.next_spawn_ms:
+            self.spawn_enemy()
+            self.next_spawn_ms = now + self.spawn_ms
+
+        # smooth lane move, 25% of the remaining distance per 60 Hz frame
+        if self.steer_axis is None:
+            target_x = lane_center_x(self.player_lane) - PLAYER_W // 2
+        else:
+            target_x = int(W / 2 + self.steer_axis * LANE_W) - PLAYER_W // 2
+        self.player_x += (target_x - self.player_x) * (1 - 0.75 ** frames)
+        self.player.x = round(self.player_x)
+
+        dy = self.speed * frames
+        self.last_dy = dy
+        self.road_y += dy
+
+        # update enemies, remove passed ones and add score
+        self.score += self.enemies.advance(dy, H + 40)
+        if self.stress:
+            self.fill_stress()
+
+        # collision, only against the lane(s) the player is in
+        player = self.player
+        if self.enemies.hits(lanes_under(player), player.top, player.bottom, ENEMY_H):
+            if self.stress:
+                self.hits += 1
+            else:
+                self.game_over = True
+                self.best = max(self.best, self.score)
+
+
+class FramePacing:
+    """Intervals between presented frames; jitter = spread around the target"""
+    def __init__(self, target_ms=1000 / FPS):
+        self.target_ms = target_ms
+        self.intervals = []
+        self.dropped = 0  # fixed-step backlog thrown away after a stall
+        self.last = None
+
+    def tick(self, t):
+        interval = None if self.last is None else (t - self.last) * 1000
+        if interval is not None:
+            self.intervals.append(interval)
+        self.last = t
+        return interval
+
+    def report(self):
+        """Summary since the last report, then start a new window"""
+        values, self.intervals = sorted(self.intervals), []
+        dropped, self.dropped = self.dropped, 0
+        if len(values) < 2:
+            return None
+        mean = sum(values) / len(values)
+        return {
+            "frames": len(values),
+            "mean_ms": mean,
+            "jitter_ms": (sum((v - mean) ** 2 for v in values) / len(values)) ** 0.5,
+            "p99_ms": values[int(len(values) * 0.99) - 1],
+            "late": sum(v > self.target_ms * 1.5 for v in values),
+            "dropped_steps": dropped,
+        }
+
+
+# -------- Draw --------
+class Renderer:
+    """Draws a TrafficGame from cached surfaces, pushing only dirty rects"""
+    def __init__(self, screen):
+        self.screen = screen
+        self.road = build_road()
+        self.player_sprite = car_sprite((255, 255, 255), (210, 240, 255), (PLAYER_W, PLAYER_H))
+        self.enemy_sprites = [car_sprite(color) for color in ENEMY_COLORS]
+        self.hud = HudCache()
+        self.game_over_layer = build_game_over()
+        self.full_redraw = True  # first frame, game over, reset, window exposed
+        self.shown = None        # (round, game_over) of the last drawn frame
+        self.prev_rects = []     # sprite rects drawn last frame, restored this frame
+        self.prev_scroll = None
+
+    def draw(self, game, alpha=1.0):
+        """Draw one frame, return what present() should push (None = everything).
+        alpha < 1 draws that far between the previous and the current update."""
+        screen, road, hud = self.screen, self.road, self.hud
+        if (game.round, game.game_over) != self.shown:
+            self.shown = (game.round, game.game_over)
+            self.full_redraw = True
+
+        back = (1.0 - alpha) * game.last_dy
+        scroll = int(game.road_y - back) % DASH_PERIOD
+        player = game.player.copy()
+        player.x = round(game.prev_player_x + (game.player_x - game.prev_player_x) * alpha)
+        sprites = [(self.player_sprite, player)]
+        for lane, y, color in zip(*game.enemies.visible(0, H, ENEMY_H, offset=-back)):
+            sprites.append((self.enemy_sprites[color], pygame.Rect(ENEMY_X[lane], y, ENEMY_W, ENEMY_H)))
+        rects = [r for _, r in sprites]
+
+        dirty = []
+        if self.full_redraw:
+            blit_road(screen, road, SCREEN_RECT, scroll)
+            for sprite, r in sprites:
+                screen.blit(sprite, r)
+            hud.update(game.score, game.best, game.speed)
+            screen.blit(hud.layer, (0, 0))
+            if game.game_over:
+                screen.blit(self.game_over_layer, (0, 0))
+            self.full_redraw = False
+            dirty = None
+        elif not game.game_over:
+            # the frozen game over screen needs no updates at all
+            dirty = self.prev_rects + rects
+            if scroll != self.prev_scroll:
+                dirty += DIVIDER_RECTS
+            dirty = [r.clip(SCREEN_RECT) for r in dirty]
+            dirty = [r for r in dirty if r.width and r.height]
+            for r in dirty:
+                blit_road(screen, road, r, scroll)
+            for sprite, r in sprites:
+                screen.blit(sprite, r)
+            if hud.update(game.score, game.best, game.speed) or HUD_RECT.collidelist(dirty) != -1:
+                screen.blit(hud.layer, HUD_RECT, HUD_RECT)
+                dirty.append(HUD_RECT)
+        self.prev_rects = rects
+        self.prev_scroll = scroll
+        return dirty
+
+    def present(self, dirty):
+        if dirty is None:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+
+
 def main():
-    pygame.init()
-    pygame.display.set_caption("Traffic Escape (Fontless)")
-    screen = pygame.display.set_mode((W, H))
+    mark("imports")
+    park(warmup=pygame.init)
     pygame.init()
     pygame.display.set_caption("Traffic Escape (Fontless)")
     screen = pygame.display.set_mode((W, H))
     # Bring window to front on macOS when launched from another process
-    try:
-        pid = os.getpid()
-        subprocess.run(
-            ["osascript", "-e", f'tell application "System Events" to set frontmost of first process whose unix id is {pid} to true'],
-            check=False, capture_output=True, timeout=1
-        )
-    except Exception:
-        pass
+    if sys.platform == "darwin":
+        import subprocess
+        try:
+            pid = os.getpid()
+            subprocess.run(
+                ["osascript", "-e", f'tell application "System Events" to set frontmost of first process whose unix id is {pid} to true'],
+                check=False, capture_output=True, timeout=1
+            )
+        except Exception:
+            pass
     clock = pygame.time.Clock()
+    renderer = Renderer(screen)
+
+    # TRAFFIC_SEED fixes the traffic, TRAFFIC_RECORD=<path> saves the inputs for trafficsim.py
+    seed = int(os.environ.get("TRAFFIC_SEED") or random.randrange(1 << 31))
+    game = TrafficGame(random.Random(seed))
+    recorder = InputRecorder(os.environ["TRAFFIC_RECORD"], seed) if os.environ.get("TRAFFIC_RECORD") else None
 
-    player_lane = 1
-    player_y = H - 140
-    player = pygame.Rect(lane_center_x(player_lane) - PLAYER_W // 2, player_y, PLAYER_W, PLAYER_H)
-
-    enemies = []
-    score = 0
-    best = 0
-    game_over = False
-
-    speed = BASE_SPEED
-    spawn_ms = SPAWN_MS_START
-    start_ticks = pygame.time.get_ticks()
-    next_spawn_time = pygame.time.get_ticks() + SPAWN_MS_START
-
-    def spawn_enemy():
-        lane = random.randrange(LANES)
-        color = random.choice([(255, 90, 90), (90, 255, 140), (90, 150, 255), (255, 210, 90)])
-        enemies.append(Car(lane, y=-ENEMY_H - 20, color=color))
-
-    def reset():
-        nonlocal player_lane, enemies, score, speed, spawn_ms, game_over, start_ticks, next_spawn_time
-        player_lane = 1
-        player.x = lane_center_x(player_lane) - PLAYER_W // 2
-        enemies = []
-        score = 0
-        speed = BASE_SPEED
-        spawn_ms = SPAWN_MS_START
-        game_over = False
-        start_ticks = pygame.time.get_ticks()
-        next_spawn_time = pygame.time.get_ticks() + SPAWN_MS_START
+    try:
+        lane_input = LaneReceiver()
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            # another game owns this station's lane port, it would get half our input
+            raise SystemExit(f"lane channel port {channel_port()} is already in use by another game")
+        print(f"lane channel unavailable ({e}), keyboard only")
+        lane_input = None
+    signal_ready()
+
+    frames_rendered = REGISTRY.counter("posturebot_game_frames_total", "Frames rendered by the game")
+    frame_work_ms = REGISTRY.histogram("posturebot_game_frame_ms", "Update + draw + flip time per frame")
+    lane_commands = REGISTRY.counter("posturebot_game_lane_commands_total", "Commands received on the lane channel")
+    start_exporter("trafficgame")
+
+    frame_interval_ms = REGISTRY.histogram("posturebot_game_frame_interval_ms", "Time between presented frames",
+                                           buckets=(8, 12, 15, 16, 17, 18, 20, 25, 33, 50, 100, 200))
+    pacing = FramePacing()
+    last_pacing_report = time.perf_counter()
+    stress_window = {"frames": 0, "update_ms": 0.0, "frame_ms": 0.0, "hits": game.hits, "since": time.perf_counter()}
 
     running = True
+    first_frame = True
+    last_t = time.perf_counter()
+    backlog_ms = 0.0  # fixed-step accumulator
     while running:
         clock.tick(FPS)
+        t_frame = time.perf_counter()
+        dt_ms = min((t_frame - last_t) * 1000, MAX_DT_MS)
+        last_t = t_frame
 
+        if lane_input is not None:
+            for kind, value in lane_input.poll():
+                lane_commands.inc()
+                pygame.event.post(pygame.event.Event(LANE_EVENT, kind=kind, value=value))
+
+        inputs = []
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.full_redraw = True
+
+            if event.type == LANE_EVENT:
+                inputs.append((event.kind, event.value))
+
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
-
-                if not game_over:
-                    if event.key in (pygame.K_LEFT, pygame.K_a):
-                        player_lane = clamp(player_lane - 1, 0, LANES - 1)
-                    if event.key in (pygame.K_RIGHT, pygame.K_d):
-                        player_lane = clamp(player_lane + 1, 0, LANES - 1)
-                else:
-                    if event.key == pygame.K_r:
-                        reset()
-
-        if not game_over:
-            now = pygame.time.get_ticks()
-            elapsed_s = (now - start_ticks) / 1000.0
-
-            # difficulty ramp
-            speed = BASE_SPEED + (elapsed_s / 10.0) * SPEED_UP_PER_10S
-            spawn_ms = max(SPAWN_MS_MIN, int(SPAWN_MS_START - elapsed_s * 20))
-
-            # spawn traffic reliably
-            if now >= next_spawn_time:
-                spawn_enemy()
-                next_spawn_time = now + spawn_ms
-
-            # smooth lane move
-            target_x = lane_center_x(player_lane) - PLAYER_W // 2
-            player.x += int((target_x - player.x) * 0.25)
-
-            # update enemies
-            for e in enemies:
-                e.update(speed)
-
-            # remove passed enemies, add score
-            before = len(enemies)
-            enemies = [e for e in enemies if e.rect.top < H + 40]
-            score += (before - len(enemies))
-
-            # collision
-            for e in enemies:
-                if player.colliderect(e.rect):
-                    game_over = True
-                    best = max(best, score)
-                    break
-
-        # -------- Draw --------
-        screen.fill((20, 20, 24))
-        pygame.draw.rect(screen, (35, 35, 40), (0, 0, W, H))
-
-        for i in range(1, LANES):
-            x = i * LANE_W
-            for y in range(0, H, 40):
-                pygame.draw.rect(screen, (210, 210, 210), (x - 3, y, 6, 22), border_radius=3)
-
-        pygame.draw.rect(screen, (255, 255, 255), player, border_radius=10)
-        pygame.draw.rect(screen, (210, 240, 255), player.inflate(-25, -55).move(0, -15), border_radius=8)
-
-        for e in enemies:
-            e.draw(screen)
-
-        draw_hud(screen, score, best, speed)
-
-        if game_over:
-            draw_game_over(screen)
-
-        pygame.display.flip()
-
+                elif event.key in KEY_COMMANDS:
+                    inputs.append(KEY_COMMANDS[event.key])
+
+        for kind, value in inputs:
+            game.command(kind, value)
+            if recorder:
+                recorder.write(game.steps, kind, value)
+
+        t_update = time.perf_counter()
+        if FIXED_STEP:
+            backlog_ms += dt_ms
+            steps = 0
+            while backlog_ms >= STEP_MS and steps < MAX_STEPS:
+                game.update(STEP_MS)
+                backlog_ms -= STEP_MS
+                steps += 1
+            if backlog_ms >= STEP_MS:
+                pacing.dropped += int(backlog_ms // STEP_MS)
+                backlog_ms %= STEP_MS
+            alpha = backlog_ms / STEP_MS
+        else:
+            game.update(dt_ms)
+            alpha = 1.0
+        update_ms = (time.perf_counter() - t_update) * 1000
+
+        renderer.present(renderer.draw(game, alpha))
+
+        interval = pacing.tick(time.perf_counter())
+        if interval is not None:
+            frame_interval_ms.observe(interval)
+        if PACING_REPORT_S and time.perf_counter() - last_pacing_report >= PACING_REPORT_S:
+            p = pacing.report()
+            if p:
+                print(f"pacing: {p['frames']} frames, mean {p['mean_ms']:.2f} ms, jitter {p['jitter_ms']:.2f} ms, "
+                      f"p99 {p['p99_ms']:.2f} ms, {p['late']} late, {p['dropped_steps']} steps dropped")
+            last_pacing_report = time.perf_counter()
+
+        frames_rendered.inc()
+        frame_ms = (time.perf_counter() - t_frame) * 1000
+        frame_work_ms.observe(frame_ms)
+        if game.stress:
+            w = stress_window
+            w["frames"] += 1
+            w["update_ms"] += update_ms
+            w["frame_ms"] += frame_ms
+            if time.perf_counter() - w["since"] >= 5.0:
+                print(f"stress: {game.enemies.count} enemies ({game.enemies.capacity * LANES} slots), "
+                      f"update {w['update_ms'] / w['frames']:.3f} ms, frame {w['frame_ms'] / w['frames']:.2f} ms, "
+                      f"{game.hits - w['hits']} hits")
+                w.update(frames=0, update_ms=0.0, frame_ms=0.0, hits=game.hits, since=time.perf_counter())
+        if first_frame:
+            mark("first_frame")
+            first_frame = False
+
+    if recorder:
+        recorder.close()
+    if lane_input is not None:
+        lane_input.close()
     pygame.quit()
     sys.exit()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
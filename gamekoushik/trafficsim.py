@@ -0,0 +1,165 @@
+"""Headless, deterministic runs of trafficgame.
+
+Runs TrafficGame on SDL's dummy video driver with a fixed timestep (every
+update advances STEP_MS of game time), a seeded RNG and scripted inputs, so
+the same seed and inputs replay the same game frame for frame. --stall
+feeds seeded long frames instead, to check that game speed does not depend
+on the frame rate.
+Frames run back to back, as fast as the machine allows; the report has the
+simulated FPS, update / draw / flip timings and a digest of the game state
+over the whole run (identical digests = identical replays).
+
+    python gamekoushik/trafficsim.py --seed 7 --frames 3600 --autopilot
+    python gamekoushik/trafficsim.py --seed 7 --autopilot --record run.txt
+    python gamekoushik/trafficsim.py --script run.txt --expect <digest>
+    python gamekoushik/trafficsim.py --seed 7 --no-draw --stall 0.2
+
+Input files hold "# seed <n>" and one "<frame> left|right|axis <x>|restart"
+per line; the game writes the same format with TRAFFIC_RECORD=<path> (and
+replays exactly when it ran with TRAFFIC_FIXED_STEP=1).
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import zlib
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from trafficgame import (
+    ENEMY_H, H, LANES, STEP_MS, W, InputRecorder, Renderer, TrafficGame, read_inputs,
+)
+
+PHASES = ("update", "draw", "flip")
+
+
+def autopilot(game, lookahead=260):
+    """A simple driver: restart after a crash, change lane when a car is close ahead"""
+    if game.game_over:
+        return [("restart", None)]
+    pool, player = game.enemies, game.player
+
+    def gap(lane):
+        ahead = pool.alive[lane] & (pool.y[lane] < player.bottom)
+        if not ahead.any():
+            return float("inf")
+        return player.top - (float(pool.y[lane][ahead].max()) + ENEMY_H)
+
+    lane = game.player_lane
+    here = gap(lane)
+    if here > lookahead:
+        return []
+    options = [l for l in (lane - 1, lane + 1) if 0 <= l < LANES]
+    best = max(options, key=gap)
+    return [("lane", best - lane)] if gap(best) > here else []
+
+
+def simulate(frames, seed, inputs=None, drive=False, draw=True, stress=0, recorder=None, stall=0.0):
+    pygame.display.init()
+    screen = pygame.display.set_mode((W, H))
+    game = TrafficGame(random.Random(seed), stress=stress)
+    renderer = Renderer(screen) if draw else None
+    inputs = inputs or {}
+    stalls = random.Random(seed + 1)  # a stalled frame takes 3 steps of time
+
+    timings = {phase: [] for phase in PHASES}
+    digest = 0
+    crashes = 0
+    t_start = time.perf_counter()
+    for frame in range(frames):
+        dt_ms = STEP_MS * 3 if stall and stalls.random() < stall else STEP_MS
+        t0 = time.perf_counter()
+        commands = inputs.get(frame, []) + (autopilot(game) if drive else [])
+        for kind, value in commands:
+            game.command(kind, value)
+            if recorder:
+                recorder.write(frame, kind, value)
+        was_over = game.game_over
+        game.update(dt_ms)
+        crashes += game.game_over and not was_over
+        t1 = time.perf_counter()
+        timings["update"].append((t1 - t0) * 1000)
+
+        if renderer:
+            dirty = renderer.draw(game)
+            t2 = time.perf_counter()
+            renderer.present(dirty)
+            timings["draw"].append((t2 - t1) * 1000)
+            timings["flip"].append((time.perf_counter() - t2) * 1000)
+
+        state = f"{game.score},{game.player.x},{game.enemies.count},{game.game_over},{game.hits},{game.road_y:.3f}"
+        digest = zlib.crc32(state.encode(), digest)
+    wall_s = time.perf_counter() - t_start
+    pygame.display.quit()
+
+    return {
+        "frames": frames,
+        "seed": seed,
+        "game_s": round(game.now / 1000, 3),
+        "distance": round(game.road_y),
+        "wall_s": round(wall_s, 3),
+        "sim_fps": round(frames / wall_s, 1),
+        "realtime_x": round(game.now / 1000 / wall_s, 1),
+        "phases": {phase: summarize(values) for phase, values in timings.items() if values},
+        "score": game.score,
+        "best": max(game.best, game.score),
+        "crashes": crashes,
+        "rounds": game.round,
+        "digest": f"{digest:08x}",
+    }
+
+
+def summarize(values):
+    p95 = statistics.quantiles(values, n=20)[18] if len(values) > 1 else values[0]
+    return {"mean_ms": round(statistics.fmean(values), 4), "p95_ms": round(p95, 4),
+            "max_ms": round(max(values), 4)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--frames", type=int, default=3600)
+    ap.add_argument("--seed", type=int, help="default: the script's seed, else 0")
+    ap.add_argument("--script", help="inputs to replay")
+    ap.add_argument("--autopilot", action="store_true", help="dodge traffic and restart after crashes")
+    ap.add_argument("--record", help="write the applied inputs here")
+    ap.add_argument("--no-draw", action="store_true", help="update only")
+    ap.add_argument("--stress", type=int, default=0, help="keep this many enemies alive")
+    ap.add_argument("--stall", type=float, default=0.0, help="fraction of frames that take 3x as long")
+    ap.add_argument("--expect", help="exit 1 unless the run ends with this digest")
+    ap.add_argument("--json", help="write the report here")
+    args = ap.parse_args()
+
+    script_seed, inputs = read_inputs(args.script) if args.script else (None, {})
+    seed = args.seed if args.seed is not None else (script_seed or 0)
+    recorder = InputRecorder(args.record, seed) if args.record else None
+    try:
+        report = simulate(args.frames, seed, inputs, drive=args.autopilot, draw=not args.no_draw,
+                          stress=args.stress, recorder=recorder, stall=args.stall)
+    finally:
+        if recorder:
+            recorder.close()
+
+    print(f"{report['frames']} frames ({report['game_s']:.1f} s of game time) in {report['wall_s']:.2f} s "
+          f"-> {report['sim_fps']:.0f} sim FPS ({report['realtime_x']:.1f}x real time)")
+    for phase, s in report["phases"].items():
+        print(f"  {phase:6s} mean {s['mean_ms']:.3f} ms  p95 {s['p95_ms']:.3f} ms  max {s['max_ms']:.3f} ms")
+    print(f"distance {report['distance']} px, score {report['score']}, best {report['best']}, crashes {report['crashes']}, "
+          f"rounds {report['rounds']}, digest {report['digest']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.expect and args.expect != report["digest"]:
+        print(f"digest mismatch: expected {args.expect}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+from fastapi import FastAPI
+from starlette.responses import JSONResponse
+
+# Production host: one ASGI process serves the orchestrator, the Traffic Rush
+# posture backend and the Tilt Master quiz backend under prefixes.
+#   uvicorn hostbackend:api --port 2301
+# Camera scripts and games are still supervised children; they find the
+# backends through the POSTUREBOT_*_URL variables set below.
+
+HOST_URL = os.environ.get("POSTUREBOT_HOST_URL", "http://127.0.0.1:2301")
+os.environ.setdefault("POSTUREBOT_HUB_URL", HOST_URL)
+os.environ.setdefault("POSTUREBOT_TRAFFIC_URL", f"{HOST_URL}/traffic")
+os.environ.setdefault("POSTUREBOT_QUIZ_URL", f"{HOST_URL}/quiz")
+
+import neazbackend
+import koushikbackend
+import ishayatbackend
+
+
+class BackendGate:
+    """Mounted backend that answers 503 until the orchestrator enables it"""
+    def __init__(self, app, reset):
+        self.app = app
+        self.reset = reset
+        self.enabled = False
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not self.enabled:
+            await JSONResponse({"detail": "backend not enabled"}, status_code=503)(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+traffic = BackendGate(koushikbackend.api, koushikbackend.reset_state)
+quiz = BackendGate(ishayatbackend.api, ishayatbackend.reset_state)
+neazbackend.COMPONENT = "hostbackend"
+neazbackend.INPROCESS["koushikbackend"] = traffic
+neazbackend.INPROCESS["ishayatbackend"] = quiz
+
+api = FastAPI()
+api.mount("/traffic", traffic)
+api.mount("/quiz", quiz)
+api.mount("/", neazbackend.api)
+
+# lifespan events of mounted apps don't run on their own
+@api.on_event("startup")
+def startup():
+    neazbackend.startup()
+
+@api.on_event("shutdown")
+def shutdown():
+    neazbackend.shutdown()
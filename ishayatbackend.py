@@ -4,8 +4,11 @@ from pydantic import BaseModel
 import time
 import random
 import requests
+from posturekit.metrics import install_http_metrics, start_exporter
 
 api = FastAPI()
+install_http_metrics(api, "ishayatbackend")
+start_exporter("ishayatbackend")
 
 api.add_middleware(
     CORSMiddleware,
@@ -304,6 +307,13 @@ game_state = {
     "best_streak": 0
 }
 
+def reset_state():
+    """Fresh quiz + tilt state (used when the host re-enables the quiz in-process)"""
+    global current_tilt
+    current_tilt = TiltData(selection="NEUTRAL", angle=0, hold_time=0, ready=False, confidence=0)
+    game_state.update(active=False, mode="random", current_question=None, question_start_time=None,
+                      score=0, total_questions=0, correct_answers=0, streak=0, best_streak=0)
+
 # ===== GAME ENDPOINTS =====
 
 @api.post("/game/start")
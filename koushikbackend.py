@@ -1,14 +1,29 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import subprocess
-import pyautogui
+import os
 import time
-import requests
 import random
+import threading
+from gamekoushik.lanechannel import LaneSender
+from posturekit.metrics import install_http_metrics, start_exporter
+from posturekit.tuning import Tuning
 
 api = FastAPI()
+install_http_metrics(api, "koushikbackend")
+start_exporter("koushikbackend")
 
-API_URL = "http://127.0.0.1:2301/game"
+API_URL = os.environ.get("POSTUREBOT_HUB_URL", "http://127.0.0.1:2301") + "/game"
+# escalation switches the game on the station that launched us
+STATION = os.environ.get("POSTUREBOT_STATION", "default")
+# the hub answers once the game is ready, which the supervisor allows 30 s for
+ESCALATE_TIMEOUT_S = 40.0
+
+# "socket" drives trafficgame over its local lane channel (no focus/display needed),
+# "keys" falls back to synthetic key presses through pyautogui
+INPUT_MODE = os.environ.get("TRAFFIC_INPUT_MODE", "socket")
+# "lanes" = discrete left/right presses, "axis" = continuous steering
+STEERING = os.environ.get("TRAFFIC_STEERING", "lanes")
+lane_sender = LaneSender()
 
 @api.get("/health")
 def root():
@@ -23,24 +38,46 @@ class posturedata(BaseModel):
     headtiltangle: float
     headdirection_left: bool
     headdirection_right: bool
+    steeringaxis: float = 0.0
+    # "sample" = raw per-frame post, otherwise an edge-aggregated event from
+    # posturemonitor: "transition", "heartbeat" or "sustained"
+    event: str = "sample"
+
+def reset_state():
+    global last_press_time
+    api.state.badposturetime = None
+    api.state.warning_sent = False
+    api.state.escalating = False
+    last_press_time = 0.0
+
+reset_state()
+# press_cooldown_s and bad_window_s, re-checked on each request (PUT /tuning on the hub)
+tuning = Tuning("koushikbackend")
 
-api.state.badposturetime = None
-api.state.warning_sent = False
-last_press_time = 0.0
-PRESS_COOLDOWN = 0.7
+def press(direction):
+    if INPUT_MODE == "keys":
+        import pyautogui
+        pyautogui.press(direction)
+    else:
+        lane_sender.press(direction)
 
 @api.post("/posturemetrics")
 def posture(data:posturedata):
     global last_press_time
     now = time.perf_counter()
+    tuning.poll()
+    cooldown = tuning["press_cooldown_s"]
     print("received: ", data.model_dump())
+    if STEERING == "axis" and INPUT_MODE != "keys":
+        lane_sender.steer(-data.steeringaxis)
+        return {"ok" : True}
     headdirection_leftrec = data.headdirection_left
     headdirection_rightrec = data.headdirection_right
-    if headdirection_leftrec and now - last_press_time > PRESS_COOLDOWN:
-        pyautogui.press("left")
+    if headdirection_leftrec and now - last_press_time > cooldown:
+        press("left")
         last_press_time = now
-    if headdirection_rightrec and now - last_press_time > PRESS_COOLDOWN:
-        pyautogui.press("right")
+    if headdirection_rightrec and now - last_press_time > cooldown:
+        press("right")
         last_press_time = now
     return {"ok" : True}
 
@@ -60,14 +97,32 @@ def consequence(data: posturedata):
 
         elapsedtime = now - api.state.badposturetime
 
-        if elapsedtime >= 5 and not api.state.warning_sent:
-            subprocess.Popen(["pkill", "-f", "posturemonitor.py"])
-            subprocess.Popen(["pkill", "-f", "koushikbackend.py"])
-            randomgame = random.randint(0,1)
-            try:
-                requests.post(API_URL, json={"game": str(randomgame)}, timeout=0.3)
-                api.state.warning_sent = True
-            except requests.exceptions.RequestException:
-                pass
-
-    return {"ok": True}
\ No newline at end of file
+        # aggregated streams are windowed at the edge, only "sustained" escalates
+        if data.event == "sample":
+            tuning.poll()
+            escalate = elapsedtime >= tuning["bad_window_s"]
+        else:
+            escalate = data.event == "sustained"
+
+        if escalate and not api.state.warning_sent and not api.state.escalating:
+            # the switch takes as long as the game needs to start, wait for it off the request
+            api.state.escalating = True
+            threading.Thread(target=send_escalation, args=(random.randint(0,1),), daemon=True).start()
+
+    return {"ok": True}
+
+def send_escalation(game):
+    """Ask the hub to switch this station to a game; counts as sent only on a 2xx"""
+    # neazbackend's supervisor stops posturemonitor (and us, if the game doesn't need us)
+    import requests  # only needed on escalation
+    try:
+        r = requests.post(API_URL, json={"game": game, "station": STATION}, timeout=ESCALATE_TIMEOUT_S)
+        if 200 <= r.status_code < 300:
+            api.state.warning_sent = True
+        else:
+            print(f"escalation failed: {r.status_code} {r.text[:200]}")
+    except requests.exceptions.RequestException as e:
+        print(f"escalation failed: {e}")
+    finally:
+        # without warning_sent the next bad sample tries again
+        api.state.escalating = False
\ No newline at end of file
@@ -1,9 +1,16 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import subprocess
+import os
 from pathlib import Path
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import time
+from posturekit.supervisor import Supervisor, ProcSpec, LaunchError, http_probe
+from posturekit.metrics import REGISTRY, install_http_metrics, render_prometheus
+from posturekit.procstats import process_usage
+from posturekit.resources import ResourceProfile
+from posturekit.stations import Stations, DEFAULT
+from posturekit import tuning
 
 api = FastAPI()
 
@@ -21,79 +28,261 @@ api.add_middleware(
     allow_headers=["*"],
 )
 
+# hostbackend renames this when everything runs in one process
+COMPONENT = "neazbackend"
+install_http_metrics(api, "neazbackend")
+
 @api.get("/health")
 def root():
     return  {
                 "health" : "ok"
             }
 
+ROOT = Path(__file__).resolve().parent
+PYTHON = ".venv/bin/python"
+UVICORN = ".venv/bin/uvicorn"
+
+TRAFFICGAME = ProcSpec("trafficgame", [PYTHON, "gamekoushik/trafficgame.py"])
+POSTURETEST = ProcSpec("posturetest_koushik", [PYTHON, "gamekoushik/posturetest_koushik.py"])
+KOUSHIKBACKEND = ProcSpec("koushikbackend", [UVICORN, "koushikbackend:api", "--port", "8000"],
+                          probe=http_probe("http://127.0.0.1:8000/health"))
+HEADTILT = ProcSpec("headtilt_game", [PYTHON, "gameishayat/headtilt_game.py"])
+ISHAYATBACKEND = ProcSpec("ishayatbackend", [UVICORN, "ishayatbackend:api", "--port", "7000"],
+                          probe=http_probe("http://127.0.0.1:7000/health"))
+POSTUREMONITOR = ProcSpec("posturemonitor", [PYTHON, "consequence/posturemonitor.py"])
+
+GAMES = {
+    0: [KOUSHIKBACKEND, TRAFFICGAME, POSTURETEST],
+    1: [ISHAYATBACKEND, HEADTILT],
+}
+POLICE = [KOUSHIKBACKEND, POSTUREMONITOR]
+
+def station_specs(station, specs):
+    """specs as launched for a station: its backend ports, its env on every child"""
+    if station.is_default:
+        return specs
+    env = station.env()
+    traffic, quiz = station.ports["traffic"], station.ports["quiz"]
+    out = []
+    for spec in specs:
+        if spec is KOUSHIKBACKEND:
+            spec = ProcSpec("koushikbackend", [UVICORN, "koushikbackend:api", "--port", str(traffic)],
+                            probe=http_probe(f"http://127.0.0.1:{traffic}/health"))
+        elif spec is ISHAYATBACKEND:
+            spec = ProcSpec("ishayatbackend", [UVICORN, "ishayatbackend:api", "--port", str(quiz)],
+                            probe=http_probe(f"http://127.0.0.1:{quiz}/health"))
+        out.append(ProcSpec(spec.name, spec.cmd, spec.probe, env))
+    return out
+
+# Resource profile per game mode: render loop on its own core, inference on
+# the middle cores with capped thread pools, services niced on the last one
+# (see posturekit.resources.core_roles)
+SERVICE = ResourceProfile(role="service", threads=1, nice=10)
+PROFILES = {
+    0: {
+        "trafficgame": ResourceProfile(role="render", threads=1),
+        "posturetest_koushik": ResourceProfile(role="inference", threads=2, nice=5),
+        "koushikbackend": SERVICE,
+    },
+    1: {
+        "headtilt_game": ResourceProfile(role="inference", threads=2),
+        "ishayatbackend": SERVICE,
+    },
+    "police": {
+        # all-day background monitoring stays out of the way of everything else
+        "posturemonitor": ResourceProfile(role="inference", threads=1, nice=15),
+        "koushikbackend": SERVICE,
+    },
+}
+
+# camera scripts and the game are kept pre-started (model loaded and warmed),
+# POSTUREBOT_STANDBY_POOL=0 turns the pool off. One pool serves every station,
+# a parked worker gets the station's env when it is activated.
+STANDBY = [HEADTILT, TRAFFICGAME, POSTURETEST, POSTUREMONITOR]
+pool = Supervisor(
+    cwd=ROOT,
+    standby=STANDBY if os.environ.get("POSTUREBOT_STANDBY_POOL", "1") == "1" else (),
+    standby_mb=float(os.environ.get("POSTUREBOT_STANDBY_MB", "1024")),
+    standby_profiles={name: p for mode in PROFILES.values() for name, p in mode.items()},
+)
+
+# Every kiosk is a station with its own Supervisor (own lock, own process
+# groups), camera and backend ports; see posturekit.stations
+stations = Stations(lambda roles: Supervisor(cwd=ROOT, pool=pool, roles=roles))
+
+# Backends served in-process by hostbackend (name -> gate with set_enabled),
+# enabling one is a state change instead of a process spawn. Only the default
+# station uses them, other stations get their own backend processes.
+INPROCESS = {}
+
+def set_inprocess(specs):
+    names = {s.name for s in specs}
+    for name, gate in INPROCESS.items():
+        gate.set_enabled(name in names)
+    return [s for s in specs if s.name not in INPROCESS]
+
+def get_station(station, camera=None):
+    try:
+        return stations.get(station, camera)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+def switch(station, specs, profiles):
+    station.supervisor.reap()
+    if station.is_default:
+        specs = set_inprocess(specs)
+    try:
+        result = station.supervisor.switch(station_specs(station, specs), profiles)
+    except LaunchError as e:
+        raise HTTPException(503, str(e))
+    print(station.id, result)
+    return {"ok" : True, **station.describe(), **result}
+
+def stop_station(station):
+    if station == DEFAULT:
+        set_inprocess([])
+    stations.release(station)
+
 class command(BaseModel):
     game: int
+    station: str = DEFAULT
+    camera: int = None
 
 @api.post("/game")
 def opengame(data:command):
     gamerec = data.game
-    if gamerec == 0:
-        subprocess.Popen(["pkill", "-f", "posturemonitor.py"])
-        subprocess.Popen(["pkill", "-f", "koushikbackend.py"])
-        subprocess.Popen(["pkill", "-f", "headtilt_game.py"])
-        subprocess.Popen(["pkill", "-f", "posturetest_koushik.py"])
-        subprocess.Popen(["pkill", "-f", "trafficgame.py"])
-        subprocess.Popen(["pkill", "-f", "ishayatbacked.py"])
-        time.sleep(1)
-        results1 = subprocess.Popen([".venv/bin/python", "gamekoushik/trafficgame.py"])
-        print(results1.stdout)
-        results2 = subprocess.Popen([".venv/bin/python", "gamekoushik/posturetest_koushik.py"])
-        print(results2.stdout)
-        results3 = subprocess.Popen([".venv/bin/uvicorn", "koushikbackend:api", "--reload"])
-        print(results3.stdout)
-    if gamerec == 1:
-        subprocess.Popen(["pkill", "-f", "posturemonitor.py"])
-        subprocess.Popen(["pkill", "-f", "koushikbackend.py"])
-        subprocess.Popen(["pkill", "-f", "headtilt_game.py"])
-        subprocess.Popen(["pkill", "-f", "posturetest_koushik.py"])
-        subprocess.Popen(["pkill", "-f", "trafficgame.py"])
-        subprocess.Popen(["pkill", "-f", "ishayatbacked.py"])
-        time.sleep(1)
-        results4 = subprocess.Popen([".venv/bin/python", "gameishayat/headtilt_game.py"])
-        print(results4.stdout)
-        results5 = subprocess.Popen([".venv/bin/uvicorn", "ishayatbackend:api", "--reload", "--port", "7000"])
-        print(results5.stdout)
-    return {"ok" : True}
+    if gamerec not in GAMES:
+        raise HTTPException(400, f"Unknown game {gamerec}")
+    return switch(get_station(data.station, data.camera), GAMES[gamerec], PROFILES[gamerec])
 
 
 class modecomm(BaseModel):
     mode: int
+    station: str = DEFAULT
+    camera: int = None
 
 @api.post("/mode")
-def opengame(data:modecomm):
+def openmode(data:modecomm):
     moderec = data.mode
     if moderec == 0:
-        subprocess.Popen(["pkill", "-f", "posturemonitor.py"])
-        subprocess.Popen(["pkill", "-f", "koushikbackend.py"])
-        subprocess.Popen(["pkill", "-f", "headtilt_game.py"])
-        subprocess.Popen(["pkill", "-f", "posturetest_koushik.py"])
-        subprocess.Popen(["pkill", "-f", "trafficgame.py"])
-        subprocess.Popen(["pkill", "-f", "ishayatbacked.py"])
+        stop_station(data.station)
     if moderec == 1:
-        results1 = subprocess.Popen([".venv/bin/python", "consequence/posturemonitor.py"])
-        print(results1)
-        results2 = subprocess.Popen([".venv/bin/uvicorn", "koushikbackend:api", "--reload"])
-        print(results2.stdout)
+        return switch(get_station(data.station, data.camera), POLICE, PROFILES["police"])
     return {"ok" : True}
 
 class closecom(BaseModel):
     close: int
+    station: str = DEFAULT
 
 @api.post("/close")
 def close(data:closecom):
     closerec = data.close
     if closerec == 1:
-        subprocess.Popen(["pkill", "-f", "posturemonitor.py"])
-        subprocess.Popen(["pkill", "-f", "koushikbackend.py"])
-        subprocess.Popen(["pkill", "-f", "headtilt_game.py"])
-        subprocess.Popen(["pkill", "-f", "posturetest_koushik.py"])
-        subprocess.Popen(["pkill", "-f", "trafficgame.py"])
-        subprocess.Popen(["pkill", "-f", "ishayatbacked.py"])
-        closerec = 0
-    return {"ok" : True}
\ No newline at end of file
+        stop_station(data.station)
+    return {"ok" : True}
+
+@api.get("/status")
+def status(station: str = DEFAULT):
+    st = stations.find(station)
+    if st is None:
+        return {}
+    st.supervisor.reap()
+    return st.supervisor.status()
+
+@api.get("/stations")
+def list_stations():
+    """Every station with its camera, ports, cores and running children"""
+    out = []
+    for st in stations.all():
+        st.supervisor.reap()
+        out.append({**st.describe(), "procs": st.supervisor.status()})
+    return out
+
+@api.get("/launches")
+def launches(station: str = DEFAULT):
+    """Cold vs warm time-to-ready per child, and the standby pool"""
+    st = stations.find(station)
+    return (st.supervisor if st is not None else pool).launch_stats()
+
+@api.get("/history")
+def history(user: str = "default", days: float = 7, bucket: str = "hour", start: float = None, end: float = None):
+    """Bad-posture share per hour/minute from posturemonitor's history store (rollups only)"""
+    from posturekit import history as store  # numpy, kept off the startup path
+    if bucket not in store.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {sorted(store.BUCKETS)}")
+    if not store.valid_user(user):
+        raise HTTPException(status_code=400, detail="bad user id")
+    end = time.time() if end is None else end
+    start = end - days * store.DAY_S if start is None else start
+    rows = store.query(user, start, end, bucket)
+    present = sum(r["present_s"] for r in rows)
+    bad = sum(r["bad_s"] for r in rows)
+    return {
+        "user": user,
+        "bucket": bucket,
+        "start": start,
+        "end": end,
+        "bad_pct": round(100 * bad / present, 1) if present else None,
+        "rows": rows,
+    }
+
+_own_cpu = [0.0, time.perf_counter()]
+
+@api.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text for this process and every supervised child"""
+    cpu, rss = process_usage(os.getpid())
+    now = time.perf_counter()
+    pct = 100.0 * (cpu - _own_cpu[0]) / max(now - _own_cpu[1], 1e-6)
+    _own_cpu[:] = [cpu, now]
+    REGISTRY.counter("posturebot_process_cpu_seconds_total",
+                     "CPU time of the process (supervised children: their process group)").set_total(cpu)
+    REGISTRY.gauge("posturebot_process_cpu_percent", "CPU use since the last scrape, 100 = one core").set(round(pct, 1))
+    REGISTRY.gauge("posturebot_process_rss_bytes",
+                   "Resident memory of the process (supervised children: their process group)").set(rss)
+
+    return render_prometheus(all_snapshots())
+
+def all_snapshots():
+    own = {"component": COMPONENT, "pid": os.getpid(), "metrics": REGISTRY.snapshot()}
+    snapshots = [own] + pool.metrics_snapshots()
+    for st in stations.all():
+        snapshots += [dict(snap, station=st.id) for snap in st.supervisor.metrics_snapshots()]
+    return snapshots
+
+@api.get("/tuning")
+def get_tuning():
+    """Current thresholds and version, the allowed ranges, and the version each component runs"""
+    version, values = tuning.read()
+    return {
+        "version": version,
+        "values": values,
+        "params": {name: p._asdict() for name, p in tuning.PARAMS.items()},
+        # from the metrics snapshots, so a component shows a new version within a couple of seconds
+        "running": tuning.running_versions(all_snapshots()),
+    }
+
+class tuningcomm(BaseModel):
+    values: dict
+    version: int = None  # the version the change is based on, 409 if it moved on
+
+@api.put("/tuning")
+def put_tuning(data: tuningcomm):
+    """Change thresholds without restarts: running components take the new version between frames"""
+    try:
+        version, values = tuning.update(data.values, data.version)
+    except tuning.StaleVersion as e:
+        raise HTTPException(409, str(e))
+    except tuning.TuningError as e:
+        raise HTTPException(400, str(e))
+    return {"ok": True, "version": version, "values": values}
+
+@api.on_event("startup")
+def startup():
+    pool.refill_standby()
+
+@api.on_event("shutdown")
+def shutdown():
+    for st in stations.all():
+        st.supervisor.shutdown()
+    pool.shutdown()
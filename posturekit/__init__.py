@@ -0,0 +1 @@
+"""Shared helpers for the PostureBot backends, camera scripts and games."""
@@ -0,0 +1,314 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+from posturekit.standby import is_standby
+
+# Capture profile negotiation. Many UVC cameras default to YUYV at a low
+# frame rate with several frames buffered, so a freshly read frame can be a
+# few hundred ms old. For each target (size @ fps) we try MJPG and YUYV at a
+# couple of sizes with a buffer size of 1, measure the FPS actually delivered
+# and how old a frame is when we get it, keep the best mode and cache it per
+# device so later launches just apply it.
+
+NEGOTIATE_ENV = "POSTUREBOT_CAPTURE_NEGOTIATE"  # "0" = old behaviour, take the driver default
+CACHE_ENV = "POSTUREBOT_CAPTURE_CACHE"
+FAKE_ENV = "POSTUREBOT_FAKE_CAMERA"             # "1" = FakeCapture instead of a real device
+CAMERA_ENV = "POSTUREBOT_CAMERA"                # this station's camera index, overrides the script's list
+DEFAULT_CACHE = os.path.expanduser("~/.posturebot/capture.json")
+
+FOURCCS = ("MJPG", "YUYV")
+FALLBACK_SIZE = (640, 480)
+
+
+@dataclass
+class CaptureProfile:
+    fourcc: str
+    width: int
+    height: int
+    fps: float
+    measured_fps: float = 0.0
+    age_ms: float = None  # frame age right after a 100 ms busy gap
+
+    def describe(self):
+        age = "?" if self.age_ms is None else f"{self.age_ms:.0f}"
+        return f"{self.fourcc} {self.width}x{self.height} @ {self.measured_fps:.1f} fps, frame age {age} ms"
+
+
+def _fourcc_code(fourcc):
+    import cv2
+    return cv2.VideoWriter_fourcc(*fourcc)
+
+
+def _fourcc_name(code):
+    code = int(code)
+    return "".join(chr((code >> 8 * i) & 0xFF) for i in range(4))
+
+
+def apply_mode(cap, fourcc, width, height, fps):
+    """Request a mode, return what the driver actually gave us"""
+    import cv2
+    cap.set(cv2.CAP_PROP_FOURCC, _fourcc_code(fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return (_fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+
+def measure(cap, frames=30, busy_s=0.1, clock=time.monotonic, sleep=time.sleep):
+    """(delivered fps, frame age in ms or None) of the current mode"""
+    import cv2
+    for _ in range(5):  # let exposure / the stream settle
+        cap.grab()
+    t0 = clock()
+    n = sum(1 for _ in range(frames) if cap.grab())
+    elapsed = clock() - t0
+    fps = n / elapsed if elapsed > 0 else 0.0
+
+    # pretend inference took busy_s, then see how old the next frame is
+    sleep(busy_s)
+    t_grab = clock()
+    if not cap.grab():
+        return fps, None
+    age = t_grab * 1000 - cap.get(cv2.CAP_PROP_POS_MSEC)
+    if 0 <= age < 10000:
+        return fps, age  # driver timestamps are on the monotonic clock (V4L2)
+    # otherwise estimate: frames that came back instantly were already buffered
+    buffered = 0
+    period = 1.0 / fps if fps else 0.1
+    while buffered < 10:
+        t = clock()
+        cap.grab()
+        if clock() - t > period / 2:
+            break
+        buffered += 1
+    return fps, (buffered + 1) * period * 1000
+
+
+def negotiate(cap, width, height, fps, clock=time.monotonic, sleep=time.sleep):
+    """Try MJPG / YUYV at the target and fallback sizes, return the best CaptureProfile"""
+    sizes = [(width, height)] + ([FALLBACK_SIZE] if (width, height) != FALLBACK_SIZE else [])
+    tried = {}
+    for fourcc in FOURCCS:
+        for w, h in sizes:
+            actual = apply_mode(cap, fourcc, w, h, fps)
+            if actual in tried:
+                continue  # the driver mapped this request onto a mode we already measured
+            measured, age = measure(cap, clock=clock, sleep=sleep)
+            tried[actual] = CaptureProfile(actual[0], actual[1], actual[2], fps, round(measured, 1),
+                                           None if age is None else round(age, 1))
+
+    def score(p):
+        return (
+            p.measured_fps >= 0.9 * fps,                 # keeps up with the target
+            p.width >= width and p.height >= height,     # covers the target size
+            -(p.age_ms if p.age_ms is not None else 1e6) // 10,  # fresher frames
+            -p.width * p.height,                         # no bigger than needed
+            p.measured_fps,
+        )
+    best = max(tried.values(), key=score)
+    apply_mode(cap, best.fourcc, best.width, best.height, fps)
+    return best
+
+
+def device_key(index):
+    """Camera identity for the cache: index plus the V4L2 device name where there is one"""
+    try:
+        with open(f"/sys/class/video4linux/video{index}/name") as f:
+            return f"{index}:{f.read().strip()}"
+    except OSError:
+        return str(index)
+
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, path)
+
+
+def select_profile(cap, index, width, height, fps, cache_path=None, clock=time.monotonic, sleep=time.sleep):
+    """Cached profile for this device and target if it still applies, else negotiate and cache"""
+    cache_path = cache_path or os.environ.get(CACHE_ENV, DEFAULT_CACHE)
+    cache = _load_cache(cache_path)
+    key, target = device_key(index), f"{width}x{height}@{fps}"
+    cached = cache.get(key, {}).get(target)
+    if cached:
+        profile = CaptureProfile(**cached)
+        if apply_mode(cap, profile.fourcc, profile.width, profile.height, fps) == \
+                (profile.fourcc, profile.width, profile.height):
+            return profile
+    profile = negotiate(cap, width, height, fps, clock=clock, sleep=sleep)
+    cache.setdefault(key, {})[target] = asdict(profile)
+    try:
+        _save_cache(cache_path, cache)
+    except OSError:
+        pass
+    return profile
+
+
+def open_camera(indexes=(0,), width=None, height=None, fps=30, backend=None):
+    """First camera index that opens (set up with the best capture profile), or None"""
+    if backend is None:
+        if os.environ.get(FAKE_ENV) == "1":
+            backend = FakeCapture
+        else:
+            import cv2
+            backend = cv2.VideoCapture
+    if os.environ.get(CAMERA_ENV):
+        indexes = (int(os.environ[CAMERA_ENV]),)
+    for index in indexes:
+        cap = backend(index)
+        if cap.isOpened():
+            if os.environ.get(NEGOTIATE_ENV, "1") == "1":
+                profile = select_profile(cap, index, width or FALLBACK_SIZE[0], height or FALLBACK_SIZE[1], fps)
+                print(f"camera {index}: {profile.describe()}")
+            elif width and height:
+                import cv2
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            return cap
+        cap.release()
+    return None
+
+
+class EarlyCamera:
+    """Opens the camera on a helper thread while the model loads.
+
+    Standby workers must not hold the camera before they are activated, so
+    for them the open simply happens in get().
+    """
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.future = None
+        if not is_standby():
+            ex = ThreadPoolExecutor(max_workers=1)
+            self.future = ex.submit(open_camera, *args, **kwargs)
+            ex.shutdown(wait=False)
+
+    def get(self):
+        if self.future is not None:
+            return self.future.result()
+        return open_camera(*self.args, **self.kwargs)
+
+
+class FakeClock:
+    """Virtual monotonic clock, so FakeCapture runs without waiting"""
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, s):
+        self.t += s
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in with per-mode frame rates and a driver buffer.
+
+    modes maps (fourcc, width, height) -> the fps the "camera" delivers;
+    unsupported requests fall back to the first mode, like most drivers.
+    With clock=None it paces frames on the real clock (for running the
+    camera scripts without a camera); otherwise pass a FakeClock.
+    """
+    MODES = {
+        ("YUYV", 640, 480): 30.0,
+        ("YUYV", 1280, 720): 10.0,
+        ("MJPG", 640, 480): 30.0,
+        ("MJPG", 1280, 720): 30.0,
+    }
+
+    def __init__(self, index=0, modes=None, buffers=4, honours_buffersize=True, clock=None):
+        self.modes = dict(modes or self.MODES)
+        self.mode = next(iter(self.modes))
+        self.requested = list(self.mode)
+        self.default_buffers = buffers
+        self.buffers = buffers
+        self.honours_buffersize = honours_buffersize
+        self.clock = clock or time.monotonic
+        self.sleep = clock.sleep if clock else time.sleep
+        self.opened = True
+        self._restart()
+
+    def _restart(self):
+        self.start = self.clock()
+        self.next_frame = 0
+        self.last = None
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+    def set(self, prop, value):
+        import cv2
+        if prop == cv2.CAP_PROP_FOURCC:
+            self.requested[0] = _fourcc_name(value)
+        elif prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.requested[1] = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.requested[2] = int(value)
+        elif prop == cv2.CAP_PROP_BUFFERSIZE:
+            self.buffers = max(1, int(value)) if self.honours_buffersize else self.default_buffers
+            return True
+        else:
+            return prop == cv2.CAP_PROP_FPS
+        mode = tuple(self.requested)
+        self.mode = mode if mode in self.modes else next(iter(self.modes))
+        self._restart()
+        return True
+
+    def get(self, prop):
+        import cv2
+        if prop == cv2.CAP_PROP_FOURCC:
+            return float(_fourcc_code(self.mode[0]))
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.mode[1])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.mode[2])
+        if prop == cv2.CAP_PROP_FPS:
+            return self.modes[self.mode]
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            return float(self.buffers)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return -1.0 if self.last is None else (self.start + self.last / self.modes[self.mode]) * 1000
+        return 0.0
+
+    def grab(self):
+        if not self.opened:
+            return False
+        fps = self.modes[self.mode]
+        newest = int((self.clock() - self.start) * fps)
+        frame = max(self.next_frame, newest - self.buffers + 1)  # older frames were overwritten
+        if frame > newest:
+            self.sleep(self.start + frame / fps - self.clock())
+        self.last = frame
+        self.next_frame = frame + 1
+        return True
+
+    def retrieve(self):
+        import numpy as np
+        if self.last is None:
+            return False, None
+        return True, np.zeros((self.mode[2], self.mode[1], 3), dtype=np.uint8)
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
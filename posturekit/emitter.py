@@ -0,0 +1,200 @@
+import threading
+import time
+from typing import Any, NamedTuple
+
+from posturekit.metrics import REGISTRY
+
+# Background HTTP sender for the camera loops. send() only drops the payload
+# into a slot and returns; one thread posts it over a keep-alive Session.
+# A slot holds just the newest payload, so while a post is in flight (or the
+# backend is down) older posture data is overwritten, never queued. Failed
+# posts back off exponentially and then retry with whatever is newest.
+# Requests whose reply the loop needs (the quiz calls) go through a Caller:
+# the call runs on its thread and the loop collects replies() between frames.
+
+
+class Emitter:
+    """Latest-value-wins POST sender, one slot per key"""
+    def __init__(self, url, name="emitter", timeout=0.3, backoff_s=0.25, max_backoff_s=5.0, registry=REGISTRY):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.url = url
+        self.timeout = timeout
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.slots = {}  # key -> newest payload, dict keeps first-pending order
+        self.cond = threading.Condition()
+        self.closed = False
+        self.failures = 0
+
+        self.publish_ms = registry.histogram("posturebot_publish_ms", "HTTP publish time per post")
+        self.sent = registry.counter("posturebot_publish_sent_total", "Payloads delivered", emitter=name)
+        self.coalesced = registry.counter("posturebot_publish_coalesced_total",
+                                          "Payloads overwritten by a newer one before sending", emitter=name)
+        self.failed = registry.counter("posturebot_publish_failed_total", "Posts that failed", emitter=name)
+        self.up = registry.gauge("posturebot_publish_up", "1 if the last post succeeded", emitter=name)
+
+        self.thread = threading.Thread(target=self._run, name=f"{name}-sender", daemon=True)
+        self.thread.start()
+
+    def send(self, payload, key=None):
+        """Never blocks on the network"""
+        with self.cond:
+            if key in self.slots:
+                self.coalesced.inc()
+                del self.slots[key]  # re-insert so the order follows the newest value
+            self.slots[key] = payload
+            self.cond.notify()
+
+    def _take(self):
+        with self.cond:
+            while not self.slots and not self.closed:
+                self.cond.wait()
+            if not self.slots:
+                return None
+            key = next(iter(self.slots))
+            return key, self.slots.pop(key)
+
+    def _run(self):
+        import requests
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            key, payload = item
+            t0 = time.perf_counter()
+            try:
+                self.session.post(self.url, json=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException:
+                self.failed.inc()
+                self.up.set(0)
+                with self.cond:
+                    self.slots.setdefault(key, payload)  # keep it unless something newer arrived
+                    self.failures += 1
+                    delay = min(self.backoff_s * 2 ** (self.failures - 1), self.max_backoff_s)
+                    self.cond.wait_for(lambda: self.closed, timeout=delay)
+                    if self.closed:
+                        return
+                continue
+            self.publish_ms.observe((time.perf_counter() - t0) * 1000)
+            self.sent.inc()
+            self.up.set(1)
+            self.failures = 0
+
+    def close(self, flush_s=0.5):
+        """Give pending payloads up to flush_s, then stop"""
+        deadline = time.monotonic() + flush_s
+        with self.cond:
+            while self.slots and self.failures == 0 and time.monotonic() < deadline:
+                self.cond.wait(0.02)
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(flush_s)
+        self.session.close()
+
+
+class Poller:
+    """Fetches a JSON endpoint every interval_s in the background; .value is the newest reply"""
+    def __init__(self, url, interval_s=1.0, timeout=0.5, name="poller"):
+        import requests
+        self.url = url
+        self.interval_s = interval_s
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.value = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"{name}-poller", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        import requests
+        while not self.stopped.is_set():
+            try:
+                r = self.session.get(self.url, timeout=self.timeout)
+                if r.status_code == 200:
+                    self.value = r.json()
+            except (requests.exceptions.RequestException, ValueError):
+                pass
+            self.stopped.wait(self.interval_s)
+
+    def close(self):
+        self.stopped.set()
+        self.session.close()
+
+
+class Reply(NamedTuple):
+    key: str
+    tag: Any      # whatever the caller passed along, e.g. the question answered
+    data: Any     # JSON body of a 2xx reply, None on error
+    error: Exception = None
+
+
+class Caller:
+    """Background requests whose replies the frame loop picks up with replies(), one pending call per key"""
+    def __init__(self, timeout=2.0, name="caller"):
+        import requests
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.pending = {}  # key -> (method, url, tag, kwargs), a newer call replaces a queued one
+        self.done = []
+        self.busy = None   # key of the call in flight
+        self.cond = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name=f"{name}-caller", daemon=True)
+        self.thread.start()
+
+    def call(self, key, method, url, tag=None, **kwargs):
+        """Never blocks on the network; kwargs go to requests"""
+        with self.cond:
+            self.pending.pop(key, None)
+            self.pending[key] = (method, url, tag, kwargs)
+            self.cond.notify()
+
+    def waiting(self, key):
+        """True while a call for key is queued or in flight"""
+        with self.cond:
+            return key in self.pending or self.busy == key
+
+    def replies(self):
+        """Replies that arrived since the last call, oldest first"""
+        with self.cond:
+            done, self.done = self.done, []
+        return done
+
+    def _run(self):
+        import requests
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                key = next(iter(self.pending))
+                method, url, tag, kwargs = self.pending.pop(key)
+                self.busy = key
+            try:
+                r = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                r.raise_for_status()
+                reply = Reply(key, tag, r.json())
+            except (requests.exceptions.RequestException, ValueError) as e:
+                reply = Reply(key, tag, None, e)
+            with self.cond:
+                self.done.append(reply)
+                self.busy = None
+                self.cond.notify_all()
+
+    def close(self, flush_s=2.0):
+        """Give queued calls up to flush_s, then stop"""
+        deadline = time.monotonic() + flush_s
+        with self.cond:
+            while (self.pending or self.busy) and time.monotonic() < deadline:
+                self.cond.wait(0.02)
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(flush_s)
+        self.session.close()
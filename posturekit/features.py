@@ -0,0 +1,93 @@
+import math
+
+# Per-frame posture features shared by posturemonitor.py and posturetest_koushik.py.
+# Pure Python on purpose: no cv2/mediapipe import, so it is cheap to import and benchmark.
+
+# MediaPipe landmark index reference (PoseLandmarker uses BlazePose indexing)
+NOSE = 0
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_EAR = 7
+RIGHT_EAR = 8
+LEFT_EYE = 2
+RIGHT_EYE = 5
+
+TILT_THRESHOLD = 15.0
+SEVERITY_THRESHOLD = 50
+MIN_ANGLE = 10.0   # steering axis starts reacting
+MAX_ANGLE = 30.0   # steering axis full strength
+
+
+def apply_tuning(values):
+    """Take over thresholds from posturekit.tuning (called between frames)"""
+    global TILT_THRESHOLD, SEVERITY_THRESHOLD, MIN_ANGLE, MAX_ANGLE
+    TILT_THRESHOLD = values["tilt_threshold_deg"]
+    SEVERITY_THRESHOLD = values["severity_threshold"]
+    MIN_ANGLE = values["min_angle_deg"]
+    MAX_ANGLE = values["max_angle_deg"]
+
+
+def clamp(x, lo=0.0, hi=1.0):
+    return max(lo, min(hi, x))
+
+
+def tilt_deg(a, b):
+    # a,b are landmarks with .x .y in normalized coords
+    dx = b.x - a.x
+    dy = b.y - a.y
+    return math.degrees(math.atan2(dy, dx))
+
+
+def head_tilt(r_ear, l_ear):
+    """Ear-to-ear angle folded into -90..90"""
+    tiltangle = tilt_deg(r_ear, l_ear)
+    if tiltangle > 90:
+        tiltangle -= 180
+    elif tiltangle < -90:
+        tiltangle += 180
+    return tiltangle
+
+
+def steering_axis(tiltangle):
+    strength = (abs(tiltangle) - MIN_ANGLE) / (MAX_ANGLE - MIN_ANGLE)
+    strength = clamp(strength, 0.0, 1.0)
+    return strength * strength * (1 if tiltangle >= 0 else -1)
+
+
+def severity_of(nose, l_sh, r_sh):
+    sh_cx = (l_sh.x + r_sh.x) / 2.0
+    head_forward = abs(nose.x - sh_cx)
+    return int(max(0, min(100, (head_forward - 0.03) / 0.10 * 100)))
+
+
+def confidence_of(points):
+    # average of landmark visibilities if available (some builds provide it)
+    vis = [float(p.visibility) for p in points if getattr(p, "visibility", None) is not None]
+    return sum(vis) / len(vis) if vis else 0.7  # fallback
+
+
+def posture_metrics(lm, tilt_is_bad=False, severity=None):
+    """One detected pose -> metadata dict posted to koushikbackend.
+
+    Pass `severity` to reuse a value from an earlier frame when lm's
+    shoulders are not from this frame (TiltTracker between pose runs).
+    """
+    nose = lm[NOSE]
+    l_sh = lm[LEFT_SHOULDER]
+    r_sh = lm[RIGHT_SHOULDER]
+
+    if severity is None:
+        severity = severity_of(nose, l_sh, r_sh)
+    conf = confidence_of((nose, l_sh, r_sh))
+    tiltangle = head_tilt(lm[RIGHT_EAR], lm[LEFT_EAR])
+
+    bad = severity >= SEVERITY_THRESHOLD or (tilt_is_bad and abs(tiltangle) >= TILT_THRESHOLD)
+    return {
+        "type": "POSTURE_BAD" if bad else "POSTURE_OK",
+        "severity": severity,
+        "confidence": float(clamp(conf)),
+        "headtiltangle": tiltangle,
+        "headdirection_left": tiltangle > TILT_THRESHOLD,
+        "headdirection_right": tiltangle < -TILT_THRESHOLD,
+        "steeringaxis": steering_axis(tiltangle),
+    }
@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from posturekit.metrics import REGISTRY
+
+# Optional MJPEG stream of a camera loop's annotated frames, so the browser
+# hub can show what the local cv2 window shows. The render loop only hands
+# over a frame reference (latest wins); one encoder thread scales and
+# JPEG-encodes it once and every viewer gets the same bytes. A viewer that
+# falls behind skips straight to the newest frame. With no viewers,
+# publish() returns before touching the frame, so nothing is encoded.
+#
+#   POSTUREBOT_STREAM_PORT=<port>  serve /stream.mjpg, /frame.jpg and /stats (unset = off)
+#   POSTUREBOT_STREAM_HOST         bind address (127.0.0.1)
+#   POSTUREBOT_STREAM_WIDTH=640    encoded width, height keeps the aspect (0 = as rendered)
+#   POSTUREBOT_STREAM_QUALITY=70   JPEG quality
+#   POSTUREBOT_STREAM_FPS=15       encode at most this often
+
+PORT_ENV = "POSTUREBOT_STREAM_PORT"
+HOST_ENV = "POSTUREBOT_STREAM_HOST"
+WIDTH_ENV = "POSTUREBOT_STREAM_WIDTH"
+QUALITY_ENV = "POSTUREBOT_STREAM_QUALITY"
+FPS_ENV = "POSTUREBOT_STREAM_FPS"
+
+BOUNDARY = "frame"
+
+
+class FrameStream:
+    def __init__(self, port, host="127.0.0.1", width=640, quality=70, fps=15.0, registry=REGISTRY):
+        self.width = width
+        self.quality = quality
+        self.interval = 1.0 / fps if fps else 0.0
+        self.cond = threading.Condition()
+        self.pending = None   # newest frame handed over by the render loop
+        self.jpeg = None      # newest encoded frame, shared by every viewer
+        self.seq = 0
+        self.viewers = 0
+        self.closed = False
+        self.last_publish = 0.0
+        self.encode_total_ms = 0.0
+
+        self.viewers_gauge = registry.gauge("posturebot_stream_viewers", "Connected stream viewers")
+        self.encode_ms = registry.histogram("posturebot_stream_encode_ms", "Scale + JPEG encode time per frame")
+        self.encoded = registry.counter("posturebot_stream_frames_encoded_total", "Frames encoded for the stream")
+        self.skipped = registry.counter("posturebot_stream_frames_skipped_total",
+                                        "Encoded frames a slow viewer never got")
+        self.sent_bytes = registry.counter("posturebot_stream_bytes_total", "Bytes sent to stream viewers")
+
+        stream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stream._serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="stream-http", daemon=True).start()
+        self.encoder = threading.Thread(target=self._encode_loop, name="stream-encoder", daemon=True)
+        self.encoder.start()
+
+    def publish(self, frame):
+        """Hand over a finished BGR frame; must not be drawn on afterwards. Cheap no-op without viewers."""
+        if not self.viewers:
+            return False
+        now = time.monotonic()
+        if now - self.last_publish < self.interval:
+            return False
+        self.last_publish = now
+        with self.cond:
+            self.pending = frame
+            self.cond.notify_all()
+        return True
+
+    def _encode_loop(self):
+        import cv2
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        while True:
+            with self.cond:
+                while self.pending is None and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                frame, self.pending = self.pending, None
+
+            t0 = time.perf_counter()
+            h, w = frame.shape[:2]
+            if self.width and w > self.width:
+                frame = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+            ok, buf = cv2.imencode(".jpg", frame, params)
+            ms = (time.perf_counter() - t0) * 1000
+            if not ok:
+                continue
+            self.encode_ms.observe(ms)
+            self.encoded.inc()
+            with self.cond:
+                self.encode_total_ms += ms
+                self.jpeg = buf.tobytes()
+                self.seq += 1
+                self.cond.notify_all()
+
+    def _next(self, last, timeout=5.0):
+        """(seq, jpeg) newer than `last`, (last, None) on timeout, None once closed"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq > last or self.closed, timeout)
+            if self.closed:
+                return None
+            if self.seq == last:
+                return last, None
+            if last:
+                self.skipped.inc(self.seq - last - 1)
+            return self.seq, self.jpeg
+
+    def _join(self, delta):
+        with self.cond:
+            self.viewers += delta
+            self.viewers_gauge.set(self.viewers)
+
+    def _serve(self, req):
+        path = req.path.split("?", 1)[0]
+        if path == "/stats":
+            body = json.dumps(self.stats()).encode()
+            req.send_response(200)
+            req.send_header("Content-Type", "application/json")
+            req.send_header("Access-Control-Allow-Origin", "*")
+            req.send_header("Content-Length", str(len(body)))
+            req.end_headers()
+            req.wfile.write(body)
+            return
+        if path not in ("/stream.mjpg", "/frame.jpg"):
+            req.send_error(404)
+            return
+
+        self._join(1)
+        try:
+            last = self.seq
+            if path == "/frame.jpg":
+                got = self._next(last, timeout=2.0)
+                if not got or got[1] is None:
+                    req.send_error(503, "no frame")
+                    return
+                req.send_response(200)
+                req.send_header("Content-Type", "image/jpeg")
+                req.send_header("Content-Length", str(len(got[1])))
+                req.send_header("Cache-Control", "no-store")
+                req.end_headers()
+                req.wfile.write(got[1])
+                self.sent_bytes.inc(len(got[1]))
+                return
+
+            req.send_response(200)
+            req.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+            req.send_header("Cache-Control", "no-store")
+            req.send_header("Connection", "close")
+            req.end_headers()
+            while True:
+                got = self._next(last)
+                if got is None:
+                    return
+                last, jpeg = got
+                if jpeg is None:
+                    continue
+                # a slow socket blocks only this viewer; it resumes at the newest frame
+                req.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n")
+                self.sent_bytes.inc(len(jpeg))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self._join(-1)
+
+    def stats(self):
+        with self.cond:
+            n = self.encoded.value
+            return {
+                "viewers": self.viewers,
+                "frames_encoded": int(n),
+                "encode_ms_mean": round(self.encode_total_ms / n, 2) if n else None,
+                "frame_bytes": len(self.jpeg) if self.jpeg else None,
+                "width": self.width,
+                "quality": self.quality,
+                "fps_cap": round(1 / self.interval, 1) if self.interval else None,
+            }
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def stream_from_env():
+    """FrameStream configured from POSTUREBOT_STREAM_*, or None when streaming is off"""
+    port = os.environ.get(PORT_ENV)
+    if not port:
+        return None
+    try:
+        stream = FrameStream(
+            int(port),
+            host=os.environ.get(HOST_ENV, "127.0.0.1"),
+            width=int(os.environ.get(WIDTH_ENV, "640")),
+            quality=int(os.environ.get(QUALITY_ENV, "70")),
+            fps=float(os.environ.get(FPS_ENV, "15")),
+        )
+    except OSError as e:
+        print(f"frame stream unavailable ({e})")
+        return None
+    print(f"frame stream on http://{stream.server.server_address[0]}:{stream.port}/stream.mjpg")
+    return stream
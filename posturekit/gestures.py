@@ -0,0 +1,178 @@
+import math
+from typing import NamedTuple
+
+# Streaming head-gesture recognizer for the quiz. Every update is O(1): the
+# tilt angle is smoothed with a running sum over a small ring, and nod and
+# shake detection keep a slow EWMA baseline, a hysteresis state and the
+# times of the last few swings.
+#
+#   hold   tilt held to one side for hold_s (the old "ready" state)
+#   flick  quick tilt past flick_deg and back to neutral within flick_s
+#   nod    two up/down swings of the nose within window_s
+#   shake  two left/right swings of the nose within window_s
+#
+# Pitch and yaw come from the nose's offset to the middle of the ears,
+# measured along and across the ear line in ear distances. That works with
+# the pose and the face backends alike, and a tilt doesn't read as a shake.
+
+NOSE, LEFT_EAR, RIGHT_EAR = 0, 7, 8
+
+
+class GestureEvent(NamedTuple):
+    kind: str      # "hold", "flick", "nod", "shake"
+    side: str      # "LEFT" / "RIGHT" for hold and flick, else None
+    t: float       # when it was recognized, seconds on the caller's clock
+
+
+def head_pose(lm):
+    """(yaw, pitch) of the nose relative to the ears, in ear distances"""
+    nose, l_ear, r_ear = lm[NOSE], lm[LEFT_EAR], lm[RIGHT_EAR]
+    ex, ey = l_ear.x - r_ear.x, l_ear.y - r_ear.y
+    dist = math.hypot(ex, ey)
+    if dist < 1e-6:
+        return 0.0, 0.0
+    ux, uy = ex / dist, ey / dist
+    ox = nose.x - (l_ear.x + r_ear.x) / 2
+    oy = nose.y - (l_ear.y + r_ear.y) / 2
+    return (ox * ux + oy * uy) / dist, (ux * oy - uy * ox) / dist
+
+
+class SwingDetector:
+    """Counts alternating excursions of a signal around its slow baseline"""
+    def __init__(self, amplitude, window_s, swings=2, baseline_s=1.5):
+        self.amplitude = amplitude
+        self.window_s = window_s
+        self.swings = swings
+        self.baseline_s = baseline_s
+        self.baseline = None
+        self.state = 0            # -1 / 0 / +1: which side we were last beyond
+        self.times = [None] * swings
+        self.index = 0
+        self.last_t = None
+
+    def reset(self):
+        self.baseline = None
+        self.state = 0
+        self.times = [None] * self.swings
+        self.last_t = None
+
+    def update(self, value, now):
+        """True when `swings` alternating excursions happened within window_s"""
+        if self.baseline is None:
+            self.baseline, self.last_t = value, now
+            return False
+        dt = max(now - self.last_t, 0.0)
+        self.last_t = now
+        self.baseline += (value - self.baseline) * (1 - math.exp(-dt / self.baseline_s))
+        d = value - self.baseline
+        side = 1 if d > self.amplitude else -1 if d < -self.amplitude else 0
+        if side == 0 or side == self.state:
+            return False
+        crossed = self.state != 0   # from one side to the other, not from rest
+        self.state = side
+        if not crossed:
+            return False
+        self.times[self.index] = now
+        self.index = (self.index + 1) % self.swings
+        oldest = self.times[self.index]
+        if oldest is not None and now - oldest <= self.window_s:
+            self.times = [None] * self.swings
+            self.state = 0
+            return True
+        return False
+
+
+class GestureRecognizer:
+    def __init__(self, threshold=15.0, hold_s=0.7, smooth=5, min_confidence=0.5,
+                 flick_deg=20.0, neutral_deg=8.0, flick_s=0.5,
+                 nod_amplitude=0.08, shake_amplitude=0.1, window_s=1.0):
+        self.threshold = threshold
+        self.hold_s = hold_s
+        self.min_confidence = min_confidence
+        self.flick_deg = flick_deg
+        self.neutral_deg = neutral_deg
+        self.flick_s = flick_s
+        self.ring = [0.0] * smooth
+        self.nod = SwingDetector(nod_amplitude, window_s)
+        self.shake = SwingDetector(shake_amplitude, window_s)
+        self.reset()
+
+    def reset(self):
+        self.ring = [0.0] * len(self.ring)
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.selection = "NEUTRAL"
+        self.selection_start = None
+        self.hold_time = 0.0
+        self.held = False
+        self.confidence = 0.0
+        self.flick_side = None
+        self.flick_start = None
+        self.nod.reset()
+        self.shake.reset()
+
+    @property
+    def angle(self):
+        return self.total / self.count if self.count else 0.0
+
+    def update(self, angle, confidence, now, yaw=None, pitch=None):
+        """Feed one frame, return the GestureEvents it completed"""
+        events = []
+        self.confidence = confidence
+
+        # running mean of the last len(ring) angles
+        n = len(self.ring)
+        if self.count == n:
+            self.total -= self.ring[self.index]
+        else:
+            self.count += 1
+        self.ring[self.index] = angle
+        self.total += angle
+        self.index = (self.index + 1) % n
+        avg = self.total / self.count
+
+        if confidence < self.min_confidence:
+            selection = "NEUTRAL"
+        elif avg > self.threshold:
+            selection = "RIGHT"
+        elif avg < -self.threshold:
+            selection = "LEFT"
+        else:
+            selection = "NEUTRAL"
+
+        if selection == self.selection and selection != "NEUTRAL":
+            self.hold_time = now - self.selection_start
+            if not self.held and self.hold_time >= self.hold_s:
+                self.held = True
+                events.append(GestureEvent("hold", selection, now))
+        else:
+            self.selection = selection
+            self.selection_start = now if selection != "NEUTRAL" else None
+            self.hold_time = 0.0
+            self.held = False
+
+        if confidence >= self.min_confidence:
+            # flick: the raw angle, smoothing would eat a quick one
+            if abs(angle) >= self.flick_deg and self.flick_start is None:
+                self.flick_side = "RIGHT" if angle > 0 else "LEFT"
+                self.flick_start = now
+            elif abs(angle) <= self.neutral_deg and self.flick_start is not None:
+                if now - self.flick_start <= self.flick_s:
+                    events.append(GestureEvent("flick", self.flick_side, now))
+                self.flick_start = None
+            if yaw is not None and self.shake.update(yaw, now):
+                events.append(GestureEvent("shake", None, now))
+            if pitch is not None and self.nod.update(pitch, now):
+                events.append(GestureEvent("nod", None, now))
+        return events
+
+    def state(self):
+        """The dict the quiz posts to /headtilt (same fields as before)"""
+        return {
+            "selection": self.selection,
+            "angle": round(self.angle, 1),
+            "hold_time": round(self.hold_time, 2),
+            "ready": self.held,
+            "confidence": round(self.confidence, 2),
+        }
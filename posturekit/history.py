@@ -0,0 +1,240 @@
+import json
+import os
+import time
+
+import numpy as np
+
+# Day-long posture history per user, append-only and columnar.
+# Every UTC day is one segment: one memory-mapped file per raw column (packed
+# float32 / int16 / int8) plus minute and hour rollup tables that are updated
+# on every append, so range queries only ever read the rollups.
+#
+#   <dir>/<user>/<day>.t .severity .tilt .confidence .state   raw columns
+#   <dir>/<user>/<day>.minute  <day>.hour                      rollups
+#   <dir>/<user>/<day>.json                                     sample count
+#
+# Recording is opt-in, it keeps a record of a person all day. Segments older
+# than the retention window are deleted whenever a writer starts a new day.
+#
+#   POSTUREBOT_HISTORY=1            record (off by default)
+#   POSTUREBOT_HISTORY_DIR=<path>   where (~/.posturebot/history)
+#   POSTUREBOT_HISTORY_DAYS=30      days kept per user, today included (0 = keep everything)
+
+HISTORY_ENV = "POSTUREBOT_HISTORY"
+HISTORY_DIR_ENV = "POSTUREBOT_HISTORY_DIR"
+RETENTION_ENV = "POSTUREBOT_HISTORY_DAYS"
+USER_ENV = "POSTUREBOT_USER"
+DEFAULT_DIR = os.path.expanduser("~/.posturebot/history")
+DEFAULT_USER = "default"
+DEFAULT_RETENTION_DAYS = 30
+
+DAY_S = 86400
+OK, BAD, ABSENT = 0, 1, 2
+STATES = {"POSTURE_OK": OK, "POSTURE_BAD": BAD, "NO_PERSON": ABSENT}
+
+# t is seconds since the start of the segment's day, which float32 holds to ~8 ms
+COLUMNS = {"t": np.float32, "severity": np.int16, "tilt": np.int16, "confidence": np.int16, "state": np.int8}
+TILT_SCALE = 100           # centidegrees
+CONFIDENCE_SCALE = 10000
+
+# rollup row: samples with a person, seconds observed, seconds bad, severity sum
+ROLLUP_FIELDS = ("samples", "present_s", "bad_s", "severity_sum")
+BUCKETS = {"minute": 60, "hour": 3600}
+
+MAX_GAP_S = 5.0  # a sample stands for the time since the previous one, up to this
+
+
+def valid_user(user):
+    """User ids become directory names"""
+    return bool(user) and not user.startswith(".") and all(c.isalnum() or c in "-_." for c in user)
+
+
+def history_dir():
+    return os.environ.get(HISTORY_DIR_ENV, DEFAULT_DIR)
+
+
+def enabled():
+    return os.environ.get(HISTORY_ENV, "0") == "1"
+
+
+def retention_days():
+    return int(os.environ.get(RETENTION_ENV, DEFAULT_RETENTION_DAYS))
+
+
+def prune(directory, today, keep_days):
+    """Delete one user's segments older than keep_days (today included); the days removed"""
+    cutoff = today - keep_days + 1
+    gone = set()
+    for name in os.listdir(directory):
+        day = name.split(".", 1)[0]
+        if day.isdigit() and int(day) < cutoff:
+            try:
+                os.remove(os.path.join(directory, name))
+                gone.add(int(day))
+            except OSError:
+                pass
+    return sorted(gone)
+
+
+def _map(path, dtype, shape):
+    """Open (creating or growing to shape) a writable memmap"""
+    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    with open(path, "ab") as f:
+        if f.tell() < size:
+            f.truncate(size)
+    return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+
+class Segment:
+    """One UTC day of one user's samples, opened for appending"""
+    def __init__(self, directory, day, chunk=65536):
+        self.day = day
+        self.base = day * DAY_S
+        self.prefix = os.path.join(directory, str(day))
+        self.chunk = chunk
+        self.count = 0
+        try:
+            with open(self.prefix + ".json") as f:
+                self.count = json.load(f)["count"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self.capacity = 0
+        self.columns = {}
+        self._grow(max(chunk, self.count))
+        self.rollups = {name: _map(f"{self.prefix}.{name}", np.float64, (DAY_S // step, len(ROLLUP_FIELDS)))
+                        for name, step in BUCKETS.items()}
+
+    def _grow(self, capacity):
+        for col in self.columns.values():
+            col.flush()
+        self.capacity = -(-capacity // self.chunk) * self.chunk
+        self.columns = {name: _map(f"{self.prefix}.{name}", dtype, (self.capacity,))
+                        for name, dtype in COLUMNS.items()}
+
+    def append(self, ts, state, severity, tilt, confidence, dt):
+        if self.count == self.capacity:
+            self._grow(self.capacity + self.chunk)
+        i = self.count
+        offset = ts - self.base
+        c = self.columns
+        c["t"][i] = offset
+        c["severity"][i] = severity
+        c["tilt"][i] = round(tilt * TILT_SCALE)
+        c["confidence"][i] = round(confidence * CONFIDENCE_SCALE)
+        c["state"][i] = state
+        self.count += 1
+
+        if state != ABSENT:
+            for name, step in BUCKETS.items():
+                row = self.rollups[name][int(offset // step)]
+                row[0] += 1
+                row[1] += dt
+                row[2] += dt if state == BAD else 0.0
+                row[3] += severity
+
+    def flush(self):
+        for col in self.columns.values():
+            col.flush()
+        for table in self.rollups.values():
+            table.flush()
+        tmp = self.prefix + ".json.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"count": self.count, "base": self.base}, f)
+        os.replace(tmp, self.prefix + ".json")
+
+
+class HistoryWriter:
+    """Appends posture samples for one user; the count is persisted every flush_s.
+    Each new day drops the segments past keep_days (default POSTUREBOT_HISTORY_DAYS)."""
+    def __init__(self, user=None, directory=None, flush_s=5.0, keep_days=None):
+        self.user = user or os.environ.get(USER_ENV, DEFAULT_USER)
+        if not valid_user(self.user):
+            raise ValueError(f"bad user id {self.user!r}")
+        self.directory = os.path.join(directory or history_dir(), self.user)
+        os.makedirs(self.directory, exist_ok=True)
+        self.flush_s = flush_s
+        self.keep_days = retention_days() if keep_days is None else keep_days
+        self.segment = None
+        self.last_ts = None
+        self.last_flush = time.time()
+
+    def append(self, sample, ts=None):
+        """Record one posture_metrics() dict (or {"type": "NO_PERSON"})"""
+        ts = time.time() if ts is None else ts
+        day = int(ts // DAY_S)
+        if self.segment is None or self.segment.day != day:
+            if self.segment is not None:
+                self.segment.flush()
+            if self.keep_days:
+                prune(self.directory, day, self.keep_days)
+            self.segment = Segment(self.directory, day)
+        dt = 0.0 if self.last_ts is None else min(max(ts - self.last_ts, 0.0), MAX_GAP_S)
+        self.last_ts = ts
+
+        state = STATES.get(sample.get("type"), ABSENT)
+        self.segment.append(ts, state, int(sample.get("severity", 0)), float(sample.get("headtiltangle", 0.0)),
+                            float(sample.get("confidence", 0.0)), dt)
+        if ts - self.last_flush >= self.flush_s:
+            self.flush()
+            self.last_flush = ts
+
+    def flush(self):
+        if self.segment is not None:
+            self.segment.flush()
+
+    def close(self):
+        self.flush()
+        self.segment = None
+
+
+def users(directory=None):
+    directory = directory or history_dir()
+    if not os.path.isdir(directory):
+        return []
+    return sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+
+
+def query(user, start, end, bucket="hour", directory=None):
+    """Rollup rows for [start, end) epoch seconds, read from the minute/hour tables only"""
+    step = BUCKETS[bucket]
+    prefix_dir = os.path.join(directory or history_dir(), user)
+    rows = []
+    for day in range(int(start // DAY_S), int((end - 1) // DAY_S) + 1):
+        try:
+            table = np.fromfile(os.path.join(prefix_dir, f"{day}.{bucket}"), dtype=np.float64)
+        except OSError:
+            continue
+        table = table.reshape(-1, len(ROLLUP_FIELDS))
+        base = day * DAY_S
+        for i in np.flatnonzero(table[:, 0]):
+            t = base + int(i) * step
+            if not start <= t < end:
+                continue
+            samples, present_s, bad_s, severity_sum = table[i].tolist()
+            rows.append({
+                "start": t,
+                "samples": int(samples),
+                "present_s": round(present_s, 1),
+                "bad_s": round(bad_s, 1),
+                "bad_pct": round(100 * bad_s / present_s, 1) if present_s else 0.0,
+                "mean_severity": round(severity_sum / samples, 1),
+            })
+    return rows
+
+
+def raw(user, day, directory=None):
+    """One day's raw samples as read-only memory maps, decoded to epoch s / degrees / 0..1"""
+    prefix = os.path.join(directory or history_dir(), user, str(day))
+    with open(prefix + ".json") as f:
+        count = json.load(f)["count"]
+    cols = {}
+    for name, dtype in COLUMNS.items():
+        cols[name] = np.memmap(f"{prefix}.{name}", dtype=dtype, mode="r", shape=(count,)) if count \
+            else np.zeros(0, dtype=dtype)
+    return {
+        "t": cols["t"].astype(np.float64) + day * DAY_S,
+        "severity": cols["severity"],
+        "tilt": cols["tilt"] / TILT_SCALE,
+        "confidence": cols["confidence"] / CONFIDENCE_SCALE,
+        "state": cols["state"],
+    }
@@ -0,0 +1,251 @@
+import os
+from typing import NamedTuple
+
+# Pose inference backends for the camera scripts: an RGB frame goes in,
+# one person's keypoints come out as normalized (x, y) + visibility in
+# BlazePose's 33-point indexing, so posturekit.features and the games read
+# them exactly like MediaPipe landmarks. Heavy imports happen in the
+# constructors.
+#
+#   mediapipe  PoseLandmarker (.task model), the original path
+#   onnx       a single-person keypoint model (MoveNet-style, COCO 17 points)
+#              on ONNX Runtime's CPU provider, thread count and graph
+#              optimization level configurable
+#
+# The head-tilt games only need the ears, so create_tilt_backend() puts a
+# TiltTracker in front of the pose backend: BlazeFace (a few ms instead of
+# the full body model) gives eyes, nose and ear tragions, and the pose model
+# only runs when the face is lost or shoulders are due for a refresh.
+
+BACKEND_ENV = "POSTUREBOT_INFERENCE"
+ONNX_MODEL_ENV = "POSTUREBOT_ONNX_MODEL"
+ONNX_OPT_ENV = "POSTUREBOT_ONNX_OPT"
+THREADS_ENV = "POSTUREBOT_THREADS"  # set by the supervisor's resource profile
+TILT_ONLY_ENV = "POSTUREBOT_TILT_ONLY"  # "0" = always run the pose model in the games
+FACE_MODEL_ENV = "POSTUREBOT_FACE_MODEL"
+
+DEFAULT_ONNX_MODEL = "models/movenet_singlepose_lightning.onnx"
+NUM_KEYPOINTS = 33
+
+# COCO-17 order -> BlazePose index
+COCO_TO_BLAZEPOSE = (0, 2, 5, 7, 8, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28)
+
+# BlazeFace keypoints (right eye, left eye, nose tip, mouth, right ear, left ear)
+# -> BlazePose index; both models name sides the same way, so angles match
+FACE_TO_BLAZEPOSE = {0: 5, 1: 2, 2: 0, 4: 8, 5: 7}
+
+
+class Keypoint(NamedTuple):
+    x: float
+    y: float
+    visibility: float
+
+
+MISSING = Keypoint(0.0, 0.0, 0.0)
+
+
+class MediaPipeBackend:
+    name = "mediapipe"
+
+    def __init__(self, model_path):
+        import mediapipe as mp
+        from mediapipe.tasks import python
+        from mediapipe.tasks.python import vision
+        self.mp = mp
+        # Create PoseLandmarker (video mode, good for frame-by-frame webcam)
+        options = vision.PoseLandmarkerOptions(
+            base_options=python.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=1,
+        )
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+
+    def detect(self, rgb, timestamp_ms):
+        """Keypoints of the first person, or None"""
+        image = self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=rgb)
+        result = self.landmarker.detect_for_video(image, timestamp_ms)
+        if result.pose_landmarks:
+            return result.pose_landmarks[0]  # already has .x .y .visibility
+        return None
+
+    def close(self):
+        self.landmarker.close()
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    OPT_LEVELS = ("disable", "basic", "extended", "all")
+
+    def __init__(self, model_path=None, threads=None, optimization=None, min_score=0.2):
+        import numpy as np
+        import onnxruntime as ort
+        self.np = np
+        self.min_score = min_score
+
+        opts = ort.SessionOptions()
+        threads = threads or int(os.environ.get(THREADS_ENV, "0"))
+        opts.intra_op_num_threads = threads  # 0 = one per core
+        opts.inter_op_num_threads = 1
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        optimization = optimization or os.environ.get(ONNX_OPT_ENV, "all")
+        opts.graph_optimization_level = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }[optimization]
+        self.session = ort.InferenceSession(model_path or os.environ.get(ONNX_MODEL_ENV, DEFAULT_ONNX_MODEL),
+                                            sess_options=opts, providers=["CPUExecutionProvider"])
+
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        # NHWC square input, e.g. [1, 192, 192, 3]; dynamic dims fall back to 192
+        self.size = next((d for d in inp.shape[1:3] if isinstance(d, int) and d > 0), 192)
+        self.dtype = np.int32 if "int32" in inp.type else (np.uint8 if "uint8" in inp.type else np.float32)
+
+    def detect(self, rgb, timestamp_ms=None):
+        """Keypoints of the one person the model sees, or None if it isn't confident"""
+        import cv2
+        np = self.np
+        h, w = rgb.shape[:2]
+        # letterbox to a square so angles survive the resize
+        side = max(h, w)
+        top, left = (side - h) // 2, (side - w) // 2
+        square = cv2.copyMakeBorder(rgb, top, side - h - top, left, side - w - left, cv2.BORDER_CONSTANT)
+        tensor = cv2.resize(square, (self.size, self.size), interpolation=cv2.INTER_LINEAR)
+        tensor = tensor[np.newaxis].astype(self.dtype)
+
+        out = self.session.run(None, {self.input_name: tensor})[0].reshape(-1, 3)[:17]  # (y, x, score)
+        ys = (out[:, 0] * side - top) / h
+        xs = (out[:, 1] * side - left) / w
+        scores = out[:, 2]
+        if scores[:7].mean() < self.min_score:  # face + shoulders, what the features use
+            return None
+        keypoints = [MISSING] * NUM_KEYPOINTS
+        for coco, blaze in enumerate(COCO_TO_BLAZEPOSE):
+            keypoints[blaze] = Keypoint(float(xs[coco]), float(ys[coco]), float(scores[coco]))
+        return keypoints
+
+    def close(self):
+        self.session = None
+
+
+class FaceBackend:
+    """MediaPipe FaceDetector (BlazeFace short range), keypoints in BlazePose slots"""
+    name = "face"
+
+    def __init__(self, model_path, min_score=0.5):
+        import mediapipe as mp
+        from mediapipe.tasks import python
+        from mediapipe.tasks.python import vision
+        self.mp = mp
+        options = vision.FaceDetectorOptions(
+            base_options=python.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            min_detection_confidence=min_score,
+        )
+        self.detector = vision.FaceDetector.create_from_options(options)
+
+    def detect(self, rgb, timestamp_ms):
+        """{BlazePose index: Keypoint} of the most confident face, or None"""
+        image = self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=rgb)
+        result = self.detector.detect_for_video(image, timestamp_ms)
+        if not result.detections:
+            return None
+        face = max(result.detections, key=lambda d: d.categories[0].score)
+        score = face.categories[0].score
+        return {blaze: Keypoint(face.keypoints[i].x, face.keypoints[i].y, score)
+                for i, blaze in FACE_TO_BLAZEPOSE.items()}
+
+    def close(self):
+        self.detector.close()
+
+
+class TiltTracker:
+    """Face detector first, pose model as the fallback.
+
+    detect() returns 33 keypoints like the pose backends. While a face is
+    found the ears / eyes / nose come from it and everything else from the
+    last pose result. The pose model runs when there is no face, and every
+    pose_every_s when the caller needs shoulders (None = ears only). A failed
+    refresh drops the old shoulders; pose_fresh tells whether this frame's
+    shoulders were detected on this frame (compute severity only then).
+    """
+    name = "tilt"
+
+    def __init__(self, pose, face, pose_every_s=None):
+        from posturekit.metrics import REGISTRY
+        self.pose = pose
+        self.face = face
+        self.pose_every_s = pose_every_s
+        self.last_pose = None
+        self.last_pose_ms = None
+        self.pose_fresh = False
+        self.source = None
+        self.frames = {src: REGISTRY.counter("posturebot_tilt_frames_total", "Head tilt frames by model", source=src)
+                       for src in ("face", "pose", "none")}
+
+    def _run_pose(self, rgb, timestamp_ms):
+        lm = self.pose.detect(rgb, timestamp_ms)
+        # a miss clears the shoulders too, the next frame tries again
+        self.last_pose = list(lm) if lm is not None else None
+        if lm is not None:
+            self.last_pose_ms = timestamp_ms
+        self.pose_fresh = lm is not None
+        return lm
+
+    def detect(self, rgb, timestamp_ms):
+        self.pose_fresh = False
+        face = self.face.detect(rgb, timestamp_ms)
+        if face is None:
+            lm = self._run_pose(rgb, timestamp_ms)
+            self.source = "pose" if lm is not None else "none"
+            self.frames[self.source].inc()
+            return lm
+        if self.pose_every_s is not None and (
+                self.last_pose_ms is None or timestamp_ms - self.last_pose_ms >= self.pose_every_s * 1000):
+            self._run_pose(rgb, timestamp_ms)
+            if self.last_pose is None:  # no shoulders yet, don't make them up
+                self.source = "none"
+                self.frames["none"].inc()
+                return None
+        lm = list(self.last_pose) if self.last_pose is not None else [MISSING] * NUM_KEYPOINTS
+        for i, kp in face.items():
+            lm[i] = kp
+        self.source = "face"
+        self.frames["face"].inc()
+        return lm
+
+    def close(self):
+        self.face.close()
+        self.pose.close()
+
+
+BACKENDS = {"mediapipe": MediaPipeBackend, "onnx": OnnxBackend}
+
+
+def create_backend(name=None, model_path=None, **kwargs):
+    """Backend from POSTUREBOT_INFERENCE (default mediapipe); model_path is the
+    MediaPipe .task file, the ONNX model comes from POSTUREBOT_ONNX_MODEL"""
+    name = name or os.environ.get(BACKEND_ENV, "mediapipe")
+    if name not in BACKENDS:
+        raise ValueError(f"unknown inference backend {name!r}, expected one of {sorted(BACKENDS)}")
+    if name == "mediapipe":
+        return MediaPipeBackend(model_path, **kwargs)
+    return OnnxBackend(**kwargs)
+
+
+def create_tilt_backend(face_model, model_path=None, pose_every_s=None, **kwargs):
+    """create_backend() behind a TiltTracker, unless POSTUREBOT_TILT_ONLY=0 or
+    the face model can't be loaded (then just the pose backend)"""
+    pose = create_backend(model_path=model_path, **kwargs)
+    if os.environ.get(TILT_ONLY_ENV, "1") != "1":
+        return pose
+    face_model = os.environ.get(FACE_MODEL_ENV, face_model)
+    try:
+        face = FaceBackend(face_model)
+    except Exception as e:  # no model file / no mediapipe
+        print(f"tilt-only mode off, face model {face_model!r} unavailable ({e})")
+        return pose
+    return TiltTracker(pose, face, pose_every_s=pose_every_s)
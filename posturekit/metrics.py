@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# In-process counters / gauges / histograms for every component.
+# Children don't serve HTTP themselves: start_exporter() dumps a JSON snapshot
+# into $POSTUREBOT_METRICS_DIR every few seconds and neazbackend renders all
+# of them (plus per-process CPU / RSS) as Prometheus text on /metrics.
+
+METRICS_DIR_ENV = "POSTUREBOT_METRICS_DIR"
+COMPONENT_ENV = "POSTUREBOT_COMPONENT"
+
+MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self.lock:
+            self.value += n
+
+    def set_total(self, value):
+        """Take over a total counted elsewhere (e.g. CPU seconds from /proc); never goes back"""
+        with self.lock:
+            self.value = max(self.value, value)
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Gauge(Counter):
+    def set(self, value):
+        self.value = value
+
+
+class Histogram:
+    def __init__(self, buckets=MS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+
+class Registry:
+    def __init__(self):
+        self.families = {}
+        self.lock = threading.Lock()
+
+    def _get(self, kind, cls, name, help, labels, **kwargs):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            family = self.families.setdefault(name, {"type": kind, "help": help, "series": {}})
+            series = family["series"].get(key)
+            if series is None:
+                series = family["series"][key] = cls(**kwargs)
+            return series
+
+    def counter(self, name, help="", **labels):
+        return self._get("counter", Counter, name, help, labels)
+
+    def gauge(self, name, help="", **labels):
+        return self._get("gauge", Gauge, name, help, labels)
+
+    def histogram(self, name, help="", buckets=MS_BUCKETS, **labels):
+        return self._get("histogram", Histogram, name, help, labels, buckets=buckets)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {
+                    "type": f["type"],
+                    "help": f["help"],
+                    "series": [{"labels": dict(key), **m.snapshot()} for key, m in f["series"].items()],
+                }
+                for name, f in self.families.items()
+            }
+
+
+REGISTRY = Registry()
+
+
+class CameraMetrics:
+    """The standard per-frame metrics of a camera loop"""
+    def __init__(self, registry=REGISTRY):
+        self.captured = registry.counter("posturebot_frames_captured_total", "Frames read from the camera")
+        self.inferred = registry.counter("posturebot_frames_inferred_total", "Frames run through the pose model")
+        self.dropped = registry.counter("posturebot_frames_dropped_total", "Frames lost to read or inference errors")
+        self.inference_ms = registry.histogram("posturebot_inference_ms", "Pose model time per frame")
+        self.publish_ms = registry.histogram("posturebot_publish_ms", "HTTP publish time per post")
+
+
+def install_http_metrics(api, app_name, registry=REGISTRY):
+    """Count requests and time them per route on a FastAPI app"""
+    @api.middleware("http")
+    async def http_metrics(request, call_next):
+        t0 = time.perf_counter()
+        response = await call_next(request)
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        registry.counter("posturebot_http_requests_total", "HTTP requests served",
+                         app=app_name, path=path, status=str(response.status_code)).inc()
+        registry.histogram("posturebot_http_request_ms", "HTTP request latency",
+                           app=app_name, path=path).observe((time.perf_counter() - t0) * 1000)
+        return response
+
+
+def start_exporter(component, interval=2.0, registry=REGISTRY):
+    """Dump snapshots for neazbackend in the background (no-op when not supervised)"""
+    directory = os.environ.get(METRICS_DIR_ENV)
+    if not directory:
+        return None
+    component = os.environ.get(COMPONENT_ENV, component)
+    path = os.path.join(directory, f"{component}-{os.getpid()}.json")
+
+    def loop():
+        while True:
+            write_snapshot(path, component, registry)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metrics-exporter", daemon=True)
+    thread.start()
+    return thread
+
+
+def write_snapshot(path, component, registry=REGISTRY):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"component": component, "pid": os.getpid(), "time": time.time(),
+                   "metrics": registry.snapshot()}, f)
+    os.replace(tmp, path)
+
+
+def read_snapshots(directory):
+    snapshots = []
+    if not directory or not os.path.isdir(directory):
+        return snapshots
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def render_prometheus(snapshots):
+    """Merge component snapshots into one Prometheus text exposition"""
+    families = {}
+    for snap in snapshots:
+        for name, f in snap["metrics"].items():
+            family = families.setdefault(name, {"type": f["type"], "help": f["help"], "series": []})
+            for series in f["series"]:
+                labels = dict(series["labels"], component=snap["component"])
+                if snap.get("station"):
+                    labels["station"] = snap["station"]
+                family["series"].append((labels, series))
+
+    lines = []
+    for name in sorted(families):
+        f = families[name]
+        lines.append(f"# HELP {name} {f['help']}")
+        lines.append(f"# TYPE {name} {f['type']}")
+        for labels, s in f["series"]:
+            if f["type"] == "histogram":
+                cumulative = 0
+                for bound, n in zip(s["buckets"], s["counts"]):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(dict(labels, le=str(bound)))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(dict(labels, le='+Inf'))} {s['count']}")
+                lines.append(f"{name}_sum{_labels(labels)} {s['sum']}")
+                lines.append(f"{name}_count{_labels(labels)} {s['count']}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {s['value']}")
+    return "\n".join(lines) + "\n"
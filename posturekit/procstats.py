@@ -0,0 +1,74 @@
+import os
+
+# Linux /proc readers used by the supervisor and the /metrics endpoint.
+# Everything returns zeros elsewhere instead of failing.
+
+try:
+    CLK_TCK = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (ValueError, OSError, AttributeError):
+    CLK_TCK, PAGE_SIZE = 100, 4096
+
+
+def rss_mb(pid):
+    """Resident memory of one process in MB"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return 0.0
+
+
+def _stat(pid):
+    """(pgrp, cpu_seconds, rss_bytes) of one process, or None"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm may contain spaces, the fixed fields start after the last ")"
+    fields = data[data.rindex(")") + 2:].split()
+    pgrp = int(fields[2])
+    cpu = (int(fields[11]) + int(fields[12])) / CLK_TCK
+    rss = int(fields[21]) * PAGE_SIZE
+    return pgrp, cpu, rss
+
+
+def _all_pids():
+    try:
+        return [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return []
+
+
+def thread_ids(pid):
+    """Every thread of a process (just the pid without /proc)"""
+    try:
+        return [int(t) for t in os.listdir(f"/proc/{pid}/task") if t.isdigit()] or [pid]
+    except OSError:
+        return [pid]
+
+
+def group_pids(pgid):
+    """Every live pid in a process group (just the leader without /proc)"""
+    pids = [pid for pid in _all_pids() if (_stat(pid) or (None,))[0] == pgid]
+    return pids or [pgid]
+
+
+def group_usage(pgid):
+    """Summed CPU seconds and RSS bytes of every process in a process group"""
+    cpu = rss = 0
+    for pid in _all_pids():
+        st = _stat(pid)
+        if st and st[0] == pgid:
+            cpu += st[1]
+            rss += st[2]
+    return cpu, rss
+
+
+def process_usage(pid):
+    st = _stat(pid)
+    return (st[1], st[2]) if st else (0.0, 0)
@@ -0,0 +1,28 @@
+import os
+import time
+
+# The supervisor in neazbackend hands every child a path in this variable and
+# treats the child as ready once the file exists.
+READY_ENV = "POSTUREBOT_READY_FILE"
+# bench/startup.py collects "<event> <unix time>" lines from here
+STARTUP_LOG_ENV = "POSTUREBOT_STARTUP_LOG"
+
+
+def mark(event):
+    """Record a startup milestone (imports, model, ready, first_frame)"""
+    path = os.environ.get(STARTUP_LOG_ENV)
+    if path:
+        with open(path, "a") as f:
+            f.write(f"{event} {time.time():.6f}\n")
+
+
+def signal_ready():
+    """Mark this process as ready (model loaded, camera/window open)"""
+    mark("ready")
+    path = os.environ.get(READY_ENV)
+    if not path:
+        return
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(str(os.getpid()))
+    os.replace(tmp, path)
@@ -0,0 +1,92 @@
+import os
+from dataclasses import dataclass
+
+from posturekit.procstats import group_pids, thread_ids
+
+# Resource profiles the orchestrator applies to each child it launches, so
+# inference, the pygame render loop and the uvicorn services stop fighting
+# over the same cores with default-sized thread pools.
+
+THREADS_ENV = "POSTUREBOT_THREADS"
+
+# env vars honoured by the usual native thread pools
+THREAD_POOL_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def core_roles(cores=None):
+    """Split the usable cores into render / inference / service sets"""
+    if cores is None:
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if len(cores) < 2:
+        return {"render": cores, "inference": cores, "service": cores}
+    if len(cores) == 2:
+        return {"render": cores[:1], "inference": cores[1:], "service": cores[1:]}
+    return {"render": cores[:1], "inference": cores[1:-1], "service": cores[-1:]}
+
+
+@dataclass(frozen=True)
+class ResourceProfile:
+    role: str = None     # "render" / "inference" / "service", None = any core
+    threads: int = None  # cap for OpenCV and OpenMP/BLAS pools
+    nice: int = 0
+
+    def env(self):
+        if not self.threads:
+            return {}
+        env = {var: str(self.threads) for var in THREAD_POOL_VARS}
+        env[THREADS_ENV] = str(self.threads)
+        return env
+
+    def apply(self, pgid, roles=None):
+        """Pin and renice every thread of a running group (thread caps only apply at spawn).
+
+        Affinity and nice are per thread on Linux, so each /proc/<pid>/task
+        entry is set, not just the pid. Returns {"cpus"/"nice": error} for
+        whatever could not be applied, {} when everything took.
+        """
+        cpus = (roles or core_roles()).get(self.role) if self.role else None
+        failed = {}
+        for pid in group_pids(pgid):
+            for tid in thread_ids(pid):
+                if cpus and hasattr(os, "sched_setaffinity"):
+                    try:
+                        os.sched_setaffinity(tid, cpus)
+                    except ProcessLookupError:
+                        continue  # thread exited meanwhile
+                    except OSError as e:
+                        failed["cpus"] = f"{cpus} on {tid}: {e.strerror}"
+                try:
+                    # lowering nice below the current value needs privileges, raising never does
+                    if os.getpriority(os.PRIO_PROCESS, tid) != self.nice:
+                        os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+                except ProcessLookupError:
+                    pass
+                except OSError as e:
+                    failed["nice"] = f"{self.nice} on {tid}: {e.strerror}"
+        return failed
+
+
+def applied(pid):
+    """What a process actually runs with, for /status"""
+    info = {}
+    try:
+        info["cpus"] = sorted(os.sched_getaffinity(pid))
+    except (OSError, AttributeError):
+        info["cpus"] = None
+    try:
+        info["nice"] = os.getpriority(os.PRIO_PROCESS, pid)
+    except OSError:
+        info["nice"] = None
+    return info
+
+
+def apply_thread_caps():
+    """Child side: cap OpenCV's pool to the profile (call after importing cv2)"""
+    threads = os.environ.get(THREADS_ENV)
+    if not threads:
+        return
+    try:
+        import cv2
+        cv2.setNumThreads(int(threads))
+    except ImportError:
+        pass
@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import time
+from array import array
+
+from posturekit.metrics import REGISTRY
+
+# Per-stage timing of a camera loop. The loop calls start() at the top of a
+# frame and lap("stage") after each stage, so each lap costs one
+# perf_counter() call and a store into that stage's fixed-size ring. Rolling
+# stats come from the rings on demand; they feed the optional on-screen
+# overlay and a periodic JSON-lines dump, and every lap also goes into the
+# posturebot_stage_ms{stage} histogram that neazbackend serves on /metrics.
+#
+#   POSTUREBOT_STAGE_OVERLAY=1   draw the table on the preview (headtilt_game: 'o' toggles)
+#   POSTUREBOT_STAGE_LOG=<path>  append a stats line every POSTUREBOT_STAGE_DUMP_S (5 s), "-" = stderr
+
+OVERLAY_ENV = "POSTUREBOT_STAGE_OVERLAY"
+LOG_ENV = "POSTUREBOT_STAGE_LOG"
+DUMP_ENV = "POSTUREBOT_STAGE_DUMP_S"
+
+FRAME = "frame"   # whole frame, start() to end_frame()
+OTHER = "other"   # last lap to end_frame()
+
+
+class Ring:
+    """Last `size` samples of one stage, in ms"""
+    def __init__(self, size):
+        self.values = array("d", bytes(8 * size))
+        self.index = 0
+        self.count = 0
+
+    def add(self, ms):
+        self.values[self.index] = ms
+        self.index = (self.index + 1) % len(self.values)
+        self.count += 1
+
+    def stats(self):
+        n = min(self.count, len(self.values))
+        if not n:
+            return None
+        values = sorted(self.values[:n])
+        return {
+            "n": n,
+            "mean_ms": round(sum(values) / n, 3),
+            "p50_ms": round(values[n // 2], 3),
+            "p95_ms": round(values[min(n - 1, int(n * 0.95))], 3),
+            "max_ms": round(values[-1], 3),
+        }
+
+
+class StageTimer:
+    def __init__(self, component, size=300, registry=REGISTRY):
+        self.component = component
+        self.size = size
+        self.registry = registry
+        self.rings = {}  # stage -> Ring, in first-seen order
+        self.histograms = {}
+        self.t_frame = self.t_last = None
+
+        self.overlay_on = os.environ.get(OVERLAY_ENV) == "1"
+        self.overlay_lines = []
+        self.overlay_at = 0.0
+
+        path = os.environ.get(LOG_ENV)
+        self.dump_file = None
+        if path == "-":
+            self.dump_file = sys.stderr
+        elif path:
+            self.dump_file = open(path, "a", buffering=1)
+        self.dump_s = float(os.environ.get(DUMP_ENV, "5"))
+        self.dump_at = time.monotonic() + self.dump_s
+
+    def _record(self, stage, ms):
+        ring = self.rings.get(stage)
+        if ring is None:
+            ring = self.rings[stage] = Ring(self.size)
+            self.histograms[stage] = self.registry.histogram(
+                "posturebot_stage_ms", "Camera loop time per stage", stage=stage)
+        ring.add(ms)
+        self.histograms[stage].observe(ms)
+
+    def start(self):
+        self.t_frame = self.t_last = time.perf_counter()
+
+    def lap(self, stage):
+        """Time since start() or the previous lap goes to `stage`"""
+        now = time.perf_counter()
+        if self.t_last is not None:
+            self._record(stage, (now - self.t_last) * 1000)
+        self.t_last = now
+
+    def skip(self):
+        """Abandon the current frame (nothing was processed); its laps stay recorded"""
+        self.t_frame = self.t_last = None
+
+    def end_frame(self):
+        if self.t_frame is None:
+            return
+        now = time.perf_counter()
+        self._record(OTHER, (now - self.t_last) * 1000)
+        self._record(FRAME, (now - self.t_frame) * 1000)
+        self.t_frame = self.t_last = None
+        if self.dump_file is not None and time.monotonic() >= self.dump_at:
+            self.dump()
+
+    def stats(self):
+        """{stage: n / mean / p50 / p95 / max / share of the mean frame}"""
+        out = {stage: ring.stats() for stage, ring in self.rings.items()}
+        frame = out.get(FRAME)
+        if frame and frame["mean_ms"] > 0:
+            for stage, s in out.items():
+                if s and stage != FRAME:
+                    s["share"] = round(s["mean_ms"] / frame["mean_ms"], 3)
+        return out
+
+    def dump(self):
+        self.dump_at = time.monotonic() + self.dump_s
+        line = json.dumps({"component": self.component, "pid": os.getpid(), "time": round(time.time(), 3),
+                           "stages": self.stats()})
+        self.dump_file.write(line + "\n")
+        self.dump_file.flush()
+
+    def toggle_overlay(self):
+        self.overlay_on = not self.overlay_on
+
+    def overlay(self, frame, x=10, y=30, refresh_s=0.25):
+        """Draw the stage table onto a BGR frame (text refreshed 4x a second)"""
+        if not self.overlay_on:
+            return
+        import cv2
+        now = time.monotonic()
+        if now - self.overlay_at >= refresh_s:
+            self.overlay_at = now
+            stats = self.stats()
+            frame_s = stats.get(FRAME)
+            lines = []
+            if frame_s:
+                lines.append(f"frame {frame_s['mean_ms']:6.1f} ms  p95 {frame_s['p95_ms']:6.1f}  "
+                             f"{1000 / frame_s['mean_ms']:5.1f} fps" if frame_s["mean_ms"] else "frame -")
+            for stage, s in stats.items():
+                if s and stage != FRAME:
+                    lines.append(f"{stage:10s} {s['mean_ms']:6.2f} ms  p95 {s['p95_ms']:6.2f}  "
+                                 f"{s.get('share', 0) * 100:3.0f}%")
+            self.overlay_lines = lines
+        h = 22 * len(self.overlay_lines) + 10
+        w = 430
+        panel = frame[y - 22:y - 22 + h, x - 5:x - 5 + w]
+        panel[:] = panel // 3  # darken behind the text
+        for i, line in enumerate(self.overlay_lines):
+            cv2.putText(frame, line, (x, y + 22 * i), cv2.FONT_HERSHEY_PLAIN, 1.2, (0, 255, 0), 1)
+
+    def close(self):
+        if self.dump_file is not None:
+            self.dump()
+            if self.dump_file is not sys.stderr:
+                self.dump_file.close()
+            self.dump_file = None
@@ -0,0 +1,36 @@
+import json
+import os
+import sys
+
+# Set by the supervisor's standby pool when it pre-starts a worker.
+STANDBY_ENV = "POSTUREBOT_STANDBY"
+WARM_ENV = "POSTUREBOT_WARM_FILE"
+
+
+def is_standby():
+    return os.environ.get(STANDBY_ENV) == "1"
+
+
+def park(warmup=None):
+    """Standby workers: warm up, report warm, then block until activated.
+
+    Call it after the heavy imports and model load but before opening the
+    camera/window, which only one active process may hold. A normal launch
+    returns immediately. The activation line may carry environment overrides
+    (a station's ports and camera), so read those settings after park().
+    """
+    if not is_standby():
+        return
+    if warmup is not None:
+        warmup()
+    path = os.environ.get(WARM_ENV)
+    if path:
+        with open(path, "w") as f:
+            f.write(str(os.getpid()))
+    # the pool writes one line to activate us ("go" or "go {env}"); EOF means we were dropped
+    line = sys.stdin.readline()
+    if not line:
+        sys.exit(0)
+    overrides = line[2:].strip()
+    if overrides:
+        os.environ.update(json.loads(overrides))
@@ -0,0 +1,146 @@
+import os
+import re
+import socket
+import threading
+from dataclasses import dataclass, field
+
+from posturekit.capture import CAMERA_ENV
+from posturekit.framestream import PORT_ENV as STREAM_PORT_ENV
+from posturekit.resources import core_roles
+
+# Stations: one kiosk each, with its own camera, backend ports and Supervisor.
+# The hub keys every launch by station id, so closing or switching one
+# station only ever touches that station's process groups. The "default"
+# station keeps the legacy ports (8000 / 7000 / lane channel 8765) and the
+# scripts' own camera choice, so a single kiosk behaves exactly as before.
+#
+#   POSTUREBOT_STATION_CORES=<n>  pin each station to its own n cores (slots
+#                                 wrap around the usable cores), 0 = share all
+
+STATION_ENV = "POSTUREBOT_STATION"
+CORES_ENV = "POSTUREBOT_STATION_CORES"
+DEFAULT = "default"
+LEGACY_PORTS = {"traffic": 8000, "quiz": 7000, "lanes": 8765}
+
+_VALID = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+
+def valid_station(station):
+    return bool(_VALID.match(station))
+
+
+def free_port(kind=socket.SOCK_STREAM):
+    """A port the OS considers free right now on loopback"""
+    with socket.socket(socket.AF_INET, kind) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def station_cores(slot, per, cores=None):
+    """Core slice for a station slot, wrapping when there are more stations than slices"""
+    if cores is None:
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if not per or not cores:
+        return cores
+    per = min(per, len(cores))
+    start = (slot * per) % len(cores)
+    return [cores[(start + i) % len(cores)] for i in range(per)]
+
+
+@dataclass
+class Station:
+    id: str
+    slot: int
+    camera: int
+    ports: dict
+    supervisor: object
+    cores: list = field(default_factory=list)
+
+    @property
+    def is_default(self):
+        return self.id == DEFAULT
+
+    def env(self):
+        """Environment for this station's children (empty for the default station)"""
+        if self.is_default:
+            return {}
+        return {
+            STATION_ENV: self.id,
+            CAMERA_ENV: str(self.camera),
+            "POSTUREBOT_USER": self.id,  # posturemonitor history per kiosk (posturekit.history.USER_ENV)
+            "POSTUREBOT_TRAFFIC_URL": f"http://127.0.0.1:{self.ports['traffic']}",
+            "POSTUREBOT_QUIZ_URL": f"http://127.0.0.1:{self.ports['quiz']}",
+            "TRAFFIC_INPUT_PORT": str(self.ports["lanes"]),
+            **({STREAM_PORT_ENV: str(self.ports["stream"])} if "stream" in self.ports else {}),
+        }
+
+    def describe(self):
+        return {"station": self.id, "camera": self.camera, "ports": self.ports, "cores": self.cores}
+
+
+class Stations:
+    """Station id -> Station, created on first launch and released on close.
+
+    `make_supervisor(roles)` builds the Supervisor a new station gets. Ports
+    are allocated from the OS when a station is created and kept until it is
+    released; cameras are the lowest index no other station holds (0 is the
+    default station's).
+    """
+    def __init__(self, make_supervisor, cores_per_station=None):
+        self.make_supervisor = make_supervisor
+        if cores_per_station is None:
+            cores_per_station = int(os.environ.get(CORES_ENV, "0"))
+        self.cores_per_station = cores_per_station
+        self.stations = {}
+        self.lock = threading.Lock()
+
+    def get(self, station, camera=None):
+        """The station, created if new. ValueError for a bad id or a camera another station holds."""
+        if not valid_station(station):
+            raise ValueError(f"bad station id {station!r}")
+        with self.lock:
+            st = self.stations.get(station)
+            if st is not None:
+                if camera is not None and camera != st.camera:
+                    raise ValueError(f"station {station} already runs on camera {st.camera}")
+                return st
+            taken = {s.camera for s in self.stations.values()} | {0}
+            if station == DEFAULT:
+                if camera not in (None, 0):
+                    raise ValueError(f"station {DEFAULT} always runs on camera 0")
+                camera, ports = 0, dict(LEGACY_PORTS)
+            else:
+                if camera is None:
+                    camera = next(i for i in range(len(taken) + 1) if i not in taken)
+                elif camera in taken:
+                    raise ValueError(f"camera {camera} is in use by another station")
+                ports = {"traffic": free_port(), "quiz": free_port(), "lanes": free_port(socket.SOCK_DGRAM)}
+            if os.environ.get(STREAM_PORT_ENV):
+                # streaming is on for the hub: the default station uses the configured port
+                ports["stream"] = int(os.environ[STREAM_PORT_ENV]) if station == DEFAULT else free_port()
+            slot = next(i for i in range(len(self.stations) + 1)
+                        if i not in {s.slot for s in self.stations.values()})
+            cores = station_cores(slot, self.cores_per_station) if self.cores_per_station else []
+            roles = core_roles(cores) if cores else None
+            st = Station(station, slot, camera, ports, self.make_supervisor(roles), cores)
+            self.stations[station] = st
+            return st
+
+    def find(self, station):
+        with self.lock:
+            return self.stations.get(station)
+
+    def all(self):
+        with self.lock:
+            return list(self.stations.values())
+
+    def release(self, station):
+        """Stop everything the station runs; non-default stations give back ports and camera"""
+        st = self.find(station)
+        if st is None:
+            return
+        st.supervisor.stop_all()
+        if not st.is_default:
+            with self.lock:
+                if self.stations.get(station) is st:
+                    del self.stations[station]
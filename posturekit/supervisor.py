@@ -0,0 +1,393 @@
+import json
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import count
+
+from posturekit.ready import READY_ENV
+from posturekit.procstats import rss_mb, group_usage
+from posturekit.resources import applied
+from posturekit.metrics import Registry, METRICS_DIR_ENV, COMPONENT_ENV, read_snapshots
+from posturekit.standby import STANDBY_ENV, WARM_ENV
+
+
+class LaunchError(RuntimeError):
+    pass
+
+
+def http_probe(url):
+    """Ready once GET url answers 200"""
+    def probe(proc):
+        try:
+            with urllib.request.urlopen(url, timeout=0.3) as r:
+                return r.status == 200
+        except OSError:
+            return False
+    return probe
+
+
+def ready_file_probe(proc):
+    """Ready once the child called posturekit.ready.signal_ready()"""
+    return os.path.exists(proc.ready_file)
+
+
+@dataclass
+class ProcSpec:
+    name: str
+    cmd: list
+    probe: object = ready_file_probe
+    env: dict = field(default_factory=dict)
+
+
+class ManagedProcess:
+    def __init__(self, spec, popen, ready_file, standby=False):
+        self.spec = spec
+        self.profile = None
+        self.profile_errors = {}  # what ResourceProfile.apply could not set
+        self.popen = popen
+        self.ready_file = ready_file
+        self.warm_file = f"{ready_file}.warm" if standby else None
+        self.started_at = time.perf_counter()
+        self.ready_at = None
+        self.activated = False  # True once a parked worker was handed a launch
+        self.recorded = False   # its time-to-ready went into the launch history
+
+    @property
+    def pid(self):
+        return self.popen.pid
+
+    def alive(self):
+        return self.popen.poll() is None
+
+    def is_ready(self):
+        if self.ready_at is None and self.alive() and self.spec.probe(self):
+            self.ready_at = time.perf_counter()
+        return self.ready_at is not None
+
+    def is_warm(self):
+        return self.warm_file is not None and self.alive() and os.path.exists(self.warm_file)
+
+    def activate(self, env=None):
+        line = f"go {json.dumps(env)}\n" if env else "go\n"
+        self.popen.stdin.write(line.encode())
+        self.popen.stdin.close()
+        self.started_at = time.perf_counter()
+        self.activated = True
+
+
+class Supervisor:
+    """Owns every child as its own process group, tracked by PID.
+
+    Children are started with start_new_session so a stop reaches helpers they
+    spawn too (multiprocessing helpers, a uvicorn reloader), and always waited on so no zombies
+    are left behind. All switches are serialized by one lock.
+
+    Specs listed in `standby` are kept pre-started in a warm pool: imports
+    done, model loaded and run once on a dummy frame, parked before opening
+    the camera (see posturekit.standby.park). A launch activates the parked
+    worker instead of cold-starting Python. The pool is refilled in the
+    background and capped at `standby_mb` of resident memory.
+
+    switch() takes a {name: ResourceProfile} map for the mode being entered:
+    thread caps go into the child's environment at spawn, CPU affinity and
+    nice are (re)applied to the whole process group, including kept and
+    activated standby children. `standby_profiles` are the thread caps used
+    when pre-starting standby workers.
+
+    Several supervisors can share one standby pool: pass `pool`, a Supervisor
+    that only keeps the parked workers, and each takes its launches from it.
+    A parked worker is handed the spec's env on activation. `roles` are the
+    cores the resource profiles pin to (default: all usable cores).
+    """
+    def __init__(self, cwd, stop_grace=3.0, kill_grace=2.0, ready_timeout=30.0,
+                 standby=(), standby_mb=1024, standby_profiles=None, pool=None, roles=None):
+        self.cwd = cwd
+        self.stop_grace = stop_grace
+        self.kill_grace = kill_grace
+        self.ready_timeout = ready_timeout
+        self.procs = {}
+        self.lock = threading.RLock()
+        self.pool = pool or self
+        self.roles = roles
+        # shared with the pool, activated workers keep the files they were spawned with
+        self.ready_dir = pool.ready_dir if pool else tempfile.mkdtemp(prefix="posturebot-ready-")
+        self.spawn_ids = pool.spawn_ids if pool else count()
+        self.standby_specs = list(standby)
+        self.standby_mb = standby_mb
+        self.parked = {}
+        self.fill_lock = threading.Lock()
+        self.launches = {}
+        self.metrics_dir = pool.metrics_dir if pool else tempfile.mkdtemp(prefix="posturebot-metrics-")
+        self.cpu_samples = {}
+        self.standby_profiles = standby_profiles or {}
+
+    # ---- single process ----
+    def _spawn(self, spec, standby=False, profile=None):
+        ready_file = os.path.join(self.ready_dir, f"{spec.name}-{next(self.spawn_ids)}")
+        env = dict(os.environ, **spec.env)
+        env[READY_ENV] = ready_file
+        env[COMPONENT_ENV] = spec.name
+        env[METRICS_DIR_ENV] = self.metrics_dir
+        if profile is not None:
+            env.update(profile.env())
+        env.pop(STANDBY_ENV, None)
+        if standby:
+            env[STANDBY_ENV] = "1"
+            env[WARM_ENV] = f"{ready_file}.warm"
+        popen = subprocess.Popen(spec.cmd, cwd=self.cwd, env=env, start_new_session=True,
+                                 stdin=subprocess.PIPE if standby else None)
+        mp = ManagedProcess(spec, popen, ready_file, standby=standby)
+        self._apply_profile(mp, profile)
+        return mp
+
+    def _apply_profile(self, mp, profile):
+        mp.profile_errors = profile.apply(mp.pid, self.roles) if profile is not None else {}
+        mp.profile = profile
+        if mp.profile_errors:
+            print(f"{mp.spec.name}: profile not fully applied {mp.profile_errors}")
+
+    def take_parked(self, spec):
+        """Parked worker for `spec` (the pool refills later), or None"""
+        with self.lock:
+            mp = self.parked.pop(spec.name, None)
+        if mp is not None and not (mp.alive() and mp.spec.cmd == spec.cmd):
+            self._terminate(mp)
+            mp = None
+        return mp
+
+    def start(self, spec, profile=None):
+        mp = self.pool.take_parked(spec)
+        # a worker still warming up is activated too: it reads the line once parked
+        if mp is not None:
+            mp.spec = spec
+            self._apply_profile(mp, profile)
+            if "nice" in mp.profile_errors:
+                # parked at a higher nice than this launch may lower it to, start cold instead
+                self._terminate(mp)
+                mp = None
+        if mp is not None:
+            mp.activate(spec.env)
+        else:
+            mp = self._spawn(spec, profile=profile)
+        self.procs[spec.name] = mp
+        return mp
+
+    def stop(self, name):
+        mp = self.procs.pop(name, None)
+        if mp is not None:
+            self._terminate(mp)
+
+    def _terminate(self, mp):
+        self._signal_group(mp, signal.SIGTERM)
+        try:
+            mp.popen.wait(self.stop_grace)
+        except subprocess.TimeoutExpired:
+            self._signal_group(mp, signal.SIGKILL)
+            try:
+                mp.popen.wait(self.kill_grace)
+            except subprocess.TimeoutExpired:
+                pass
+        # the leader may exit before its helpers, sweep the group regardless
+        self._signal_group(mp, signal.SIGKILL)
+
+    def _signal_group(self, mp, sig):
+        try:
+            os.killpg(mp.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    # ---- whole sets ----
+    def switch(self, specs, profiles=None):
+        """Make exactly `specs` run. Idempotent: live, matching children are kept."""
+        profiles = profiles or {}
+        with self.lock:
+            t0 = time.perf_counter()
+            wanted = {s.name: s for s in specs}
+
+            for name in list(self.procs):
+                mp = self.procs[name]
+                spec = wanted.get(name)
+                if spec is None or not mp.alive() or (mp.spec.cmd, mp.spec.env) != (spec.cmd, spec.env):
+                    self.stop(name)
+                elif mp.profile != profiles.get(name):
+                    self._apply_profile(mp, profiles.get(name))
+
+            started = [self.start(s, profiles.get(s.name)) for s in specs if s.name not in self.procs]
+            try:
+                self.wait_ready([s.name for s in specs])
+            finally:
+                self.pool.refill_standby()
+            return {
+                "started": [mp.spec.name for mp in started],
+                "warm": [mp.spec.name for mp in started if mp.activated],
+                "switch_ms": round((time.perf_counter() - t0) * 1000, 1),
+            }
+
+    def stop_all(self):
+        with self.lock:
+            for name in list(self.procs):
+                self.stop(name)
+
+    def wait_ready(self, names):
+        deadline = time.perf_counter() + self.ready_timeout
+        pending = list(names)
+        while pending:
+            for name in list(pending):
+                mp = self.procs[name]
+                if not mp.alive():
+                    raise LaunchError(f"{name} exited with code {mp.popen.returncode} before becoming ready")
+                if mp.is_ready():
+                    pending.remove(name)
+                    self._record_launch(mp)
+            if not pending:
+                break
+            if time.perf_counter() > deadline:
+                raise LaunchError(f"{', '.join(pending)} not ready after {self.ready_timeout:.0f}s")
+            time.sleep(0.02)
+
+    def _record_launch(self, mp):
+        # kept children pass wait_ready on every switch, count each launch once
+        if mp.recorded:
+            return
+        mp.recorded = True
+        ms = (mp.ready_at - mp.started_at) * 1000
+        history = self.launches.setdefault(mp.spec.name, {"cold": deque(maxlen=20), "warm": deque(maxlen=20)})
+        history["warm" if mp.activated else "cold"].append(ms)
+
+    # ---- warm standby pool ----
+    def refill_standby(self):
+        if self.standby_specs:
+            threading.Thread(target=self._fill_standby, daemon=True).start()
+
+    def _fill_standby(self):
+        if not self.fill_lock.acquire(blocking=False):
+            return
+        try:
+            for spec in self.standby_specs:
+                with self.lock:
+                    mp = self.parked.get(spec.name)
+                    if mp is not None and mp.alive():
+                        continue
+                    mp = self._spawn(spec, standby=True, profile=self.standby_profiles.get(spec.name))
+                    self.parked[spec.name] = mp
+
+                deadline = time.perf_counter() + self.ready_timeout
+                while mp.alive() and not mp.is_warm() and time.perf_counter() < deadline:
+                    time.sleep(0.05)
+
+                with self.lock:
+                    if self.parked.get(spec.name) is not mp:
+                        continue  # activated meanwhile
+                    if not mp.is_warm() or self.standby_rss_mb() > self.standby_mb:
+                        # failed to warm or over the memory cap: drop it, keep the rest cold
+                        self.parked.pop(spec.name)
+                        warm = mp.is_warm()
+                        self._terminate(mp)
+                        print(f"standby {spec.name} dropped ({'memory cap' if warm else 'did not warm up'})")
+                        break
+        finally:
+            self.fill_lock.release()
+
+    def standby_rss_mb(self):
+        return sum(rss_mb(mp.pid) for mp in self.parked.values() if mp.alive())
+
+    def launch_stats(self):
+        with self.lock:
+            def avg(xs):
+                return round(sum(xs) / len(xs), 1) if xs else None
+            return {
+                "launches": {
+                    name: {
+                        "cold_ms": avg(h["cold"]), "cold_n": len(h["cold"]),
+                        "warm_ms": avg(h["warm"]), "warm_n": len(h["warm"]),
+                    }
+                    for name, h in self.launches.items()
+                },
+                "standby": {name: {"pid": mp.pid, "warm": mp.is_warm(), "rss_mb": round(rss_mb(mp.pid), 1)}
+                            for name, mp in list(self.pool.parked.items())},
+                "standby_rss_mb": round(self.pool.standby_rss_mb(), 1),
+                "standby_cap_mb": self.pool.standby_mb,
+            }
+
+    # ---- metrics ----
+    def metrics_snapshots(self):
+        """Snapshots exported by live children plus CPU / RSS of every process group"""
+        with self.lock:
+            active = {mp.pid: mp for mp in self.procs.values() if mp.alive()}
+            parked_rss = self.standby_rss_mb() if self.pool is self else None
+
+        snapshots = []
+        for snap in read_snapshots(self.metrics_dir):
+            try:
+                pgid = os.getpgid(snap["pid"])
+            except ProcessLookupError:
+                self._drop_snapshot(snap)
+                continue
+            if pgid in active:
+                snapshots.append(snap)
+
+        now = time.perf_counter()
+        for pgid, mp in active.items():
+            cpu, rss = group_usage(pgid)
+            last = self.cpu_samples.get(pgid, (0.0, mp.started_at))
+            pct = 100.0 * (cpu - last[0]) / max(now - last[1], 1e-6)
+            self.cpu_samples[pgid] = (cpu, now)
+
+            reg = Registry()
+            reg.counter("posturebot_process_cpu_seconds_total",
+                        "CPU time of the process (supervised children: their process group)").set_total(cpu)
+            reg.gauge("posturebot_process_cpu_percent", "CPU use since the last scrape, 100 = one core").set(round(pct, 1))
+            reg.gauge("posturebot_process_rss_bytes",
+                      "Resident memory of the process (supervised children: their process group)").set(rss)
+            snapshots.append({"component": mp.spec.name, "pid": pgid, "metrics": reg.snapshot()})
+
+        for pgid in [p for p in self.cpu_samples if p not in active]:
+            del self.cpu_samples[pgid]
+
+        if parked_rss is not None:  # only the supervisor that owns the pool reports it
+            reg = Registry()
+            reg.gauge("posturebot_standby_rss_bytes", "Resident memory of the warm standby pool").set(parked_rss * 1024 * 1024)
+            snapshots.append({"component": "standby", "pid": 0, "metrics": reg.snapshot()})
+        return snapshots
+
+    def _drop_snapshot(self, snap):
+        path = os.path.join(self.metrics_dir, f"{snap['component']}-{snap['pid']}.json")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def shutdown(self):
+        with self.lock:
+            self.stop_all()
+            for mp in self.parked.values():
+                self._terminate(mp)
+            self.parked.clear()
+
+    def reap(self):
+        """Forget children that exited on their own (e.g. user closed the game window)"""
+        with self.lock:
+            for name in [n for n, mp in self.procs.items() if not mp.alive()]:
+                self.stop(name)
+
+    def status(self):
+        with self.lock:
+            return {
+                name: {
+                    "pid": mp.pid,
+                    "alive": mp.alive(),
+                    "ready": mp.ready_at is not None,
+                    "ready_ms": round((mp.ready_at - mp.started_at) * 1000, 1) if mp.ready_at else None,
+                    "profile": None if mp.profile is None else vars(mp.profile),
+                    "cpu_seconds": round(group_usage(mp.pid)[0], 2),
+                    **applied(mp.pid),
+                    "profile_errors": mp.profile_errors,
+                }
+                for name, mp in self.procs.items()
+            }
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import NamedTuple
+
+from posturekit.metrics import REGISTRY
+
+# Detection thresholds that can change while everything runs. The hub keeps
+# one versioned JSON file, {"version": n, "values": {...}}, replaced
+# atomically on every change (PUT /tuning). Components hold a Tuning and call
+# poll() between frames (or per request): that is one monotonic-clock
+# compare, plus a stat() of the file every interval_s, and a re-read only
+# when it changed. A new version swaps in a whole read-only dict at once, so
+# a frame never sees half an update. Every component exports the version it
+# runs as posturebot_tuning_version, which GET /tuning collects.
+#
+# Version 0 (no file yet) means "nothing tuned": components keep their own
+# defaults and env settings until the first PUT. on_change(values) runs
+# inside poll(), on the caller's thread, for every version after 0.
+#
+#   POSTUREBOT_TUNING=<path>  the shared file (~/.posturebot/tuning.json)
+
+TUNING_ENV = "POSTUREBOT_TUNING"
+DEFAULT_PATH = os.path.expanduser("~/.posturebot/tuning.json")
+
+
+class Param(NamedTuple):
+    default: float
+    lo: float
+    hi: float
+    help: str
+
+
+PARAMS = {
+    "tilt_threshold_deg": Param(15.0, 1.0, 60.0, "Head tilt that counts as left/right and as bad posture"),
+    "severity_threshold": Param(50, 0, 100, "Severity that counts as bad posture"),
+    "min_angle_deg": Param(10.0, 0.0, 60.0, "Tilt where the steering axis starts reacting"),
+    "max_angle_deg": Param(30.0, 1.0, 90.0, "Tilt where the steering axis is at full strength"),
+    "press_cooldown_s": Param(0.7, 0.0, 5.0, "Minimum gap between two lane presses (koushikbackend)"),
+    "hold_s": Param(0.7, 0.1, 5.0, "Tilt held this long makes a quiz answer ready"),
+    "bad_window_s": Param(5.0, 0.5, 300.0, "Bad posture held this long escalates Police Mode"),
+}
+
+DEFAULTS = MappingProxyType({name: p.default for name, p in PARAMS.items()})
+
+
+class TuningError(ValueError):
+    pass
+
+
+class StaleVersion(TuningError):
+    pass
+
+
+def tuning_path():
+    return os.environ.get(TUNING_ENV, DEFAULT_PATH)
+
+
+def validate(values):
+    """Checked and typed copy of `values` (a full set or just changes)"""
+    out = {}
+    for name, value in values.items():
+        p = PARAMS.get(name)
+        if p is None:
+            raise TuningError(f"unknown parameter {name}")
+        try:
+            value = type(p.default)(value)
+        except (TypeError, ValueError):
+            raise TuningError(f"{name} must be a number")
+        if not p.lo <= value <= p.hi:
+            raise TuningError(f"{name} must be within {p.lo}..{p.hi}")
+        out[name] = value
+    return out
+
+
+def read(path=None):
+    """(version, full values) from the shared file; (0, defaults) when there is none"""
+    try:
+        with open(path or tuning_path()) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0, dict(DEFAULTS)
+    return int(data["version"]), dict(DEFAULTS, **validate(data.get("values", {})))
+
+
+_write_lock = threading.Lock()
+
+
+def update(changes, expect_version=None, path=None):
+    """Apply `changes` as a new version; (version, values). TuningError on bad values or a stale version."""
+    path = path or tuning_path()
+    changes = validate(changes)
+    with _write_lock:
+        version, values = read(path)
+        if expect_version is not None and expect_version != version:
+            raise StaleVersion(f"version is {version}, not {expect_version}")
+        values.update(changes)
+        if values["min_angle_deg"] >= values["max_angle_deg"]:
+            raise TuningError("min_angle_deg must be below max_angle_deg")
+        version += 1
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": version, "time": time.time(), "values": values}, f)
+        os.replace(tmp, path)
+        return version, values
+
+
+class Tuning:
+    """A component's view of the shared thresholds, refreshed by poll()"""
+    def __init__(self, component, on_change=None, path=None, interval_s=0.5, registry=REGISTRY):
+        self.component = component
+        self.on_change = on_change
+        self.path = path or tuning_path()
+        self.interval_s = interval_s
+        self.version = 0
+        self.values = DEFAULTS
+        self.stamp = None
+        self.check_at = 0.0
+        self.gauge = registry.gauge("posturebot_tuning_version", "Tuning version this component runs")
+        self.poll(force=True)
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def poll(self, force=False):
+        """True when a new version was taken over (apply it before the next frame)"""
+        now = time.monotonic()
+        if not force and now < self.check_at:
+            return False
+        self.check_at = now + self.interval_s
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        try:
+            version, values = read(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"{self.component}: ignoring tuning file ({e})")
+            return False
+        if version == self.version:
+            return False
+        self.version, self.values = version, MappingProxyType(values)
+        self.gauge.set(version)
+        print(f"{self.component}: tuning version {version}")
+        if self.on_change is not None:
+            self.on_change(self.values)
+        return True
+
+    @property
+    def tuned(self):
+        """False while no one has tuned anything yet (version 0)"""
+        return self.version > 0
+
+
+def running_versions(snapshots):
+    """{component: version} from metrics snapshots, for GET /tuning"""
+    out = {}
+    for snap in snapshots:
+        family = snap["metrics"].get("posturebot_tuning_version")
+        if not family:
+            continue
+        name = snap["component"] if not snap.get("station") else f"{snap['station']}/{snap['component']}"
+        for series in family["series"]:
+            out[name] = int(series["value"])
+    return out
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# the scripts' folders import their neighbours as top-level modules
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "consequence", ROOT / "gamekoushik"):
+    sys.path.insert(0, str(path))
@@ -0,0 +1,45 @@
+from adaptivesampler import AdaptiveSampler
+from postureaggregator import PostureAggregator
+
+ABSENT = {"type": "NO_PERSON"}
+
+
+def person(severity=10, tilt=0.0):
+    return {"type": "POSTURE_OK", "severity": severity, "confidence": 0.9, "headtiltangle": tilt,
+            "headdirection_left": False, "headdirection_right": False}
+
+
+def step(sampler, agg, sample, now):
+    agg.update(sample, now=now)
+    return sampler.interval(agg, sample, now)
+
+
+def test_good_posture_runs_at_the_base_rate():
+    sampler, agg = AdaptiveSampler(base_hz=2, active_hz=10), PostureAggregator()
+    assert step(sampler, agg, person(10), 0.0) == 0.5
+
+
+def test_near_the_threshold_runs_fast_and_holds():
+    sampler, agg = AdaptiveSampler(base_hz=2, active_hz=10, hold_s=1.0), PostureAggregator()
+    assert step(sampler, agg, person(10, tilt=12.0), 0.0) == 0.1  # 12 >= 0.7 * 15
+    assert step(sampler, agg, person(10), 0.5) == 0.1               # still within hold_s
+    assert step(sampler, agg, person(10), 1.5) == 0.5
+
+
+def test_a_running_bad_streak_is_timed_closely():
+    # near=2: severity and tilt alone never count as near, only the streak does
+    sampler = AdaptiveSampler(base_hz=2, active_hz=10, hold_s=0.5, near=2.0)
+    agg = PostureAggregator(window_s=5.0)
+    step(sampler, agg, person(90), 0.0)
+    assert agg.state == "POSTURE_BAD" and not agg.sustained
+    assert step(sampler, agg, person(90), 1.0) == 0.1
+    assert step(sampler, agg, person(90), 6.0) == 0.5  # sustained is reported, back to the base rate
+    assert agg.sustained
+
+
+def test_nobody_there_drops_to_idle_after_a_while():
+    sampler, agg = AdaptiveSampler(base_hz=2, idle_hz=0.5, idle_after_s=10.0), PostureAggregator()
+    assert step(sampler, agg, ABSENT, 0.0) == 0.5
+    assert step(sampler, agg, ABSENT, 9.0) == 0.5
+    assert step(sampler, agg, ABSENT, 10.0) == 2.0
+    assert step(sampler, agg, person(10), 11.0) == 0.5  # someone came back
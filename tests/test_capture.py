@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from posturekit.capture import CaptureProfile, FakeCapture, FakeClock, device_key, negotiate, select_profile
+
+
+def fake(**kwargs):
+    clock = FakeClock()
+    return FakeCapture(clock=clock, **kwargs), clock
+
+
+def test_mjpg_720p_wins_over_slow_yuyv():
+    cap, clock = fake()
+    best = negotiate(cap, 1280, 720, 30, clock=clock, sleep=clock.sleep)
+    assert (best.fourcc, best.width, best.height) == ("MJPG", 1280, 720)
+    assert best.measured_fps == pytest.approx(30.0, abs=0.5)
+
+
+def test_yuyv_only_camera_prefers_frame_rate_over_size():
+    cap, clock = fake(modes={("YUYV", 640, 480): 30.0, ("YUYV", 1280, 720): 10.0})
+    best = negotiate(cap, 1280, 720, 30, clock=clock, sleep=clock.sleep)
+    assert (best.fourcc, best.width, best.height) == ("YUYV", 640, 480)
+
+
+def test_driver_ignoring_buffersize_shows_older_frames():
+    cap, clock = fake(honours_buffersize=True)
+    fresh = negotiate(cap, 1280, 720, 30, clock=clock, sleep=clock.sleep)
+    cap, clock = fake(honours_buffersize=False, buffers=4)
+    stale = negotiate(cap, 1280, 720, 30, clock=clock, sleep=clock.sleep)
+    assert stale.age_ms > fresh.age_ms + 30  # at least one more frame period behind
+
+
+def test_cached_profile_is_reused(tmp_path):
+    path = str(tmp_path / "capture.json")
+    cap, clock = fake()
+    first = select_profile(cap, 99, 1280, 720, 30, cache_path=path, clock=clock, sleep=clock.sleep)
+
+    cap, clock = fake()
+    t0 = clock()
+    again = select_profile(cap, 99, 1280, 720, 30, cache_path=path, clock=clock, sleep=clock.sleep)
+    assert again == first
+    assert clock() == t0  # nothing measured
+
+
+def test_stale_cached_profile_is_renegotiated(tmp_path):
+    path = tmp_path / "capture.json"
+    gone = CaptureProfile("MJPG", 1920, 1080, 30, 30.0, 0.0)
+    path.write_text(json.dumps({device_key(99): {"1280x720@30": vars(gone)}}))
+
+    cap, clock = fake()
+    profile = select_profile(cap, 99, 1280, 720, 30, cache_path=str(path), clock=clock, sleep=clock.sleep)
+    assert (profile.fourcc, profile.width, profile.height) == ("MJPG", 1280, 720)
+    cached = json.loads(path.read_text())[device_key(99)]["1280x720@30"]
+    assert (cached["width"], cached["height"]) == (1280, 720)
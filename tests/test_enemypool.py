@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from enemypool import EnemyPool
+
+
+def test_advance_frees_passed_cars_and_reuses_slots():
+    pool = EnemyPool(3, capacity=2)
+    pool.spawn(0, 0.0, 1)
+    pool.spawn(0, 50.0, 2)
+    assert pool.advance(60.0, limit=100.0) == 1
+    assert pool.count == 1
+    pool.spawn(0, -10.0, 3)  # takes the freed slot, no growth
+    assert pool.capacity == 2 and pool.count == 2
+
+
+def test_full_lane_grows():
+    pool = EnemyPool(2, capacity=2)
+    for y in (0.0, 10.0, 20.0):
+        pool.spawn(1, y, 0)
+    assert pool.capacity == 4 and pool.count == 3
+    assert pool.visible(-100, 100, 5) == ([1, 1, 1], [0, 10, 20], [0, 0, 0])
+
+
+def test_hits_only_look_at_the_given_lanes():
+    pool = EnemyPool(3)
+    pool.spawn(2, 100.0, 0)
+    assert pool.hits([2], top=120, bottom=160, height=30)
+    assert not pool.hits([0, 1], top=120, bottom=160, height=30)
+    assert not pool.hits([2], top=140, bottom=160, height=30)  # car ends at 130
+
+
+def test_clear_and_visible_offset():
+    pool = EnemyPool(2)
+    pool.spawn(0, 10.0, 4)
+    assert pool.visible(0, 100, 5, offset=2.5) == ([0], [12], [4])
+    pool.clear()
+    assert pool.count == 0 and pool.visible(0, 100, 5) == ([], [], [])
@@ -0,0 +1,70 @@
+import pytest
+
+from posturekit.gestures import GestureRecognizer, SwingDetector, head_pose
+from posturekit.inference import Keypoint
+
+FPS = 30.0
+
+
+def run(recognizer, angles, start=0.0, confidence=0.9, yaw=None, pitch=None):
+    """(kind, side) of every event for one angle per frame"""
+    events = []
+    for i, angle in enumerate(angles):
+        t = start + i / FPS
+        events += recognizer.update(angle, confidence, t,
+                                    None if yaw is None else yaw[i], None if pitch is None else pitch[i])
+    return [(e.kind, e.side) for e in events]
+
+
+def test_hold_fires_once_after_hold_s():
+    g = GestureRecognizer(threshold=15.0, hold_s=0.7)
+    assert run(g, [25.0] * int(FPS)) == [("hold", "RIGHT")]
+    assert g.state()["ready"] and g.state()["selection"] == "RIGHT"
+
+
+def test_low_confidence_never_selects():
+    g = GestureRecognizer(min_confidence=0.5)
+    assert run(g, [-25.0] * int(FPS), confidence=0.2) == []
+    assert g.state()["selection"] == "NEUTRAL"
+
+
+def test_quick_flick_and_back():
+    g = GestureRecognizer(flick_deg=20.0, neutral_deg=8.0, flick_s=0.5)
+    assert run(g, [0.0, -30.0, -30.0, -10.0, 0.0]) == [("flick", "LEFT")]
+
+
+def test_slow_tilt_is_not_a_flick():
+    g = GestureRecognizer(flick_s=0.5)
+    angles = [30.0] * int(FPS) + [0.0]
+    assert ("flick", "RIGHT") not in run(g, angles)
+
+
+def swing(amplitude, period_frames, frames):
+    """Square wave around 0"""
+    return [amplitude if (i // period_frames) % 2 else -amplitude for i in range(frames)]
+
+
+def test_nod_and_shake():
+    pitch = [0.0] * 10 + swing(0.2, 4, 16)
+    g = GestureRecognizer()
+    assert ("nod", None) in run(g, [0.0] * len(pitch), pitch=pitch)
+    g = GestureRecognizer()
+    assert ("shake", None) in run(g, [0.0] * len(pitch), yaw=pitch)
+
+
+def test_swings_too_far_apart_do_not_count():
+    d = SwingDetector(amplitude=0.1, window_s=1.0, baseline_s=100.0)
+    d.update(0.0, 0.0)
+    hits = [d.update(v, t) for t, v in ((0.1, 0.3), (1.0, -0.3), (2.5, 0.3), (4.0, -0.3))]
+    assert not any(hits)
+
+
+def test_head_pose_is_independent_of_roll():
+    def face(nose, l_ear, r_ear):
+        lm = [Keypoint(0.0, 0.0, 1.0)] * 9
+        lm[0], lm[7], lm[8] = (Keypoint(x, y, 1.0) for x, y in (nose, l_ear, r_ear))
+        return lm
+    level = head_pose(face((0.5, 0.52), (0.6, 0.5), (0.4, 0.5)))
+    rolled = head_pose(face((0.48, 0.52), (0.6, 0.6), (0.4, 0.4)))  # same face turned 45 degrees
+    assert level == pytest.approx((0.0, 0.1)) and rolled == pytest.approx((0.0, 0.1))
+    assert head_pose(face((0.5, 0.5), (0.5, 0.5), (0.5, 0.5))) == (0.0, 0.0)
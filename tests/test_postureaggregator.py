@@ -0,0 +1,69 @@
+from postureaggregator import PostureAggregator
+
+
+def sample(severity=10, tilt=0.0, kind=None):
+    return {"type": kind or "POSTURE_OK", "severity": severity, "confidence": 0.9, "headtiltangle": tilt,
+            "headdirection_left": False, "headdirection_right": False}
+
+
+def feed(agg, samples, start=0.0, hz=30.0):
+    """Events as (time, event, type) for samples at hz"""
+    out = []
+    for i, s in enumerate(samples):
+        t = start + i / hz
+        out += [(round(t, 3), e["event"], e["type"]) for e in agg.update(s, now=t)]
+    return out
+
+
+def test_first_sample_is_a_transition():
+    agg = PostureAggregator()
+    assert [e["event"] for e in agg.update(sample(), now=0.0)] == ["transition"]
+    assert agg.state == "POSTURE_OK"
+
+
+def test_bad_posture_escalates_once_after_the_window():
+    agg = PostureAggregator(window_s=5.0, heartbeat_s=100.0)
+    events = feed(agg, [sample(90)] * (30 * 7))
+    kinds = [(e, s) for _, e, s in events]
+    assert kinds == [("transition", "POSTURE_BAD"), ("sustained", "POSTURE_BAD")]
+    assert events[1][0] >= 5.0
+
+
+def test_hysteresis_keeps_bad_between_the_thresholds():
+    agg = PostureAggregator(alpha=1.0, enter_severity=50, exit_severity=40)
+    feed(agg, [sample(60)])
+    assert agg.state == "POSTURE_BAD"
+    feed(agg, [sample(45)], start=1.0)  # below enter, above exit
+    assert agg.state == "POSTURE_BAD"
+    feed(agg, [sample(30)], start=2.0)
+    assert agg.state == "POSTURE_OK"
+
+
+def test_a_single_spike_is_smoothed_away():
+    agg = PostureAggregator(heartbeat_s=100.0)
+    events = feed(agg, [sample(10)] * 30 + [sample(100)] + [sample(10)] * 30)
+    assert [e for _, e, _ in events] == ["transition"]
+
+
+def test_heartbeat_repeats_state_and_sustained():
+    agg = PostureAggregator(window_s=1.0, heartbeat_s=2.0)
+    events = feed(agg, [sample(90)] * (30 * 6))
+    kinds = [e for _, e, _ in events]
+    assert kinds[:2] == ["transition", "sustained"]
+    assert set(kinds[2:]) == {"sustained"} and len(kinds) >= 3  # the warning is repeated
+
+
+def test_nobody_in_frame_keeps_the_state():
+    agg = PostureAggregator(heartbeat_s=1.0)
+    feed(agg, [sample(10)])
+    events = feed(agg, [{"type": "NO_PERSON"}] * 60, start=0.1)
+    assert agg.state == "POSTURE_OK"
+    assert [(t, e) for t, e, _ in events] == [(1.0, "heartbeat"), (2.0, "heartbeat")]
+
+
+def test_smoothing_does_not_depend_on_the_sample_rate():
+    fast, slow = PostureAggregator(), PostureAggregator()
+    feed(fast, [sample(10)] + [sample(90)] * 30, hz=30.0)
+    feed(slow, [sample(10)] + [sample(90)] * 2, hz=2.0)
+    # both saw one second of bad posture after one good frame
+    assert abs(fast.ewma - slow.ewma) < 1.0
@@ -0,0 +1,78 @@
+import pytest
+
+from posturekit import stations
+from posturekit.stations import DEFAULT, LEGACY_PORTS, Stations, station_cores
+
+
+class FakeSupervisor:
+    def __init__(self, roles):
+        self.roles = roles
+        self.stopped = False
+
+    def stop_all(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    monkeypatch.delenv(stations.STREAM_PORT_ENV, raising=False)
+    return Stations(FakeSupervisor, cores_per_station=0)
+
+
+def test_default_station_keeps_the_legacy_setup(hub):
+    st = hub.get(DEFAULT)
+    assert st.camera == 0 and st.ports == LEGACY_PORTS and st.env() == {}
+    assert hub.get(DEFAULT, camera=0) is st
+
+
+def test_default_station_rejects_another_camera(hub):
+    with pytest.raises(ValueError):
+        hub.get(DEFAULT, camera=2)
+
+
+def test_new_stations_get_free_cameras_and_their_own_ports(hub):
+    a, b = hub.get("k1"), hub.get("k2")
+    assert (a.camera, b.camera) == (1, 2)
+    assert a.ports != b.ports
+    env = a.env()
+    assert env[stations.STATION_ENV] == "k1" and env[stations.CAMERA_ENV] == "1"
+    assert env["TRAFFIC_INPUT_PORT"] == str(a.ports["lanes"])
+
+
+def test_camera_conflicts_are_rejected(hub):
+    hub.get("k1", camera=3)
+    with pytest.raises(ValueError, match="in use"):
+        hub.get("k2", camera=3)
+    with pytest.raises(ValueError, match="already runs on camera"):
+        hub.get("k1", camera=4)
+    with pytest.raises(ValueError, match="bad station id"):
+        hub.get("../etc")
+
+
+def test_release_stops_and_frees_the_camera(hub):
+    a = hub.get("k1")
+    hub.release("k1")
+    assert a.supervisor.stopped and hub.find("k1") is None
+    assert hub.get("k2").camera == a.camera
+
+
+def test_default_station_is_stopped_but_kept(hub):
+    st = hub.get(DEFAULT)
+    hub.release(DEFAULT)
+    assert st.supervisor.stopped and hub.find(DEFAULT) is st
+
+
+def test_core_slices_wrap_around():
+    cores = [0, 1, 2, 3, 4, 5]
+    assert station_cores(0, 2, cores) == [0, 1]
+    assert station_cores(2, 2, cores) == [4, 5]
+    assert station_cores(3, 2, cores) == [0, 1]
+    assert station_cores(0, 0, cores) == cores
+    assert station_cores(1, 8, [0, 1]) == [0, 1]
+
+
+def test_pinned_stations_get_their_own_roles():
+    hub = Stations(FakeSupervisor, cores_per_station=3)
+    st = hub.get("k1")
+    if st.cores:
+        assert set(sum(st.supervisor.roles.values(), [])) <= set(st.cores)
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from posturekit import tuning
+from posturekit.metrics import Registry
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tuning.json")
+
+
+def test_no_file_means_version_0_and_defaults(path):
+    assert tuning.read(path) == (0, dict(tuning.DEFAULTS))
+
+
+def test_validate_types_and_ranges():
+    assert tuning.validate({"severity_threshold": "60"}) == {"severity_threshold": 60}
+    with pytest.raises(tuning.TuningError, match="unknown parameter"):
+        tuning.validate({"nope": 1})
+    with pytest.raises(tuning.TuningError, match="must be a number"):
+        tuning.validate({"hold_s": "soon"})
+    with pytest.raises(tuning.TuningError, match="within"):
+        tuning.validate({"tilt_threshold_deg": 90})
+
+
+def test_update_bumps_the_version_and_keeps_other_values(path):
+    assert tuning.update({"hold_s": 1.0}, path=path)[0] == 1
+    version, values = tuning.update({"severity_threshold": 70}, expect_version=1, path=path)
+    assert version == 2
+    assert values["hold_s"] == 1.0 and values["severity_threshold"] == 70
+    assert tuning.read(path) == (2, values)
+
+
+def test_stale_version_is_rejected(path):
+    tuning.update({"hold_s": 1.0}, path=path)
+    with pytest.raises(tuning.StaleVersion):
+        tuning.update({"hold_s": 2.0}, expect_version=0, path=path)
+    assert tuning.read(path)[0] == 1
+
+
+def test_min_angle_must_stay_below_max(path):
+    with pytest.raises(tuning.TuningError):
+        tuning.update({"min_angle_deg": 40.0}, path=path)
+    assert tuning.read(path)[0] == 0  # nothing written
+
+
+def test_poll_takes_over_new_versions(path):
+    seen = []
+    t = tuning.Tuning("test", on_change=lambda v: seen.append(dict(v)), path=path, interval_s=0.0,
+                      registry=Registry())
+    assert not t.tuned and t["hold_s"] == tuning.DEFAULTS["hold_s"]
+    assert not t.poll()
+
+    tuning.update({"hold_s": 2.5}, path=path)
+    assert t.poll()
+    assert t.version == 1 and t["hold_s"] == 2.5 and seen[-1]["hold_s"] == 2.5
+    assert not t.poll()  # unchanged file
+    with pytest.raises(TypeError):
+        t.values["hold_s"] = 1.0  # read-only for the frame loop
+
+
+def test_broken_file_keeps_the_running_version(path, capsys):
+    tuning.update({"hold_s": 2.5}, path=path)
+    t = tuning.Tuning("test", path=path, interval_s=0.0, registry=Registry())
+    with open(path, "w") as f:
+        f.write("{not json")
+    os.utime(path, ns=(1, 1))
+    assert not t.poll()
+    assert t.version == 1 and t["hold_s"] == 2.5
+    assert "ignoring tuning file" in capsys.readouterr().out
+
+
+def test_running_versions_from_snapshots():
+    snaps = [
+        {"component": "hub", "metrics": {}},
+        {"component": "trafficgame", "station": "k2",
+         "metrics": {"posturebot_tuning_version": {"series": [{"labels": {}, "value": 3.0}]}}},
+    ]
+    assert tuning.running_versions(snaps) == {"k2/trafficgame": 3}